@@ -1,5 +1,6 @@
 from logic_gates import *
 from arithmetic import *
+from utils import check_inputs, shared
 
 
 # op[in]: 0-3
@@ -15,6 +16,10 @@ from arithmetic import *
 #   4   ADD
 #   5   SUB
 class ArithEngine:
+    __slots__ = ("cache", "_netlists", "_inputs_checked", "num_bits", "mode", "splitter", "decoder", "swc", "or_gate", "nand_gate",
+                 "nor_gate", "and_gate", "adder_cls", "mul_cls", "_adder", "_suber", "_mul", "or_gate_4way")
+    input_names = ("A", "B", "op")
+    output_names = ("C",)
     OPS = {
         "OR": 0,
         "NAND": 1,
@@ -25,48 +30,131 @@ class ArithEngine:
         "MUL": 6,
     }
 
-    def __init__(self, num_bits):
+    # "structural" evaluates every datapath and muxes them through SWC and
+    # ORGate_4way, like the hardware. "functional" decodes op first and only
+    # evaluates the selected datapath; the result is the same.
+    MODES = ("structural", "functional")
+
+    # adder: any FullAdder_multi_bits-compatible class, e.g. KoggeStoneAdder
+    # mul: any Mul-compatible class, e.g. BoothMul
+    def __init__(self, num_bits, adder=FullAdder_multi_bits, mul=Mul, mode="structural"):
+        assert mode in self.MODES, f"unknown mode {mode}"
         self.num_bits = num_bits
+        self.mode = mode
+
+        self.splitter = shared(Splitter_8bit)
+        self.decoder = shared(Decoder_3bit)
+        self.swc = shared(SWC)
+
+        self.or_gate = shared(ORGate)
+        self.nand_gate = shared(NANDGate)
+        self.nor_gate = shared(NORGate)
+        self.and_gate = shared(ANDGate)
+        self.adder_cls = adder
+        self.mul_cls = mul
+        self._adder = None
+        self._suber = None
+        self._mul = None
+
+        self.or_gate_4way = shared(ORGate_4way)
+
+    # The arithmetic datapaths are the bulk of the tree, so they are built
+    # on first use: a functional-mode engine that only ever sees logic ops
+    # never builds them.
+    @property
+    def adder(self):
+        if self._adder is None:
+            self._adder = shared(self.adder_cls, self.num_bits)
+        return self._adder
+
+    @property
+    def suber(self):
+        if self._suber is None:
+            self._suber = shared(Sub, self.num_bits, self.adder_cls)
+        return self._suber
 
-        self.splitter = Splitter_8bit()
-        self.decoder = Decoder_3bit()
-        self.swc = SWC()
+    @property
+    def mul(self):
+        if self._mul is None:
+            self._mul = shared(self.mul_cls, self.num_bits)
+        return self._mul
 
-        self.or_gate = ORGate()
-        self.nand_gate = NANDGate()
-        self.nor_gate = NORGate()
-        self.and_gate = ANDGate()
-        self.adder = FullAdder_multi_bits(num_bits)
-        self.suber = Sub(num_bits)
-        self.mul = Mul(num_bits)
+    def call(self, A, B, op):
+        op = self.decoder.call(self.splitter.call(op)[:3])
+        if self.mode == "functional":
+            return self._call_selected(A, B, op)
 
-        self.or_gate_4way = ORGate_4way()
+        or_out = self.or_gate.call(A, B)
+        nand_out = self.nand_gate.call(A, B)
+        nor_out = self.nor_gate.call(A, B)
+        and_out = self.and_gate.call(A, B)
+        add_out = self.adder.call(A, B, 0)[0]
+        sub_out = self.suber.call(A, B)[0]
+        mul_out = self.mul.call(A, B)
 
+        outs = [
+            self.swc.call(or_out, op[self.OPS["OR"]]),
+            self.swc.call(nand_out, op[self.OPS["NAND"]]),
+            self.swc.call(nor_out, op[self.OPS["NOR"]]),
+            self.swc.call(and_out, op[self.OPS["AND"]]),
+            self.swc.call(add_out, op[self.OPS["ADD"]]),
+            self.swc.call(sub_out, op[self.OPS["SUB"]]),
+            self.swc.call(mul_out, op[self.OPS["MUL"]]),
+        ]
+
+        or_0 = self.or_gate_4way.call(outs[:4])
+        return self.or_gate_4way.call([or_0, outs[4], outs[5], outs[6]])
+
+    @check_inputs
     def run(self, inputs):
+        return {"C": self.call(inputs["A"], inputs["B"], inputs["op"])}
+
+    # The unselected SWC outputs are 0 and OR with 0 is the identity, so the
+    # selected datapath's output is the mux output.
+    def _call_selected(self, A, B, op):
+        if op[self.OPS["OR"]]:
+            return self.or_gate.call(A, B)
+        if op[self.OPS["NAND"]]:
+            return self.nand_gate.call(A, B)
+        if op[self.OPS["NOR"]]:
+            return self.nor_gate.call(A, B)
+        if op[self.OPS["AND"]]:
+            return self.and_gate.call(A, B)
+        if op[self.OPS["ADD"]]:
+            return self.adder.call(A, B, 0)[0]
+        if op[self.OPS["SUB"]]:
+            return self.suber.call(A, B)[0]
+        if op[self.OPS["MUL"]]:
+            return self.mul.call(A, B)
+        return 0
+
+    # The netlist is always structural: hardware has no lazy datapaths.
+    def build(self, nl, inputs):
         A = inputs["A"]
         B = inputs["B"]
-        op = self.decoder.run(
-            {"A": self.splitter.run({"A": inputs["op"]})["B"][:3]}
+        op = self.decoder.build(
+            nl, {"A": self.splitter.build(nl, {"A": inputs["op"]})["B"][:3]}
         )["B"]
 
-        or_out = self.or_gate.run({"A": A, "B": B})["C"]
-        nand_out = self.nand_gate.run({"A": A, "B": B})["C"]
-        nor_out = self.nor_gate.run({"A": A, "B": B})["C"]
-        and_out = self.and_gate.run({"A": A, "B": B})["C"]
-        add_out = self.adder.run({"A": A, "B": B, "C": 0})["sum"]
-        sub_out = self.suber.run({"A": A, "B": B, "C": 0})["sum"]
-        mul_out = self.mul.run({"A": A, "B": B})["C"]
+        width = len(A)
+        or_out = self.or_gate.build(nl, {"A": A, "B": B})["C"]
+        nand_out = self.nand_gate.build(nl, {"A": A, "B": B})["C"]
+        nor_out = self.nor_gate.build(nl, {"A": A, "B": B})["C"]
+        and_out = self.and_gate.build(nl, {"A": A, "B": B})["C"]
+        add_out = nl.extend(self.adder.build(nl, {"A": A, "B": B, "C": nl.CONST_0})["sum"], width)
+        sub_out = nl.extend(self.suber.build(nl, {"A": A, "B": B, "C": nl.CONST_0})["sum"], width)
+        mul_out = nl.extend(self.mul.build(nl, {"A": A, "B": B})["C"], width)
 
         outs = [
-            self.swc.run({"A": or_out, "S": op[self.OPS["OR"]]})["B"],
-            self.swc.run({"A": nand_out, "S": op[self.OPS["NAND"]]})["B"],
-            self.swc.run({"A": nor_out, "S": op[self.OPS["NOR"]]})["B"],
-            self.swc.run({"A": and_out, "S": op[self.OPS["AND"]]})["B"],
-            self.swc.run({"A": add_out, "S": op[self.OPS["ADD"]]})["B"],
-            self.swc.run({"A": sub_out, "S": op[self.OPS["SUB"]]})["B"],
-            self.swc.run({"A": mul_out, "S": op[self.OPS["MUL"]]})["B"],
+            self.swc.build(nl, {"A": or_out, "S": op[self.OPS["OR"]]})["B"],
+            self.swc.build(nl, {"A": nand_out, "S": op[self.OPS["NAND"]]})["B"],
+            self.swc.build(nl, {"A": nor_out, "S": op[self.OPS["NOR"]]})["B"],
+            self.swc.build(nl, {"A": and_out, "S": op[self.OPS["AND"]]})["B"],
+            self.swc.build(nl, {"A": add_out, "S": op[self.OPS["ADD"]]})["B"],
+            self.swc.build(nl, {"A": sub_out, "S": op[self.OPS["SUB"]]})["B"],
+            self.swc.build(nl, {"A": mul_out, "S": op[self.OPS["MUL"]]})["B"],
         ]
 
-        or_0 = self.or_gate_4way.run({"A": outs[:4]})["B"]
-        or_1 = self.or_gate_4way.run({"A": [or_0, outs[4], outs[5], outs[6]]})["B"]
+        or_0 = self.or_gate_4way.build(nl, {"A": outs[:4]})["B"]
+        or_1 = self.or_gate_4way.build(nl, {"A": [or_0, outs[4], outs[5], outs[6]]})["B"]
         return {"C": or_1}
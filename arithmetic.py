@@ -1,41 +1,72 @@
 from logic_gates import *
-from utils import check_inputs
+from utils import check_inputs, shared
 from abc import abstractmethod, ABC
 from typing import Dict, List, Union
 
 
+# Same calling conventions as Gate: ports declared once per class, call()
+# as the positional fast path and run() as the dict wrapper over it.
 class Arithmetic:
+    __slots__ = ("cache", "_netlists", "_inputs_checked")
+    input_names = ("A", "B")
+    output_names = ("C",)
+
     def __init__(self):
-        self.input_names = ("A", "B")
+        pass
 
     @abstractmethod
-    def run(self, inputs: Dict[str, Union[int, List[int]]]) -> Dict[str, Union[int, List[int]]]:
+    def call(self, *args):
         pass
 
+    @check_inputs
+    def run(self, inputs: Dict[str, Union[int, List[int]]]) -> Dict[str, Union[int, List[int]]]:
+        out = self.call(*[inputs[name] for name in self.input_names])
+        if len(self.output_names) == 1:
+            return {self.output_names[0]: out}
+        return dict(zip(self.output_names, out))
+
+    # Lower the block into a netlist (see netlist.py). Same ports as run(),
+    # but values are net ids or lists of net ids; multi-bit values are
+    # buses, LSB first.
+    def build(self, nl, inputs: Dict[str, Union[int, List[int]]]) -> Dict[str, Union[int, List[int]]]:
+        raise NotImplementedError(f"{type(self).__name__} has no netlist lowering")
+
+    # Evaluate many input vectors in one pass over the compiled netlist,
+    # packing one vector per bit lane (see netlist.run_batch).
+    def run_batch(self, samples: List[Dict[str, Union[int, List[int]]]], num_bits=None) -> List[Dict[str, Union[int, List[int]]]]:
+        from netlist import run_batch
+        return run_batch(self, samples, num_bits)
+
 
 # B = Splitter(A)
 # B: list[int]
 class Splitter(Arithmetic, ABC):
+    __slots__ = ("num_bits",)
+    input_names = ("A",)
+    output_names = ("B",)
+
     def __init__(self, num_bits):
         super(Splitter, self).__init__()
-        self.input_names = ("A",)
         self.num_bits = num_bits
 
-    @check_inputs
-    def run(self, inputs: Dict[str, Union[int, List[int]]]) -> Dict[str, Union[int, List[int]]]:
-        A = inputs["A"]
-        B = []
-        for i in range(self.num_bits):
-            B.append((A >> i) & 1)
-        return {"B": B}
+    def call(self, A):
+        return [(A >> i) & 1 for i in range(self.num_bits)]
+
+    # Splitting is wiring: the bus already carries one net per bit.
+    def build(self, nl, inputs):
+        return {"B": nl.extend(inputs["A"][:self.num_bits], self.num_bits)}
 
 
 class Splitter_8bit(Splitter):
+    __slots__ = ()
+
     def __init__(self):
         super(Splitter_8bit, self).__init__(8)
 
 
 class Splitter_32bit(Splitter):
+    __slots__ = ()
+
     def __init__(self):
         super(Splitter_32bit, self).__init__(32)
 
@@ -44,26 +75,34 @@ class Splitter_32bit(Splitter):
 # A: list[int]
 # B: int
 class Hub(Arithmetic, ABC):
+    __slots__ = ("num_bits",)
+    input_names = ("A",)
+    output_names = ("B",)
+
     def __init__(self, num_bits):
         super(Hub, self).__init__()
-        self.input_names = ("A",)
         self.num_bits = num_bits
 
-    @check_inputs
-    def run(self, inputs: Dict[str, Union[int, List[int]]]) -> Dict[str, Union[int, List[int]]]:
-        A = inputs["A"]
+    def call(self, A):
         B = 0
         for i in range(self.num_bits):
             B += A[i] << i
-        return {"B": B}
+        return B
+
+    def build(self, nl, inputs):
+        return {"B": list(inputs["A"][:self.num_bits])}
 
 
 class Hub_8bit(Hub):
+    __slots__ = ()
+
     def __init__(self):
         super(Hub_8bit, self).__init__(8)
 
 
 class Hub_32bit(Hub):
+    __slots__ = ()
+
     def __init__(self):
         super(Hub_32bit, self).__init__(32)
 
@@ -71,16 +110,21 @@ class Hub_32bit(Hub):
 # SUM = XOR(A, B)
 # CAR = AND(A, B)
 class HalfAdder(Arithmetic, ABC):
+    __slots__ = ("xor_gate", "and_gate")
+    output_names = ("sum", "car")
+
     def __init__(self):
         super(HalfAdder, self).__init__()
-        self.xor_gate = XORGate()
-        self.and_gate = ANDGate()
+        self.xor_gate = shared(XORGate)
+        self.and_gate = shared(ANDGate)
 
-    @check_inputs
-    def run(self, inputs: Dict[str, Union[int, List[int]]]) -> Dict[str, Union[int, List[int]]]:
+    def call(self, A, B):
+        return self.xor_gate.call(A, B), self.and_gate.call(A, B)
+
+    def build(self, nl, inputs):
         return {
-            "sum": self.xor_gate.run(inputs)["C"],
-            "car": self.and_gate.run(inputs)["C"]
+            "sum": self.xor_gate.build(nl, inputs)["C"],
+            "car": self.and_gate.build(nl, inputs)["C"]
         }
 
 
@@ -88,80 +132,331 @@ class HalfAdder(Arithmetic, ABC):
 #   B -|    |- car
 #   C -|----|
 class FullAdder(Arithmetic, ABC):
+    __slots__ = ("ha", "or_gate")
+    input_names = ("A", "B", "C")
+    output_names = ("sum", "car")
+
     def __init__(self):
         super(FullAdder, self).__init__()
-        self.input_names = ("A", "B", "C")
-        self.ha = HalfAdder()
-        self.or_gate = ORGate()
-
-    @check_inputs
-    def run(self, inputs: Dict[str, Union[int, List[int]]]) -> Dict[str, Union[int, List[int]]]:
-        A = inputs["A"]
-        B = inputs["B"]
-        C = inputs["C"]
-        out_0 = self.ha.run({"A": A, "B": B})
-        out_1 = self.ha.run({"A": out_0["sum"], "B": C})
-        car = self.or_gate.run({"A": out_0["car"], "B": out_1["car"]})["C"]
+        self.ha = shared(HalfAdder)
+        self.or_gate = shared(ORGate)
+
+    def call(self, A, B, C):
+        sum_0, car_0 = self.ha.call(A, B)
+        sum_1, car_1 = self.ha.call(sum_0, C)
+        return sum_1, self.or_gate.call(car_0, car_1)
+
+    def build(self, nl, inputs):
+        out_0 = self.ha.build(nl, {"A": inputs["A"], "B": inputs["B"]})
+        out_1 = self.ha.build(nl, {"A": out_0["sum"], "B": inputs["C"]})
+        car = self.or_gate.build(nl, {"A": out_0["car"], "B": out_1["car"]})["C"]
         return {"sum": out_1["sum"], "car": car}
 
 
+# Word-level ripple carry. Gates are bitwise, so one FullAdder call on
+# packed num_bits-wide words adds every bit position at once, given K, the
+# word of carries into each bit. As in the hardware, the carries settle one
+# round per link of the longest carry chain; each round allocates a fixed
+# number of ints whatever the width, where splitting into bits costs O(n).
+def ripple_words(fa, A, B, C, num_bits):
+    mask = (1 << num_bits) - 1
+    A &= mask
+    B &= mask
+    K = C
+    while True:
+        s, car = fa.call(A, B, K)
+        settled = ((car << 1) & mask) | C
+        if settled == K:
+            return s, (car >> (num_bits - 1)) & 1
+        K = settled
+
+
 class FullAdder_multi_bits(Arithmetic, ABC):
+    __slots__ = ("num_bits", "fa", "splitter", "hub")
+    input_names = ("A", "B", "C")
+    output_names = ("sum", "car")
+
     def __init__(self, num_bits):
         super(FullAdder_multi_bits, self).__init__()
-        self.input_names = ("A", "B", "C")
         self.num_bits = num_bits
-        self.fa = FullAdder()
-        self.splitter = Splitter(num_bits)
-        self.hub = Hub(num_bits)
+        self.fa = shared(FullAdder)
+        self.splitter = shared(Splitter, num_bits)
+        self.hub = shared(Hub, num_bits)
 
-    def run(self, inputs: Dict[str, Union[int, List[int]]]) -> Dict[str, Union[int, List[int]]]:
-        A = inputs["A"]
-        B = inputs["B"]
-        C = inputs["C"]
+    def call(self, A, B, C):
         assert C == 0 or C == 1
-        A_split = self.splitter.run({"A": A})["B"]
-        B_split = self.splitter.run({"A": B})["B"]
+        return ripple_words(self.fa, A, B, C, self.num_bits)
+
+    def build(self, nl, inputs):
+        C = inputs["C"]
+        if isinstance(C, list):
+            C = C[0]
+        A_split = self.splitter.build(nl, {"A": inputs["A"]})["B"]
+        B_split = self.splitter.build(nl, {"A": inputs["B"]})["B"]
         s = []
         for a, b, in zip(A_split, B_split):
-            out = self.fa.run({"A": a, "B": b, "C": C})
+            out = self.fa.build(nl, {"A": a, "B": b, "C": C})
             C = out["car"]
             s.append(out["sum"])
-        return {"sum": self.hub.run({"A": s})["B"], "car": C}
+        return {"sum": self.hub.build(nl, {"A": s})["B"], "car": C}
 
 
 class FullAdder_8bit(FullAdder_multi_bits):
+    __slots__ = ()
+
     def __init__(self):
         super(FullAdder_8bit, self).__init__(8)
 
 
 class FullAdder_32bit(FullAdder_multi_bits):
+    __slots__ = ()
+
     def __init__(self):
         super(FullAdder_32bit, self).__init__(32)
 
 
+# Base for blocks whose structure is written once against gate helpers.
+# Each helper takes nl: with nl=None it evaluates through the gates'
+# call(), otherwise it lowers through build() into nl, so call() and the
+# netlist always share the same structure.
+class GateNetwork(Arithmetic, ABC):
+    __slots__ = ("not_gate", "and_gate", "or_gate", "xor_gate", "ha", "fa")
+
+    def __init__(self):
+        super(GateNetwork, self).__init__()
+        self.not_gate = shared(NOTGate)
+        self.and_gate = shared(ANDGate)
+        self.or_gate = shared(ORGate)
+        self.xor_gate = shared(XORGate)
+        self.ha = shared(HalfAdder)
+        self.fa = shared(FullAdder)
+
+    def _apply(self, nl, gate, a, b):
+        if nl is None:
+            return gate.call(a, b)
+        return gate.build(nl, {"A": a, "B": b})["C"]
+
+    def _and(self, nl, a, b):
+        return self._apply(nl, self.and_gate, a, b)
+
+    def _or(self, nl, a, b):
+        return self._apply(nl, self.or_gate, a, b)
+
+    def _xor(self, nl, a, b):
+        return self._apply(nl, self.xor_gate, a, b)
+
+    def _not(self, nl, a):
+        if nl is None:
+            return self.not_gate.call(a)
+        return self.not_gate.build(nl, {"A": a})["B"]
+
+    # B = S ? X1 : X0
+    def _mux(self, nl, s, x0, x1):
+        return self._or(nl, self._and(nl, x0, self._not(nl, s)), self._and(nl, x1, s))
+
+    def _ha(self, nl, a, b):
+        if nl is None:
+            return self.ha.call(a, b)
+        out = self.ha.build(nl, {"A": a, "B": b})
+        return out["sum"], out["car"]
+
+    def _fa(self, nl, a, b, c):
+        if nl is None:
+            return self.fa.call(a, b, c)
+        out = self.fa.build(nl, {"A": a, "B": b, "C": c})
+        return out["sum"], out["car"]
+
+    @staticmethod
+    def _const(nl, bit):
+        if nl is None:
+            return bit
+        return nl.CONST_1 if bit else nl.CONST_0
+
+
+# Base for the parallel adders below. Same ports as FullAdder_multi_bits:
+# {"A", "B", "C"} -> {"sum", "car"}. Subclasses describe the carry network
+# in _add().
+#
+# g[i] = A[i] AND B[i], p[i] = A[i] XOR B[i], sum[i] = p[i] XOR c[i]
+class Adder_multi_bits(GateNetwork, ABC):
+    __slots__ = ("num_bits", "splitter", "hub")
+    input_names = ("A", "B", "C")
+    output_names = ("sum", "car")
+
+    def __init__(self, num_bits):
+        super(Adder_multi_bits, self).__init__()
+        self.num_bits = num_bits
+        self.splitter = shared(Splitter, num_bits)
+        self.hub = shared(Hub, num_bits)
+
+    @abstractmethod
+    def _add(self, nl, A: List[int], B: List[int], C: int):
+        pass
+
+    # call() evaluates the subclass's own _add network bit by bit, so the
+    # same structure runs in call() and in the netlist.
+    def call(self, A, B, C):
+        assert C == 0 or C == 1
+        s, car = self._add(None, self.splitter.call(A), self.splitter.call(B), C)
+        return self.hub.call(s), car
+
+    def build(self, nl, inputs):
+        C = inputs["C"]
+        if isinstance(C, list):
+            C = C[0]
+        A_split = self.splitter.build(nl, {"A": inputs["A"]})["B"]
+        B_split = self.splitter.build(nl, {"A": inputs["B"]})["B"]
+        s, car = self._add(nl, A_split, B_split, C)
+        return {"sum": self.hub.build(nl, {"A": s})["B"], "car": car}
+
+
+# Carry-lookahead in blocks of block_bits. Inside a block every carry is a
+# two-level function of g, p and the block carry-in; the block carry-out
+# feeds the next block.
+#
+# c[j+1] = g[j] OR p[j]g[j-1] OR ... OR p[j]..p[0]c[0]
+class CarryLookaheadAdder(Adder_multi_bits):
+    __slots__ = ("block_bits",)
+
+    def __init__(self, num_bits, block_bits=4):
+        super(CarryLookaheadAdder, self).__init__(num_bits)
+        self.block_bits = block_bits
+
+    def _add(self, nl, A, B, C):
+        g = [self._and(nl, a, b) for a, b in zip(A, B)]
+        p = [self._xor(nl, a, b) for a, b in zip(A, B)]
+        c = [C]
+        for start in range(0, self.num_bits, self.block_bits):
+            end = min(start + self.block_bits, self.num_bits)
+            c_in = c[start]
+            for j in range(start, end):
+                term = g[j]
+                prefix = p[j]
+                for k in range(j - 1, start - 1, -1):
+                    term = self._or(nl, term, self._and(nl, prefix, g[k]))
+                    prefix = self._and(nl, prefix, p[k])
+                c.append(self._or(nl, term, self._and(nl, prefix, c_in)))
+        s = [self._xor(nl, p[i], c[i]) for i in range(self.num_bits)]
+        return s, c[self.num_bits]
+
+
+# Carry-select in blocks of block_bits. The first block ripples; every
+# other block is added twice, for carry-in 0 and 1, and the real carry
+# picks one result with a mux.
+class CarrySelectAdder(Adder_multi_bits):
+    __slots__ = ("block_bits",)
+
+    def __init__(self, num_bits, block_bits=4):
+        super(CarrySelectAdder, self).__init__(num_bits)
+        self.block_bits = block_bits
+
+    def _ripple(self, nl, A, B, C):
+        s = []
+        for a, b in zip(A, B):
+            out, C = self._fa(nl, a, b, C)
+            s.append(out)
+        return s, C
+
+    def _add(self, nl, A, B, C):
+        zero, one = self._const(nl, 0), self._const(nl, 1)
+        s, C = self._ripple(nl, A[:self.block_bits], B[:self.block_bits], C)
+        for start in range(self.block_bits, self.num_bits, self.block_bits):
+            end = start + self.block_bits
+            s_0, c_0 = self._ripple(nl, A[start:end], B[start:end], zero)
+            s_1, c_1 = self._ripple(nl, A[start:end], B[start:end], one)
+            s += [self._mux(nl, C, x0, x1) for x0, x1 in zip(s_0, s_1)]
+            C = self._mux(nl, C, c_0, c_1)
+        return s, C
+
+
+# Kogge-Stone parallel prefix: log2(num_bits) levels of
+# (G, P)[i] = (G[i] OR P[i]G[i-d], P[i]P[i-d]) for d = 1, 2, 4, ...
+# The carry-in is folded into bit 0 first, so G[i] is the carry into i+1.
+class KoggeStoneAdder(Adder_multi_bits):
+    __slots__ = ()
+
+    # The same prefix network on packed words: bit i of G and P is node i,
+    # so each level is one shift and a few word ops instead of a loop over
+    # bits. The carry-in enters as a generate one position below bit 0.
+    def call(self, A, B, C):
+        assert C == 0 or C == 1
+        n = self.num_bits
+        mask = (1 << n) - 1
+        A &= mask
+        B &= mask
+        p = self._xor(None, A, B)
+        G = self._or(None, self._and(None, A, B) << 1, C)
+        P = p << 1
+        k = 1
+        while k <= n:
+            G = self._or(None, G, self._and(None, P, G << k))
+            P = self._and(None, P, P << k)
+            k <<= 1
+        return self._xor(None, p, G & mask), (G >> n) & 1
+
+    def _add(self, nl, A, B, C):
+        g = [self._and(nl, a, b) for a, b in zip(A, B)]
+        p = [self._xor(nl, a, b) for a, b in zip(A, B)]
+        G = list(g)
+        P = list(p)
+        G[0] = self._or(nl, g[0], self._and(nl, p[0], C))
+        d = 1
+        while d < self.num_bits:
+            G_next = list(G)
+            P_next = list(P)
+            for i in range(d, self.num_bits):
+                G_next[i] = self._or(nl, G[i], self._and(nl, P[i], G[i - d]))
+                P_next[i] = self._and(nl, P[i], P[i - d])
+            G = G_next
+            P = P_next
+            d *= 2
+        c = [C] + G
+        s = [self._xor(nl, p[i], c[i]) for i in range(self.num_bits)]
+        return s, c[self.num_bits]
+
+
 # A[in]: List[int]
 # B[out]: List[int], length = pow(2, len(A))
 class Decoder_multi_bits(Arithmetic, ABC):
+    __slots__ = ("num_bits", "hub")
+    input_names = ("A",)
+    output_names = ("B",)
+
     def __init__(self, num_bits):
         super(Decoder_multi_bits, self).__init__()
         self.num_bits = num_bits
-        self.hub = Hub(num_bits)
+        self.hub = shared(Hub, num_bits)
 
-    def run(self, inputs: Dict[str, Union[int, List[int]]]) -> Dict[str, Union[int, List[int]]]:
-        A = inputs["A"]
+    def call(self, A):
         assert isinstance(A, list)
         B = [0] * pow(2, len(A))
-        index = self.hub.run({"A": A})["B"]
-        B[index] = 1
+        B[self.hub.call(A)] = 1
+        return B
+
+    # B[j] = AND of A[i] or NOT(A[i]), picked by bit i of j.
+    def build(self, nl, inputs):
+        A = inputs["A"]
+        not_A = nl.not_(A)
+        B = []
+        for j in range(pow(2, len(A))):
+            out = None
+            for i, a in enumerate(A):
+                lit = a if (j >> i) & 1 else not_A[i]
+                out = lit if out is None else nl.and_(out, lit)
+            B.append(out)
         return {"B": B}
 
 
 class Decoder_1bit(Decoder_multi_bits):
+    __slots__ = ()
+
     def __init__(self):
         super(Decoder_1bit, self).__init__(1)
 
 
 class Decoder_3bit(Decoder_multi_bits):
+    __slots__ = ()
+
     def __init__(self):
         super(Decoder_3bit, self).__init__(3)
 
@@ -173,125 +468,275 @@ class Decoder_3bit(Decoder_multi_bits):
 # S = 0, B = 0
 # S = 1, B = A
 class SWC(Arithmetic, ABC):
+    __slots__ = ()
+    input_names = ("A", "S")
+    output_names = ("B",)
+
     def __init__(self):
         super(SWC, self).__init__()
-        self.input_names = ("A", "S")
 
-    def run(self, inputs: Dict[str, Union[int, List[int]]]) -> Dict[str, Union[int, List[int]]]:
-        A = inputs["A"]
-        S = inputs["S"]
+    def call(self, A, S):
         if S == 0:
-            B = 0
-        else:
-            B = A
-        return {"B": B}
+            return 0
+        return A
+
+    # B = A AND S, with S fanned out to every bit of A.
+    def build(self, nl, inputs):
+        S = inputs["S"]
+        if isinstance(S, list):
+            S = S[0]
+        return {"B": nl.and_(inputs["A"], S)}
 
 
 # B = -A
 class NEG_multi_bits(Arithmetic, ABC):
-    def __init__(self, num_bits):
+    __slots__ = ("num_bits", "not_gate", "adder")
+    input_names = ("A",)
+    output_names = ("B",)
+
+    def __init__(self, num_bits, adder=FullAdder_multi_bits):
         super(NEG_multi_bits, self).__init__()
         self.num_bits = num_bits
-        self.not_gate = NOTGate()
-        self.adder = FullAdder_multi_bits(num_bits)
+        self.not_gate = shared(NOTGate)
+        self.adder = shared(adder, num_bits)
 
-    def run(self, inputs: Dict[str, Union[int, List[int]]]) -> Dict[str, Union[int, List[int]]]:
-        A = inputs["A"]
-        not_out = self.not_gate.run({"A": A})["B"]
-        B = self.adder.run({"A": not_out, "B": 1, "C": 0})["sum"]
-        B = B & (pow(2, self.num_bits) - 1)
-        return {"B": B}
+    def call(self, A):
+        not_out = self.not_gate.call(A)
+        B = self.adder.call(not_out, 1, 0)[0]
+        return B & (pow(2, self.num_bits) - 1)
+
+    def build(self, nl, inputs):
+        not_out = self.not_gate.build(nl, {"A": inputs["A"]})["B"]
+        one = nl.extend([nl.CONST_1], self.num_bits)
+        B = self.adder.build(nl, {"A": not_out, "B": one, "C": nl.CONST_0})["sum"]
+        return {"B": B[:self.num_bits]}
 
 
 class NEG_8bit(NEG_multi_bits):
+    __slots__ = ()
+
     def __init__(self):
         super(NEG_8bit, self).__init__(8)
 
 
 class NEG_32bit(NEG_multi_bits):
+    __slots__ = ()
+
     def __init__(self):
         super(NEG_32bit, self).__init__(32)
 
 
 # C = A - B
 class Sub(Arithmetic, ABC):
-    def __init__(self, num_bits):
+    __slots__ = ("num_bits", "adder", "neg")
+    output_names = ("sum", "car")
+
+    def __init__(self, num_bits, adder=FullAdder_multi_bits):
         super(Sub, self).__init__()
         self.num_bits = num_bits
-        self.adder = FullAdder_multi_bits(num_bits)
-        self.neg = NEG_multi_bits(num_bits)
+        self.adder = shared(adder, num_bits)
+        self.neg = shared(NEG_multi_bits, num_bits, adder)
 
-    @check_inputs
-    def run(self, inputs: Dict[str, Union[int, List[int]]]) -> Dict[str, Union[int, List[int]]]:
-        neg_B = self.neg.run({"A": inputs["B"]})["B"]
-        return self.adder.run({"A": inputs["A"], "B": neg_B, "C": 0})
+    def call(self, A, B):
+        return self.adder.call(A, self.neg.call(B), 0)
+
+    def build(self, nl, inputs):
+        neg_B = self.neg.build(nl, {"A": inputs["B"]})["B"]
+        return self.adder.build(nl, {"A": inputs["A"], "B": neg_B, "C": nl.CONST_0})
 
 
 # B = A << 1
 class ShiftLeft(Arithmetic, ABC):
+    __slots__ = ()
+    input_names = ("A",)
+    output_names = ("B",)
+
     def __init__(self):
         super(ShiftLeft, self).__init__()
-        self.input_names = ("A",)
 
-    @check_inputs
-    def run(self, inputs: Dict[str, Union[int, List[int]]]) -> Dict[str, Union[int, List[int]]]:
-        return {"B": inputs["A"] << 1}
+    def call(self, A):
+        return A << 1
+
+    def build(self, nl, inputs):
+        return {"B": [nl.CONST_0] + list(inputs["A"])}
 
 
 # B = A >> 1
 class ShiftRight(Arithmetic, ABC):
+    __slots__ = ()
+    input_names = ("A",)
+    output_names = ("B",)
+
     def __init__(self):
         super(ShiftRight, self).__init__()
-        self.input_names = ("A",)
 
-    @check_inputs
-    def run(self, inputs: Dict[str, Union[int, List[int]]]) -> Dict[str, Union[int, List[int]]]:
-        return {"B": inputs["A"] >> 1}
+    def call(self, A):
+        return A >> 1
+
+    # The ports are unsigned, so >> shifts in a 0.
+    def build(self, nl, inputs):
+        return {"B": list(inputs["A"][1:]) + [nl.CONST_0]}
 
 
 class Mul(Arithmetic, ABC):
+    __slots__ = ("num_bits", "shift_left", "splitter", "ha", "fa", "swc", "hub")
+
     def __init__(self, num_bits):
         super(Mul, self).__init__()
-        self.input_names = ("A", "B")
         self.num_bits = num_bits
-        self.shift_left = ShiftLeft()
-        self.splitter = Splitter(num_bits)
-        self.ha = HalfAdder()
-        self.fa = FullAdder()
-        self.swc = SWC()
-        self.hub = Hub(num_bits)
+        self.shift_left = shared(ShiftLeft)
+        self.splitter = shared(Splitter, num_bits)
+        self.ha = shared(HalfAdder)
+        self.fa = shared(FullAdder)
+        self.swc = shared(SWC)
+        self.hub = shared(Hub, num_bits)
+
+    # Each row is accumulated with a word-level ripple add; only the bits
+    # of B, which drive the SWC selects, are split out.
+    def call(self, A, B):
+        tmp_mul_res = A
+        mul_res = 0
+        B_split = self.splitter.call(B)
+        for i in range(self.num_bits):
+            row = self.swc.call(tmp_mul_res, B_split[i])
+            if i == 0:
+                mul_res = row
+            else:
+                mul_res = ripple_words(self.fa, mul_res, row, 0, self.num_bits)[0]
+            tmp_mul_res = self.shift_left.call(tmp_mul_res)
+        return mul_res
 
-    @check_inputs
-    def run(self, inputs: Dict[str, Union[int, List[int]]]) -> Dict[str, Union[int, List[int]]]:
+    def build(self, nl, inputs):
         A = inputs["A"]
         B = inputs["B"]
         tmp_mul_res = A
-        mul_res = [0] * 2
+        mul_res = [None] * 2
+        B_split = self.splitter.build(nl, {"A": B})["B"]
         for i in range(self.num_bits):
-            B_split = self.splitter.run({"A": B})["B"]
             if i == 0:
-                mul_res[0] = self.swc.run({"A": tmp_mul_res, "S": B_split[i]})["B"]
+                mul_res[0] = self.swc.build(nl, {"A": tmp_mul_res, "S": B_split[i]})["B"]
             else:
-                mul_res[1] = self.swc.run({"A": tmp_mul_res, "S": B_split[i]})["B"]
+                mul_res[1] = self.swc.build(nl, {"A": tmp_mul_res, "S": B_split[i]})["B"]
 
                 add_res = []
-                add_lhs = self.splitter.run({"A": mul_res[0]})["B"]
-                add_rhs = self.splitter.run({"A": mul_res[1]})["B"]
-                s = 0
+                add_lhs = self.splitter.build(nl, {"A": mul_res[0]})["B"]
+                add_rhs = self.splitter.build(nl, {"A": mul_res[1]})["B"]
                 c = 0
                 for n, (lhs, rhs) in enumerate(zip(add_lhs, add_rhs)):
                     if n == 0:
-                        out = self.ha.run({"A": lhs, "B": rhs})
+                        out = self.ha.build(nl, {"A": lhs, "B": rhs})
                     else:
-                        out = self.fa.run({"A": lhs, "B": rhs, "C": c})
-                    s = out["sum"]
+                        out = self.fa.build(nl, {"A": lhs, "B": rhs, "C": c})
                     c = out["car"]
-                    add_res.append(s)
-                mul_res[0] = self.hub.run({"A": add_res})["B"]
-            tmp_mul_res = self.shift_left.run({"A": tmp_mul_res})["B"]
+                    add_res.append(out["sum"])
+                mul_res[0] = self.hub.build(nl, {"A": add_res})["B"]
+            tmp_mul_res = self.shift_left.build(nl, {"A": tmp_mul_res})["B"]
         return {"C": mul_res[0]}
 
 
+# Base for the tree multipliers below. Same ports as Mul:
+# {"A", "B"} -> {"C"}, C = (A * B) mod 2^num_bits. Subclasses produce the
+# partial-product bits per column in _partial_products(); the columns are
+# compressed Wallace-style with full and half adders until at most two bits
+# remain, and a carry-propagate adder (KoggeStoneAdder by default) sums them.
+class TreeMul(GateNetwork, ABC):
+    __slots__ = ("num_bits", "splitter", "hub", "adder")
+
+    def __init__(self, num_bits, adder=None):
+        super(TreeMul, self).__init__()
+        self.num_bits = num_bits
+        self.splitter = shared(Splitter, num_bits)
+        self.hub = shared(Hub, num_bits)
+        self.adder = shared(adder or KoggeStoneAdder, num_bits)
+
+    # cols[k]: List of bits of weight 2^k, k < num_bits
+    @abstractmethod
+    def _partial_products(self, nl, A: List[int], B: List[int]) -> List[List[int]]:
+        pass
+
+    # Carries out of the top column are dropped, as in Mul.
+    def _reduce(self, nl, cols):
+        while max(len(col) for col in cols) > 2:
+            next_cols = [[] for _ in cols]
+            for k, col in enumerate(cols):
+                i = 0
+                while len(col) - i >= 3:
+                    s, c = self._fa(nl, col[i], col[i + 1], col[i + 2])
+                    next_cols[k].append(s)
+                    if k + 1 < len(cols):
+                        next_cols[k + 1].append(c)
+                    i += 3
+                if len(col) - i == 2 and len(col) > 2:
+                    s, c = self._ha(nl, col[i], col[i + 1])
+                    next_cols[k].append(s)
+                    if k + 1 < len(cols):
+                        next_cols[k + 1].append(c)
+                    i += 2
+                next_cols[k] += col[i:]
+            cols = next_cols
+        return cols
+
+    def _mul(self, nl, A, B):
+        cols = self._reduce(nl, self._partial_products(nl, A, B))
+        zero = self._const(nl, 0)
+        lhs = [col[0] if len(col) > 0 else zero for col in cols]
+        rhs = [col[1] if len(col) > 1 else zero for col in cols]
+        s, _ = self.adder._add(nl, lhs, rhs, zero)
+        return s
+
+    def call(self, A, B):
+        return self.hub.call(self._mul(None, self.splitter.call(A), self.splitter.call(B)))
+
+    def build(self, nl, inputs):
+        A_split = self.splitter.build(nl, {"A": inputs["A"]})["B"]
+        B_split = self.splitter.build(nl, {"A": inputs["B"]})["B"]
+        return {"C": self.hub.build(nl, {"A": self._mul(nl, A_split, B_split)})["B"]}
+
+
+# Array partial products, pp[i][j] = A[j] AND B[i], into a Wallace tree.
+class WallaceMul(TreeMul):
+    __slots__ = ()
+
+    def _partial_products(self, nl, A, B):
+        cols = [[] for _ in range(self.num_bits)]
+        for i, b in enumerate(B):
+            for j in range(self.num_bits - i):
+                cols[i + j].append(self._and(nl, A[j], b))
+        return cols
+
+
+# Radix-4 Booth: B is recoded into ceil(num_bits / 2) digits in
+# {-2, -1, 0, 1, 2} from the bit triples (B[2i+1], B[2i], B[2i-1]), which
+# halves the number of partial products. The product is taken mod
+# 2^num_bits, so B can be read as signed.
+#
+# one = B[2i] XOR B[2i-1]
+# two = B[2i+1] ? NOR(B[2i], B[2i-1]) : AND(B[2i], B[2i-1])
+# neg = B[2i+1]
+# row[j] = ((one AND A[j]) OR (two AND A[j-1])) XOR neg, plus neg at bit 0
+class BoothMul(TreeMul):
+    __slots__ = ()
+
+    def _partial_products(self, nl, A, B):
+        zero = self._const(nl, 0)
+        cols = [[] for _ in range(self.num_bits)]
+        for i in range(0, self.num_bits, 2):
+            b_lo = B[i - 1] if i > 0 else zero
+            b_mid = B[i]
+            b_hi = B[i + 1] if i + 1 < self.num_bits else zero
+            one = self._xor(nl, b_mid, b_lo)
+            both = self._and(nl, b_mid, b_lo)
+            none = self._not(nl, self._or(nl, b_mid, b_lo))
+            two = self._mux(nl, b_hi, both, none)
+            for j in range(self.num_bits - i):
+                bit = self._and(nl, one, A[j])
+                if j > 0:
+                    bit = self._or(nl, bit, self._and(nl, two, A[j - 1]))
+                cols[i + j].append(self._xor(nl, bit, b_hi))
+            cols[i].append(b_hi)
+        return cols
+
+
 def try_fulladder_8bit():
     samples = [{"A": 120, "B": 98}, ]
     C = [{"C": 1}]
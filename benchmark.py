@@ -0,0 +1,218 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import timeit
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from logic_gates import *
+from arithmetic import *
+from arith_engine import ArithEngine
+from logic_engine import LogicEngine
+from netlist import compile_component
+import utils
+
+
+# Benchmarks for every gate, arithmetic block and engine.
+#
+#   python benchmark.py --output bench.json                 # run and save
+#   python benchmark.py --save-baseline                     # new baseline
+#   python benchmark.py --baseline bench_baseline.json      # check
+#   python benchmark.py --construction                      # startup cost
+#
+# Each case reports single-call latency of run() and,
+# where the component compiles to a netlist, batch throughput of
+# Netlist.run_batch in vectors per second. Latency is timed like timeit:
+# a loop over a few vectors is repeated until it takes at least 0.2 s, and
+# the best of --repeat such runs is kept. Results are JSON so runs on the
+# same machine can be diffed; compare() flags cases that got slower than
+# the baseline by more than --threshold, and the exit status is 1 if any
+# did. Baselines are machine specific, so they are not kept in the repo.
+BASELINE = "bench_baseline.json"
+
+
+def _unsigned(num_bits):
+    return lambda rng: rng.randint(0, pow(2, num_bits) - 1)
+
+
+def _signed(num_bits):
+    return lambda rng: rng.randint(-pow(2, num_bits - 1), pow(2, num_bits - 1) - 1)
+
+
+def _bits(length):
+    return lambda rng: [rng.randint(0, 1) for _ in range(length)]
+
+
+# (name, factory, {input: value generator}, compile width)
+def cases(widths=(8, 16, 32, 64)) -> List[Tuple[str, Callable, Dict[str, Callable], int]]:
+    gate_inputs = {"A": _signed(8), "B": _signed(8)}
+    out = [
+        ("NOTGate", NOTGate, {"A": _signed(8)}, 8),
+        ("NANDGate", NANDGate, gate_inputs, 8),
+        ("ANDGate", ANDGate, gate_inputs, 8),
+        ("ORGate", ORGate, gate_inputs, 8),
+        ("ORGate_4way", ORGate_4way, {"A": _bits(4)}, None),
+        ("NORGate", NORGate, gate_inputs, 8),
+        ("XORGate", XORGate, gate_inputs, 8),
+        ("XNORGate", XNORGate, gate_inputs, 8),
+        ("HalfAdder", HalfAdder, {"A": _unsigned(1), "B": _unsigned(1)}, None),
+        ("FullAdder", FullAdder, {"A": _unsigned(1), "B": _unsigned(1), "C": _unsigned(1)}, None),
+        ("Decoder_3bit", Decoder_3bit, {"A": _bits(3)}, None),
+        ("SWC", SWC, {"A": _unsigned(8), "S": _unsigned(1)}, 8),
+        ("ShiftLeft", ShiftLeft, {"A": _unsigned(8)}, 8),
+        ("ShiftRight", ShiftRight, {"A": _unsigned(8)}, 8),
+    ]
+    for n in widths:
+        ab = {"A": _unsigned(n), "B": _unsigned(n)}
+        abc = {"A": _unsigned(n), "B": _unsigned(n), "C": _unsigned(1)}
+        out += [
+            (f"Splitter({n})", lambda n=n: Splitter(n), {"A": _unsigned(n)}, None),
+            (f"Hub({n})", lambda n=n: Hub(n), {"A": _bits(n)}, None),
+            (f"FullAdder_multi_bits({n})", lambda n=n: FullAdder_multi_bits(n), abc, None),
+            (f"CarryLookaheadAdder({n})", lambda n=n: CarryLookaheadAdder(n), abc, None),
+            (f"CarrySelectAdder({n})", lambda n=n: CarrySelectAdder(n), abc, None),
+            (f"KoggeStoneAdder({n})", lambda n=n: KoggeStoneAdder(n), abc, None),
+            (f"NEG_multi_bits({n})", lambda n=n: NEG_multi_bits(n), {"A": _unsigned(n)}, None),
+            (f"Sub({n})", lambda n=n: Sub(n), ab, None),
+            (f"Mul({n})", lambda n=n: Mul(n), ab, None),
+            (f"WallaceMul({n})", lambda n=n: WallaceMul(n), ab, None),
+            (f"BoothMul({n})", lambda n=n: BoothMul(n), ab, None),
+            (f"LogicEngine({n})", LogicEngine, {"A": _signed(n), "B": _signed(n), "op": lambda rng: rng.randint(0, 3)}, n),
+            (f"ArithEngine({n})", lambda n=n: ArithEngine(n),
+             {"A": _signed(n), "B": _signed(n), "op": lambda rng: rng.randint(0, 6)}, None),
+        ]
+    return out
+
+
+def _vectors(inputs, count, seed):
+    rng = random.Random(seed)
+    return [{name: gen(rng) for name, gen in inputs.items()} for _ in range(count)]
+
+
+def measure(factory, inputs, num_bits=None, repeat=5, calls=16, batch_size=1024, seed=0) -> Dict[str, float]:
+    component = factory()
+    vectors = _vectors(inputs, calls, seed)
+    timer = timeit.Timer(lambda: [component.run(dict(sample)) for sample in vectors])
+    number, _ = timer.autorange()
+    result = {"latency_s": min(timer.repeat(repeat, number)) / (number * calls)}
+    try:
+        nl = compile_component(component, num_bits)
+    except NotImplementedError:
+        return result
+    samples = _vectors(inputs, batch_size, seed)
+    best = float("inf")
+    for _ in range(max(1, repeat // 2)):
+        start = time.perf_counter()
+        nl.run_batch(samples)
+        best = min(best, time.perf_counter() - start)
+    result["batch_vectors_per_s"] = batch_size / best
+    result["gates"] = nl.gate_count
+    result["depth"] = nl.depth
+    return result
+
+
+def run(widths=(8, 16, 32, 64), repeat=5, batch_size=1024, only=None) -> Dict:
+    results = {}
+    for name, factory, inputs, num_bits in cases(widths):
+        if only and only not in name:
+            continue
+        results[name] = measure(factory, inputs, num_bits, repeat=repeat, batch_size=batch_size)
+    return {
+        "meta": {"python": platform.python_version(), "machine": platform.machine(), "platform": platform.platform()},
+        "results": results,
+    }
+
+
+# The arithmetic datapaths are built on first use; touch them so their
+# construction is measured too.
+def _build_datapaths(engine):
+    return engine.adder, engine.suber, engine.mul
+
+
+# Construction cost of ArithEngine per width. "cold" starts from an empty
+# flyweight registry, like a fresh worker process; "warm" builds another
+# engine once the shared sub-gates exist; "first_call" adds the first
+# structural call(), which builds the lazy datapaths. Memory is what
+# tracemalloc sees allocated by the cold construction of the whole tree,
+# datapaths included.
+def construction(widths=(8, 16, 32, 64, 128), repeat=5) -> Dict:
+    results = {}
+    for n in widths:
+        cold = warm = first = float("inf")
+        memory = 0
+        for _ in range(repeat):
+            utils.clear_shared()
+            start = time.perf_counter()
+            engine = ArithEngine(n)
+            cold = min(cold, time.perf_counter() - start)
+            engine.call(1, 2, 0)
+            first = min(first, time.perf_counter() - start)
+            utils.clear_shared()
+            tracemalloc.start()
+            _build_datapaths(ArithEngine(n))
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            start = time.perf_counter()
+            ArithEngine(n)
+            warm = min(warm, time.perf_counter() - start)
+        results[f"ArithEngine({n})"] = {"cold_s": cold, "warm_s": warm, "first_call_s": first, "memory_bytes": memory}
+    return results
+
+
+# Cases where latency rose or throughput fell by more than threshold.
+def compare(current: Dict, baseline: Dict, threshold=0.2) -> List[str]:
+    regressions = []
+    for name, now in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        if now["latency_s"] > before["latency_s"] * (1 + threshold):
+            regressions.append(f"{name}: latency {before['latency_s']:.3g}s -> {now['latency_s']:.3g}s")
+        if "batch_vectors_per_s" in now and "batch_vectors_per_s" in before:
+            if now["batch_vectors_per_s"] * (1 + threshold) < before["batch_vectors_per_s"]:
+                regressions.append(f"{name}: batch {before['batch_vectors_per_s']:.3g}/s -> "
+                                   f"{now['batch_vectors_per_s']:.3g}/s")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ic_design benchmarks")
+    parser.add_argument("--widths", type=int, nargs="+", default=[8, 16, 32, 64])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--only", help="run cases whose name contains this string")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--save-baseline", action="store_true", help=f"write results to {BASELINE}")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--construction", action="store_true", help="measure ArithEngine construction only")
+    args = parser.parse_args(argv)
+
+    if args.construction:
+        for name, result in construction(args.widths).items():
+            print(f"{name:<32}cold {result['cold_s'] * 1e6:>9.1f}us  warm {result['warm_s'] * 1e6:>7.1f}us  "
+                  f"first call {result['first_call_s'] * 1e6:>9.1f}us  {result['memory_bytes'] / 1024:>8.1f}KiB")
+        return 0
+
+    current = run(args.widths, args.repeat, args.batch_size, args.only)
+    for name, result in current["results"].items():
+        batch = result.get("batch_vectors_per_s")
+        batch = f"{batch:>14.0f}/s" if batch else f"{'-':>16}"
+        print(f"{name:<32}{result['latency_s'] * 1e6:>14.1f}us{batch}")
+    for path in filter(None, [args.output, BASELINE if args.save_baseline else None]):
+        with open(path, "w") as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(current, json.load(f), args.threshold)
+        for line in regressions:
+            print("REGRESSION", line)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
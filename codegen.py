@@ -0,0 +1,235 @@
+import hashlib
+import marshal
+import os
+import sys
+from typing import Dict, List
+
+import netlist
+from netlist import Netlist, port_spec
+from optimize import optimize
+
+
+# Code-generation backend.
+#
+#   nl = codegen.compile_component(ArithEngine(32))
+#   nl.call(A, B, op)                 # straight-line generated code
+#   nl.run({"A": 1, "B": 2, "op": 4})
+#   nl.run_columns(columns)           # bit-sliced lanes, as on Netlist
+#
+# compile_component() optimizes the netlist first (see optimize.py), then
+# emits it as Python source with every primitive inlined as one statement
+# over locals, so each gate is derived from the same build() lowering as
+# Netlist and there is no interpreter loop or slot indexing left. Two
+# functions are generated per netlist:
+#
+#   evaluate(v)   drop-in for Netlist.evaluate: reads the input slots,
+#                 runs the gates, writes the output slots. Works on ints,
+#                 packed lanes and NumPy bit planes alike.
+#   call(...)     positional inputs in port order, outputs as a value or a
+#                 tuple; bits are split and reassembled inline.
+#
+# For ArithEngine(32) a scalar call() is ~0.27 ms, against ~0.37 ms for
+# ArithEngine.call and ~1.7 ms for Netlist.run.
+#
+# Generated modules are cached in memory and on disk under cache_dir. A
+# component is keyed by component_key(): its class, port widths and plain
+# settings (e.g. an engine's adder and mul classes) plus a hash of the
+# source files the lowering comes from, so a warm start finds its entry
+# without building anything. Each entry holds the source as <key>.py for
+# reading, the compiled code object as <key>.code and the optimized
+# netlist as <key>.netlist, so a warm start neither lowers, regenerates
+# nor recompiles. compile_netlist() on a bare netlist keys by
+# structure_hash() instead. Pass cache_dir=None to keep everything in
+# memory.
+VERSION = 1
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ic_design", "codegen")
+
+LOWERING_MODULES = ("logic_gates", "arithmetic", "netlist", "optimize", "codegen")
+
+_loaded: Dict[str, Dict] = {}
+_netlists: Dict[str, bytes] = {}
+_sources: Dict[str, str] = {}
+
+
+def structure_hash(nl: Netlist) -> str:
+    h = hashlib.sha256()
+    h.update(repr((VERSION, sys.implementation.cache_tag)).encode())
+    h.update(repr(sorted(nl.inputs.items())).encode())
+    h.update(repr(sorted(nl.outputs.items())).encode())
+    h.update(repr(nl.program).encode())
+    return h.hexdigest()
+
+
+def _source_hash(module_name) -> str:
+    if module_name not in _sources:
+        h = hashlib.sha256()
+        path = getattr(sys.modules[module_name], "__file__", None)
+        if path is not None:
+            with open(path, "rb") as f:
+                h.update(f.read())
+        _sources[module_name] = h.hexdigest()
+    return _sources[module_name]
+
+
+def _settings(component):
+    names = set(getattr(component, "__dict__", ()))
+    for cls in type(component).__mro__:
+        names.update(getattr(cls, "__slots__", ()))
+    settings = {}
+    for name in sorted(names):
+        value = getattr(component, name, None)
+        if name.startswith("_") or not isinstance(value, (bool, int, str, type)):
+            continue
+        settings[name] = f"{value.__module__}.{value.__qualname__}" if isinstance(value, type) else value
+    return settings
+
+
+# Cache key for a component: what the lowering depends on, read without
+# building anything.
+def component_key(component, num_bits=None) -> str:
+    widths, signed = port_spec(component, num_bits)
+    settings = _settings(component)
+    modules = set(LOWERING_MODULES)
+    modules.update(cls.__module__ for cls in type(component).__mro__)
+    modules.update(value.rsplit(".", 1)[0] for value in settings.values()
+                   if isinstance(value, str) and value.rsplit(".", 1)[0] in sys.modules)
+    h = hashlib.sha256()
+    h.update(repr((VERSION, sys.implementation.cache_tag, type(component).__module__,
+                   type(component).__qualname__, sorted(widths.items()), signed, settings)).encode())
+    for module_name in sorted(modules):
+        if module_name in sys.modules:
+            h.update(_source_hash(module_name).encode())
+    return h.hexdigest()
+
+
+def _net(net):
+    if net == Netlist.CONST_0:
+        return "c0"
+    if net == Netlist.CONST_1:
+        return "c1"
+    return f"n{net}"
+
+
+def _gates(nl: Netlist) -> List[str]:
+    return [f"    {_net(out)} = ~({_net(a)} & {_net(b)})" for out, a, b in nl.program]
+
+
+def generate_source(nl: Netlist) -> str:
+    inputs = list(nl.inputs.items())
+    outputs = list(nl.outputs.items())
+    lines = [f"# generated from a netlist of {nl.gate_count} gates, depth {nl.depth}", ""]
+
+    lines.append("def evaluate(v):")
+    lines.append("    c0 = v[0]")
+    lines.append("    c1 = v[1]")
+    for _, (bus, _) in inputs:
+        lines += [f"    {_net(net)} = v[{net}]" for net in bus]
+    lines += _gates(nl)
+    for _, (bus, _) in outputs:
+        lines += [f"    v[{net}] = {_net(net)}" for net in bus]
+    lines += ["    return v", ""]
+
+    lines.append(f"def call({', '.join(name for name, _ in inputs)}):")
+    lines.append("    c0 = 0")
+    lines.append("    c1 = -1")
+    for name, (bus, signed) in inputs:
+        if signed:
+            lim = 1 << (len(bus) - 1)
+            lines.append(f"    assert {-lim} <= {name} < {lim}, "
+                         f"f\"{name}={{{name}}} does not fit in {len(bus)} signed bits\"")
+        lines += [f"    {_net(net)} = {name} >> {i} & 1" for i, net in enumerate(bus)]
+    lines += _gates(nl)
+    for name, (bus, signed) in outputs:
+        terms = [f"({_net(net)} & 1) << {i}" for i, net in enumerate(bus)]
+        lines.append(f"    out_{name} = {' | '.join(terms)}")
+        if signed:
+            top = 1 << (len(bus) - 1)
+            lines.append(f"    if out_{name} & {top}:")
+            lines.append(f"        out_{name} -= {top << 1}")
+    if len(outputs) == 1:
+        lines.append(f"    return out_{outputs[0][0]}")
+    else:
+        lines.append(f"    return {', '.join('out_' + name for name, _ in outputs)}")
+    return "\n".join(lines) + "\n"
+
+
+def _write(path, data, mode):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, mode) as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _load_code(nl: Netlist, key, cache_dir):
+    if cache_dir is None:
+        return compile(generate_source(nl), f"<codegen {key[:12]}>", "exec")
+    source_path = os.path.join(cache_dir, key + ".py")
+    code_path = os.path.join(cache_dir, key + ".code")
+    try:
+        with open(code_path, "rb") as f:
+            return marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    source = generate_source(nl)
+    code = compile(source, source_path, "exec")
+    os.makedirs(cache_dir, exist_ok=True)
+    _write(source_path, source, "w")
+    _write(code_path, marshal.dumps(code), "wb")
+    return code
+
+
+# Attach generated evaluate() and call() to nl, so run(), run_columns(),
+# run_batch() and numpy_backend.run_arrays all go through generated code.
+def compile_netlist(nl: Netlist, cache_dir=CACHE_DIR, key=None) -> Netlist:
+    key = key or structure_hash(nl)
+    if key not in _loaded:
+        namespace = {}
+        exec(_load_code(nl, key, cache_dir), namespace)
+        _loaded[key] = namespace
+    namespace = _loaded[key]
+    nl.evaluate = namespace["evaluate"]
+    nl.call = namespace["call"]
+    call = nl.call
+    names = list(nl.inputs)
+    output_names = list(nl.outputs)
+
+    def run(inputs):
+        for name in names:
+            assert name in inputs, f"netlist is missing input {name!r}, got {sorted(inputs)}"
+        out = call(*[inputs[name] for name in names])
+        if len(output_names) == 1:
+            return {output_names[0]: out}
+        return dict(zip(output_names, out))
+
+    nl.run = run
+    nl.cache_key = key
+    return nl
+
+
+# The optimized netlist for a component, from memory, from cache_dir or
+# lowered and optimized afresh. Netlist state is plain lists, dicts and
+# tuples, so it round-trips through marshal.
+def _load_netlist(component, num_bits, key, cache_dir) -> Netlist:
+    data = _netlists.get(key)
+    path = None if cache_dir is None else os.path.join(cache_dir, key + ".netlist")
+    if data is None and path is not None:
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            marshal.loads(data)
+        except (OSError, EOFError, ValueError, TypeError):
+            data = None
+    if data is None:
+        data = marshal.dumps(vars(optimize(netlist.compile_component(component, num_bits))))
+        if path is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            _write(path, data, "wb")
+    _netlists[key] = data
+    nl = Netlist()
+    nl.__dict__.update(marshal.loads(data))
+    return nl
+
+
+def compile_component(component, num_bits=None, cache_dir=CACHE_DIR) -> Netlist:
+    key = component_key(component, num_bits)
+    return compile_netlist(_load_netlist(component, num_bits, key, cache_dir), cache_dir, key)
@@ -0,0 +1,467 @@
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from logic_gates import *
+from arithmetic import *
+from arith_engine import ArithEngine
+from logic_engine import LogicEngine
+from netlist import compile_component
+from optimize import optimize
+
+
+# Differential verification against golden models.
+#
+#   result = differential(ArithEngine(32), random_batches(ranges, 100000))
+#   result["mismatch_count"], result["mismatches"][0]["minimized"]
+#
+# GOLDEN maps every component class to a reference model written directly
+# from the spec, column-wise over a whole batch: model(component, columns)
+# returns {output name: list}. These work on Python ints, so they are exact
+# at any width. VECTORIZED holds NumPy versions of the same models over
+# int64 columns, for every component with scalar ports. Lookup walks the
+# MRO, so KoggeStoneAdder uses the Adder_multi_bits model and Splitter_8bit
+# the Splitter one.
+#
+# A batch is checked in NumPy when the component has a vectorized model,
+# its width is at most VECTOR_BITS and every input and output column fits
+# in int64 (inputs within +-2^VECTOR_BITS, so no model overflows): one
+# masked XOR per output finds the failing rows. Anything else, e.g. 64-bit
+# engines or bus outputs, falls back to the Python models row by row, as
+# does everything when NumPy is not installed.
+#
+# Semantics are explicit. Gates are bitwise on unbounded ints, so their
+# results (e.g. ~(A | B)) are exact. Arithmetic blocks take the low
+# num_bits of every operand and return num_bits-wide unsigned results; the
+# engines return the bitwise results of their inputs for the logic ops and
+# the num_bits-wide unsigned result for ADD/SUB/MUL. Comparison is exact
+# unless signed is given: then both sides are wrapped to num_bits and read
+# as two's complement (signed=True) or unsigned (signed=False).
+#
+# The model under test is any backend: "call" (component.call per row),
+# "netlist" (bit-sliced on the optimized netlist), or a callable taking a
+# columnar batch and returning output columns (ArrayEngine.run, a netlist's
+# run_columns, ...). Outputs are compared
+# in bulk; the first max_mismatches are re-checked one at a time and
+# shrunk to a minimal failing input (fewest set bits, smallest magnitude),
+# with op held fixed.
+GOLDEN: Dict[type, Callable] = {}
+VECTORIZED: Dict[type, Callable] = {}
+VECTOR_BITS = 62
+
+Columns = Dict[str, Sequence]
+
+
+def golden(*classes):
+    def register(model):
+        for cls in classes:
+            GOLDEN[cls] = model
+        return model
+    return register
+
+
+def vectorized(*classes):
+    def register(model):
+        for cls in classes:
+            VECTORIZED[cls] = model
+        return model
+    return register
+
+
+def golden_model(component) -> Callable:
+    for cls in type(component).__mro__:
+        if cls in GOLDEN:
+            return GOLDEN[cls]
+    raise NotImplementedError(f"no golden model for {type(component).__name__}")
+
+
+def vectorized_model(component) -> Optional[Callable]:
+    for cls in type(component).__mro__:
+        if cls in VECTORIZED:
+            return VECTORIZED[cls]
+    return None
+
+
+def _mask(component):
+    return (1 << component.num_bits) - 1
+
+
+@golden(NOTGate)
+def _not(component, x):
+    return {"B": [~a for a in x["A"]]}
+
+
+@golden(NANDGate)
+def _nand(component, x):
+    return {"C": [~(a & b) for a, b in zip(x["A"], x["B"])]}
+
+
+@golden(ANDGate)
+def _and(component, x):
+    return {"C": [a & b for a, b in zip(x["A"], x["B"])]}
+
+
+@golden(ORGate)
+def _or(component, x):
+    return {"C": [a | b for a, b in zip(x["A"], x["B"])]}
+
+
+@golden(NORGate)
+def _nor(component, x):
+    return {"C": [~(a | b) for a, b in zip(x["A"], x["B"])]}
+
+
+@golden(XORGate)
+def _xor(component, x):
+    return {"C": [a ^ b for a, b in zip(x["A"], x["B"])]}
+
+
+@golden(XNORGate)
+def _xnor(component, x):
+    return {"C": [~(a ^ b) for a, b in zip(x["A"], x["B"])]}
+
+
+@golden(ORGate_4way)
+def _or_4way(component, x):
+    return {"B": [a[0] | a[1] | a[2] | a[3] for a in x["A"]]}
+
+
+@golden(Splitter)
+def _splitter(component, x):
+    return {"B": [[(a >> i) & 1 for i in range(component.num_bits)] for a in x["A"]]}
+
+
+@golden(Hub)
+def _hub(component, x):
+    return {"B": [sum(bits[i] << i for i in range(component.num_bits)) for bits in x["A"]]}
+
+
+@golden(HalfAdder)
+def _half_adder(component, x):
+    return {"sum": [a ^ b for a, b in zip(x["A"], x["B"])], "car": [a & b for a, b in zip(x["A"], x["B"])]}
+
+
+@golden(FullAdder)
+def _full_adder(component, x):
+    rows = list(zip(x["A"], x["B"], x["C"]))
+    return {"sum": [a ^ b ^ c for a, b, c in rows], "car": [(a & b) | (c & (a ^ b)) for a, b, c in rows]}
+
+
+@golden(FullAdder_multi_bits, Adder_multi_bits)
+def _adder(component, x):
+    mask = _mask(component)
+    total = [(a & mask) + (b & mask) + c for a, b, c in zip(x["A"], x["B"], x["C"])]
+    return {"sum": [t & mask for t in total], "car": [t >> component.num_bits for t in total]}
+
+
+@golden(Decoder_multi_bits)
+def _decoder(component, x):
+    out = []
+    for bits in x["A"]:
+        one_hot = [0] * (1 << len(bits))
+        one_hot[sum(b << i for i, b in enumerate(bits))] = 1
+        out.append(one_hot)
+    return {"B": out}
+
+
+@golden(SWC)
+def _swc(component, x):
+    return {"B": [a if s else 0 for a, s in zip(x["A"], x["S"])]}
+
+
+@golden(NEG_multi_bits)
+def _neg(component, x):
+    mask = _mask(component)
+    return {"B": [-a & mask for a in x["A"]]}
+
+
+# Sub adds the two's complement of B, so its carry is the no-borrow flag.
+@golden(Sub)
+def _sub(component, x):
+    mask = _mask(component)
+    total = [(a & mask) + (-b & mask) for a, b in zip(x["A"], x["B"])]
+    return {"sum": [t & mask for t in total], "car": [t >> component.num_bits for t in total]}
+
+
+@golden(ShiftLeft)
+def _shift_left(component, x):
+    return {"B": [a << 1 for a in x["A"]]}
+
+
+@golden(ShiftRight)
+def _shift_right(component, x):
+    return {"B": [a >> 1 for a in x["A"]]}
+
+
+@golden(Mul, TreeMul)
+def _mul(component, x):
+    mask = _mask(component)
+    return {"C": [(a * b) & mask for a, b in zip(x["A"], x["B"])]}
+
+
+def _engine_op(op, a, b, mask, arith):
+    if op == 0:
+        return a | b
+    if op == 1:
+        return ~(a & b)
+    if op == 2:
+        return ~(a | b)
+    if op == 3:
+        return a & b
+    if op == 4 and arith:
+        return (a + b) & mask
+    if op == 5 and arith:
+        return (a - b) & mask
+    if op == 6 and arith:
+        return (a * b) & mask
+    return 0
+
+
+@golden(ArithEngine)
+def _arith_engine(component, x):
+    mask = _mask(component)
+    return {"C": [_engine_op(op, a, b, mask, True) for op, a, b in zip(x["op"], x["A"], x["B"])]}
+
+
+@golden(LogicEngine)
+def _logic_engine(component, x):
+    return {"C": [_engine_op(op, a, b, 0, False) for op, a, b in zip(x["op"], x["A"], x["B"])]}
+
+
+@vectorized(NOTGate)
+def _not_np(component, x):
+    return {"B": ~x["A"]}
+
+
+@vectorized(NANDGate)
+def _nand_np(component, x):
+    return {"C": ~(x["A"] & x["B"])}
+
+
+@vectorized(ANDGate)
+def _and_np(component, x):
+    return {"C": x["A"] & x["B"]}
+
+
+@vectorized(ORGate)
+def _or_np(component, x):
+    return {"C": x["A"] | x["B"]}
+
+
+@vectorized(NORGate)
+def _nor_np(component, x):
+    return {"C": ~(x["A"] | x["B"])}
+
+
+@vectorized(XORGate)
+def _xor_np(component, x):
+    return {"C": x["A"] ^ x["B"]}
+
+
+@vectorized(XNORGate)
+def _xnor_np(component, x):
+    return {"C": ~(x["A"] ^ x["B"])}
+
+
+@vectorized(HalfAdder)
+def _half_adder_np(component, x):
+    return {"sum": x["A"] ^ x["B"], "car": x["A"] & x["B"]}
+
+
+@vectorized(FullAdder)
+def _full_adder_np(component, x):
+    a, b, c = x["A"], x["B"], x["C"]
+    return {"sum": a ^ b ^ c, "car": (a & b) | (c & (a ^ b))}
+
+
+@vectorized(FullAdder_multi_bits, Adder_multi_bits)
+def _adder_np(component, x):
+    mask = _mask(component)
+    total = (x["A"] & mask) + (x["B"] & mask) + x["C"]
+    return {"sum": total & mask, "car": total >> component.num_bits}
+
+
+@vectorized(SWC)
+def _swc_np(component, x):
+    return {"B": np.where(x["S"] != 0, x["A"], 0)}
+
+
+@vectorized(NEG_multi_bits)
+def _neg_np(component, x):
+    return {"B": -x["A"] & _mask(component)}
+
+
+@vectorized(Sub)
+def _sub_np(component, x):
+    mask = _mask(component)
+    total = (x["A"] & mask) + (-x["B"] & mask)
+    return {"sum": total & mask, "car": total >> component.num_bits}
+
+
+@vectorized(ShiftLeft)
+def _shift_left_np(component, x):
+    return {"B": x["A"] << 1}
+
+
+@vectorized(ShiftRight)
+def _shift_right_np(component, x):
+    return {"B": x["A"] >> 1}
+
+
+# int64 products wrap modulo 2^64, which keeps the low num_bits exact.
+@vectorized(Mul, TreeMul)
+def _mul_np(component, x):
+    return {"C": (x["A"] * x["B"]) & _mask(component)}
+
+
+def _engine_ops_np(op, a, b, mask, arith):
+    results = [a | b, ~(a & b), ~(a | b), a & b]
+    if arith:
+        results += [(a + b) & mask, (a - b) & mask, (a * b) & mask]
+    return np.select([op == k for k in range(len(results))], results, 0)
+
+
+@vectorized(ArithEngine)
+def _arith_engine_np(component, x):
+    return {"C": _engine_ops_np(x["op"], x["A"], x["B"], _mask(component), True)}
+
+
+@vectorized(LogicEngine)
+def _logic_engine_np(component, x):
+    return {"C": _engine_ops_np(x["op"], x["A"], x["B"], 0, False)}
+
+
+# Netlists pack bus outputs (Splitter, Decoder) into one unsigned int.
+def _pack(bits):
+    return sum(bit << i for i, bit in enumerate(bits))
+
+
+def _view(x, num_bits, signed):
+    if signed is None or isinstance(x, list):
+        return x
+    x = int(x) & ((1 << num_bits) - 1)
+    if signed and x >> (num_bits - 1):
+        x -= 1 << num_bits
+    return x
+
+
+# columns as 1-d int64 arrays, or None if any does not fit; limit also
+# bounds the magnitude of the values.
+def _int64_columns(columns, limit=None) -> Optional[Dict]:
+    arrays = {}
+    for name, column in columns.items():
+        try:
+            x = np.asarray(column, dtype=np.int64)
+        except (OverflowError, TypeError, ValueError):
+            return None
+        if x.ndim != 1 or (limit is not None and len(x) and (x.min() < -limit or x.max() >= limit)):
+            return None
+        arrays[name] = x
+    return arrays
+
+
+def _item(x):
+    return int(x) if np is not None and isinstance(x, np.integer) else x
+
+
+def _backend(component, backend, num_bits):
+    if callable(backend):
+        return backend
+    if backend == "call":
+        names = component.input_names
+        outputs = component.output_names
+
+        def run_call(columns):
+            results = [component.call(*row) for row in zip(*[columns[name] for name in names])]
+            if len(outputs) == 1:
+                return {outputs[0]: results}
+            return {name: [r[k] for r in results] for k, name in enumerate(outputs)}
+        return run_call
+    if backend == "netlist":
+        return optimize(compile_component(component, num_bits)).run_columns
+    raise ValueError(f"unknown backend {backend!r}")
+
+
+# Shrink a failing input: try 0, then clearing each set bit from the top,
+# for every input but op, for as long as the vector still fails.
+def minimize(inputs: Dict[str, int], fails: Callable[[Dict[str, int]], bool], fixed=("op",)) -> Dict[str, int]:
+    inputs = dict(inputs)
+    changed = True
+    while changed:
+        changed = False
+        for name, value in list(inputs.items()):
+            if name in fixed or not isinstance(value, int) or value == 0:
+                continue
+            candidates = [0, -value] if value < 0 else [0]
+            magnitude = abs(value)
+            candidates += [(magnitude & ~(1 << i)) * (1 if value > 0 else -1)
+                           for i in reversed(range(magnitude.bit_length())) if magnitude >> i & 1]
+            for candidate in candidates:
+                trial = dict(inputs, **{name: candidate})
+                if (abs(candidate), candidate < 0) < (abs(value), value < 0) and fails(trial):
+                    inputs = trial
+                    changed = True
+                    break
+    return inputs
+
+
+def differential(component, batches: Union[Columns, Iterable[Columns]], backend: Union[str, Callable] = "call",
+                 num_bits=None, signed=None, max_mismatches=10, shrink=True) -> Dict:
+    if isinstance(batches, dict):
+        batches = [batches]
+    model = golden_model(component)
+    run = _backend(component, backend, num_bits)
+    width = num_bits or getattr(component, "num_bits", 8)
+    vector = vectorized_model(component) if np is not None and width <= VECTOR_BITS else None
+
+    def compare(columns):
+        got = run(columns)
+        arrays = _int64_columns(columns, 1 << VECTOR_BITS) if vector is not None else None
+        if arrays is not None:
+            want = vector(component, arrays)
+            outs = _int64_columns({name: got[name] for name in want})
+            if outs is not None:
+                bad = np.zeros(len(next(iter(want.values()))), dtype=bool)
+                for name, expected in want.items():
+                    diff = outs[name] ^ expected
+                    if signed is not None:
+                        diff &= (1 << width) - 1
+                    bad |= diff != 0
+                return got, want, np.flatnonzero(bad).tolist()
+        want = model(component, columns)
+        bad = set()
+        for name, expected in want.items():
+            for i, (x, y) in enumerate(zip(got[name], expected)):
+                if isinstance(y, list) and not isinstance(x, list):
+                    y = _pack(y)
+                if _view(x, width, signed) != _view(y, width, signed):
+                    bad.add(i)
+        return got, want, sorted(bad)
+
+    def fails(inputs):
+        return bool(compare({name: [value] for name, value in inputs.items()})[2])
+
+    vectors = 0
+    count = 0
+    mismatches: List[Dict] = []
+    for columns in batches:
+        if not columns:
+            continue
+        got, want, bad = compare(columns)
+        for i in bad[:max(0, max_mismatches - len(mismatches))]:
+            inputs = {name: _item(column[i]) for name, column in columns.items()}
+            mismatch = {
+                "index": vectors + i,
+                "inputs": inputs,
+                "got": {name: _item(got[name][i]) for name in want},
+                "expected": {name: _item(want[name][i]) for name in want},
+            }
+            if shrink:
+                mismatch["minimized"] = minimize(inputs, fails)
+            mismatches.append(mismatch)
+        count += len(bad)
+        vectors += len(next(iter(columns.values())))
+    return {"vectors": vectors, "mismatch_count": count, "mismatches": mismatches}
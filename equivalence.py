@@ -0,0 +1,642 @@
+import heapq
+import itertools
+import random
+from typing import Dict, List, Optional, Tuple
+
+from netlist import Netlist, compile_component
+from optimize import optimize
+
+
+# Formal equivalence checking of two components or netlists.
+#
+#   result = equivalent(FullAdder_multi_bits(32), KoggeStoneAdder(32))
+#   result["equivalent"]        # True, False, or None if undecided
+#   result["outputs"]           # {output: methods that decided it}
+#   result["counterexample"]    # {"inputs", "left", "right"} when False
+#
+# Both sides are compiled (or taken as netlists), joined into one miter
+# netlist on shared input ports and optimized, so structure the two have in
+# common is hashed into the same gates. Every output is then decided by the
+# cheapest method that works:
+#
+#   simulation  random lanes, plus all-zeros and all-ones; a differing lane
+#               is a counterexample
+#   structural  both sides reduced to the same nets
+#   bdd         reduced ordered BDDs of every output bit, inputs interleaved
+#               by bit (A0 B0 C0 A1 B1 ...), which keeps adders, logic and
+#               small multipliers linear to polynomial in size. Equal
+#               functions are equal references; a differing bit yields a
+#               counterexample from any path to 1 of their XOR.
+#   algebraic   multiplier-sized cones, where BDDs are exponential. Each
+#               output bus is a word, sum(2^k * bit_k) mod 2^w, and is
+#               rewritten backwards into its unique multilinear polynomial
+#               over the input bits. Two buses are equal iff their
+#               polynomials are. Half and full adders are found by 3-input
+#               cut enumeration and substituted as one block, so their sum
+#               and carry cancel. A parallel-prefix final adder (Kogge-Stone
+#               and friends) would still blow up, so it is located from
+#               simulation signatures and proven to compute L + R by BDD
+#               over its operand nets; rewriting restarts from L + R.
+#               Polynomials that differ give a counterexample from their
+#               lowest-degree differing monomial.
+#
+# When BDDs run past node_limit and an input is at most split_bits wide
+# (an engine's op, a carry-in), the miter is split on every value of such
+# inputs and each constant-folded cofactor is decided on its own; outputs
+# then list the methods used across the cofactors. An output that neither
+# method decides within its limits is reported undecided and equivalent is
+# None.
+SIMULATION_LANES = 4096
+SIGNATURE_LANES = 256
+
+
+class _Blowup(Exception):
+    pass
+
+
+# ROBDD with complement edges. A reference is node << 1 | complement and
+# node 0 is the terminal, so TRUE = 0 and FALSE = 1. The then-edge is never
+# complemented, which keeps every function canonical.
+class BDD:
+    TRUE = 0
+    FALSE = 1
+    TERMINAL = 1 << 30
+
+    def __init__(self, node_limit=200000):
+        self.node_limit = node_limit
+        self.var = [self.TERMINAL]
+        self.hi = [0]
+        self.lo = [0]
+        self.unique = {}
+        self.cache = {}
+
+    def _node(self, v, hi, lo):
+        if hi == lo:
+            return hi
+        comp = hi & 1
+        if comp:
+            hi ^= 1
+            lo ^= 1
+        key = (v, hi, lo)
+        ref = self.unique.get(key)
+        if ref is None:
+            if len(self.var) >= self.node_limit:
+                raise _Blowup(f"more than {self.node_limit} BDD nodes")
+            ref = len(self.var) << 1
+            self.var.append(v)
+            self.hi.append(hi)
+            self.lo.append(lo)
+            self.unique[key] = ref
+        return ref | comp
+
+    def variable(self, level):
+        return self._node(level, self.TRUE, self.FALSE)
+
+    def and_(self, f, g):
+        if f == self.FALSE or g == self.FALSE or f ^ g == 1:
+            return self.FALSE
+        if f == self.TRUE or f == g:
+            return g
+        if g == self.TRUE:
+            return f
+        if f > g:
+            f, g = g, f
+        ref = self.cache.get((f, g))
+        if ref is not None:
+            return ref
+        fv = self.var[f >> 1]
+        gv = self.var[g >> 1]
+        v = min(fv, gv)
+        f1, f0 = self._cofactors(f, fv == v)
+        g1, g0 = self._cofactors(g, gv == v)
+        ref = self._node(v, self.and_(f1, g1), self.and_(f0, g0))
+        self.cache[(f, g)] = ref
+        return ref
+
+    def _cofactors(self, f, top):
+        if not top:
+            return f, f
+        comp = f & 1
+        return self.hi[f >> 1] ^ comp, self.lo[f >> 1] ^ comp
+
+    def nand(self, f, g):
+        return self.and_(f, g) ^ 1
+
+    def xor(self, f, g):
+        return self.nand(self.nand(f, g ^ 1), self.nand(f ^ 1, g))
+
+    # {level: bit} for one path to TRUE; unlisted levels are free.
+    def sat_one(self, f) -> Optional[Dict[int, int]]:
+        if f == self.FALSE:
+            return None
+        path = {}
+        while f >> 1:
+            hi, lo = self._cofactors(f, True)
+            bit = 1 if hi != self.FALSE else 0
+            path[self.var[f >> 1]] = bit
+            f = hi if bit else lo
+        return path
+
+
+def _as_netlist(side, num_bits) -> Netlist:
+    if isinstance(side, Netlist):
+        return side
+    return compile_component(side, num_bits)
+
+
+# One netlist computing both sides from shared inputs; outputs are named
+# "left.<name>" and "right.<name>".
+def miter(left: Netlist, right: Netlist) -> Netlist:
+    assert set(left.inputs) == set(right.inputs), \
+        f"input ports differ: {sorted(left.inputs)} != {sorted(right.inputs)}"
+    assert set(left.outputs) == set(right.outputs), \
+        f"output ports differ: {sorted(left.outputs)} != {sorted(right.outputs)}"
+    for ports in ("inputs", "outputs"):
+        for name, (bus, _) in getattr(left, ports).items():
+            other = len(getattr(right, ports)[name][0])
+            assert len(bus) == other, f"{name} is {len(bus)} bits on the left and {other} on the right"
+    nl = Netlist()
+    inputs = {name: nl.add_input(name, len(bus), signed) for name, (bus, signed) in left.inputs.items()}
+    for side, src in (("left", left), ("right", right)):
+        rep = {Netlist.CONST_0: Netlist.CONST_0, Netlist.CONST_1: Netlist.CONST_1}
+        for name, (bus, _) in src.inputs.items():
+            rep.update(zip(bus, inputs[name]))
+        for kind, out, a, b in src.gates:
+            rep[out] = nl._gate(kind, rep[a], rep[b])
+        for name, (bus, signed) in src.outputs.items():
+            nl.add_output(f"{side}.{name}", [rep[net] for net in bus], signed)
+    return nl.finalize()
+
+
+def _gates(nl: Netlist) -> Dict[int, Tuple[int, int]]:
+    return {out: (a, b) for out, a, b in nl.program}
+
+
+# Random lanes, with all inputs 0 in lane 0 and all 1 in lane 1.
+def _simulate(nl: Netlist, lanes, rng) -> List[int]:
+    v = nl._slots()
+    for bus, _ in nl.inputs.values():
+        for net in bus:
+            v[net] = rng.getrandbits(lanes) & ~1 | 2
+    return nl.evaluate(v)
+
+
+def _lane(nl: Netlist, v, lane) -> Dict[str, int]:
+    inputs = {}
+    for name, (bus, signed) in nl.inputs.items():
+        x = sum(((v[net] >> lane) & 1) << i for i, net in enumerate(bus))
+        if signed and x >> (len(bus) - 1):
+            x -= 1 << len(bus)
+        inputs[name] = x
+    return inputs
+
+
+# Input values from a set of input nets that are 1, all others 0.
+def _assignment(nl: Netlist, ones) -> Dict[str, int]:
+    v = [0] * nl.num_nets
+    for net in ones:
+        v[net] = 1
+    return _lane(nl, v, 0)
+
+
+# Gate outputs in the fan-in of roots, stopping at leaves.
+def _cone(gates, roots, leaves=()) -> set:
+    seen = set()
+    stack = [net for net in roots if net in gates]
+    while stack:
+        net = stack.pop()
+        if net in seen or net in leaves:
+            continue
+        seen.add(net)
+        stack += [x for x in gates[net] if x in gates]
+    return seen
+
+
+def _levels(nl: Netlist) -> Dict[int, int]:
+    width = max((len(bus) for bus, _ in nl.inputs.values()), default=0)
+    levels = {}
+    for i in range(width):
+        for bus, _ in nl.inputs.values():
+            if i < len(bus):
+                levels[bus[i]] = len(levels)
+    return levels
+
+
+# BDDs of the given nets, with the nets in levels as variables.
+def _bdds(nl: Netlist, bdd: BDD, levels: Dict[int, int], nets) -> Dict[int, int]:
+    f = {Netlist.CONST_0: BDD.FALSE, Netlist.CONST_1: BDD.TRUE}
+    for net, level in levels.items():
+        f[net] = bdd.variable(level)
+    cone = _cone(_gates(nl), nets, levels)
+    for out, a, b in nl.program:
+        if out in cone:
+            f[out] = bdd.nand(f[a], f[b])
+    return f
+
+
+_VARS = (0b10101010, 0b11001100, 0b11110000)
+
+
+# Truth tables of MAJ(a, b, c) and its complement, under every negation of
+# the inputs.
+def _majorities() -> frozenset:
+    tables = set()
+    for neg in range(8):
+        f = sum(1 << m for m in range(8) if sum(((m >> i) ^ (neg >> i)) & 1 for i in range(3)) >= 2)
+        tables.update((f, f ^ 0xFF))
+    return frozenset(tables)
+
+
+_MAJ = _majorities()
+
+
+def _truth(gates, net, leaves) -> int:
+    full = (1 << (1 << len(leaves))) - 1
+    value = {Netlist.CONST_0: 0, Netlist.CONST_1: full}
+    for i, leaf in enumerate(leaves):
+        value[leaf] = _VARS[i] & full if len(leaves) == 3 else (0b1010, 0b1100)[i]
+    for out in sorted(_cone(gates, [net], value)):
+        a, b = gates[out]
+        value[out] = ~(value[a] & value[b]) & full
+    return value[net]
+
+
+def _is_carry(tt, n):
+    if n == 3:
+        return tt in _MAJ
+    return bin(tt).count("1") in (1, 3)
+
+
+# Half and full adders: {net: (leaves, outputs)} for every net that is the
+# XOR or the carry (majority / AND, up to negations) of a 2- or 3-input cut
+# that has both. Each net belongs to the block of its widest such cut.
+def _blocks(nl: Netlist, per_node=16) -> Dict[int, Tuple[Tuple[int, ...], Tuple[int, ...]]]:
+    gates = _gates(nl)
+    cuts = {Netlist.CONST_0: [()], Netlist.CONST_1: [()]}
+    for bus, _ in nl.inputs.values():
+        for net in bus:
+            cuts[net] = [(net,)]
+    by_cut: Dict[Tuple[int, ...], List[int]] = {}
+    for out, a, b in nl.program:
+        merged = {tuple(sorted(set(x) | set(y))) for x in cuts[a] for y in cuts[b]}
+        merged = sorted((c for c in merged if len(c) <= 3), key=len)[:per_node]
+        cuts[out] = merged + [(out,)]
+        for c in merged:
+            if len(c) >= 2:
+                by_cut.setdefault(c, []).append(out)
+    widest = {}
+    for c, outs in by_cut.items():
+        n = len(c)
+        tts = {out: _truth(gates, out, c) for out in outs}
+        xors = [out for out in outs if tts[out] in ((0x96, 0x69) if n == 3 else (0b0110, 0b1001))]
+        carries = [out for out in outs if _is_carry(tts[out], n)]
+        if xors and carries:
+            for out in xors + carries:
+                if len(widest.get(out, ())) < n:
+                    widest[out] = c
+    groups: Dict[Tuple[int, ...], List[int]] = {}
+    for out, c in widest.items():
+        groups.setdefault(c, []).append(out)
+    return {out: (c, tuple(sorted(outs))) for c, outs in groups.items() for out in outs}
+
+
+# Multilinear polynomial of a truth table over leaves (Moebius transform).
+def _polynomial(tt, leaves) -> Dict[frozenset, int]:
+    n = len(leaves)
+    coef = [(tt >> j) & 1 for j in range(1 << n)]
+    for i in range(n):
+        for j in range(1 << n):
+            if j >> i & 1:
+                coef[j] -= coef[j ^ (1 << i)]
+    return {frozenset(leaves[i] for i in range(n) if j >> i & 1): c for j, c in enumerate(coef) if c}
+
+
+class _Polynomial:
+    def __init__(self, mask, term_limit):
+        self.mask = mask
+        self.term_limit = term_limit
+        self.terms: Dict[frozenset, int] = {}
+        self.occurs: Dict[int, set] = {}
+
+    def add(self, monomial, c):
+        c = (self.terms.get(monomial, 0) + c) & self.mask
+        if c:
+            if monomial not in self.terms:
+                for net in monomial:
+                    self.occurs.setdefault(net, set()).add(monomial)
+            self.terms[monomial] = c
+        elif monomial in self.terms:
+            del self.terms[monomial]
+            for net in monomial:
+                self.occurs[net].discard(monomial)
+
+    def substitute(self, net, poly):
+        for monomial in list(self.occurs.pop(net, ())):
+            c = self.terms.pop(monomial)
+            for other in monomial:
+                if other != net:
+                    self.occurs[other].discard(monomial)
+            rest = monomial - {net}
+            for m, k in poly.items():
+                self.add(rest | m, c * k)
+        if len(self.terms) > self.term_limit:
+            raise _Blowup(f"more than {self.term_limit} terms")
+
+
+# Rewrite poly (over gate outputs) down to the input bits. A unit is a
+# block or a single gate; a unit is substituted only once every unit
+# reading its outputs is done, so a block's sum and carry are replaced
+# together and cancel.
+def _rewrite(nl: Netlist, poly: _Polynomial, blocks):
+    gates = _gates(nl)
+    order = {out: i for i, (out, _, _) in enumerate(nl.program)}
+
+    def unit(net):
+        return blocks.get(net) or (gates[net], (net,))
+
+    def reads(u):
+        return [unit(net) for net in set(u[0]) if net in gates]
+
+    units = set()
+    stack = [unit(net) for net in list(poly.occurs) if net in gates]
+    while stack:
+        u = stack.pop()
+        if u not in units:
+            units.add(u)
+            stack += reads(u)
+    readers = dict.fromkeys(units, 0)
+    for u in units:
+        for r in reads(u):
+            readers[r] += 1
+    tie = itertools.count()
+    ready = [(-max(order[net] for net in u[1]), next(tie), u) for u in units if not readers[u]]
+    heapq.heapify(ready)
+    while ready:
+        u = heapq.heappop(ready)[2]
+        leaves, outs = u
+        if len(outs) == 1 and gates[outs[0]] == leaves:
+            a, b = leaves
+            sub = {frozenset(): 1}
+            if Netlist.CONST_0 not in (a, b):
+                sub[frozenset(leaves) - {Netlist.CONST_1}] = -1
+            poly.substitute(outs[0], sub)
+        else:
+            for net in outs:
+                if poly.occurs.get(net):
+                    poly.substitute(net, _polynomial(_truth(gates, net, leaves), leaves))
+        for r in reads(u):
+            readers[r] -= 1
+            if not readers[r]:
+                heapq.heappush(ready, (-max(order[net] for net in r[1]), next(tie), r))
+    if any(net in gates for net in poly.occurs if poly.occurs[net]):
+        raise _Blowup("rewriting did not reach the inputs")
+
+
+# Final adder: literals (net, negated) l_k, r_k with bus = L + R mod 2^w
+# for every value of the operand nets, searched bit by bit from the LSB.
+# The carry into bit k follows from the pairs below it, so l_k ^ r_k must
+# equal bus[k] ^ carry_k on every simulation lane; candidates come from the
+# cone of bus[k], nearest first, and must cut bus[k] off the inputs. Each
+# pair is then proven by BDD, with the operand nets as free variables
+# ordered l_0 r_0 l_1 r_1 ..., and the search backtracks on failure. A net
+# that is a variable may still be some function of the others; the proof
+# holds for every value, so also for the ones the circuit produces.
+def _final_adder(nl: Netlist, bus, v, lanes, node_limit, depth=8, budget=2000):
+    gates = _gates(nl)
+    full = (1 << lanes) - 1
+    bdd = BDD(node_limit)
+    f = {Netlist.CONST_0: BDD.FALSE, Netlist.CONST_1: BDD.TRUE}
+    chosen = []
+    carries = [(0, BDD.FALSE)]
+    added = []
+    steps = [0]
+
+    def value(literal):
+        net, negated = literal
+        return (v[net] & full) ^ (full if negated else 0)
+
+    def operand(literal):
+        net, negated = literal
+        if net not in f:
+            f[net] = bdd.variable(len(bdd.var))
+        return f[net] ^ negated
+
+    def function(net):
+        cone = _cone(gates, [net], f)
+        for x in sorted(cone):
+            for y in gates[x]:
+                if y not in f and y not in cone:
+                    f[y] = bdd.variable(len(bdd.var))
+            f[x] = bdd.nand(*[f[y] for y in gates[x]])
+        return f[net]
+
+    def near(net):
+        out, frontier = [], [net]
+        seen = {net}
+        for _ in range(depth):
+            frontier = [x for y in frontier if y in gates for x in gates[y]]
+            frontier = [x for x in dict.fromkeys(frontier) if x not in seen]
+            seen.update(frontier)
+            out += frontier
+        return out
+
+    def cuts_off(k):
+        cut = {net for pair in chosen for net, _ in pair}
+        stack, seen = [bus[k]], set()
+        while stack:
+            net = stack.pop()
+            if net in cut or net in seen or net in (Netlist.CONST_0, Netlist.CONST_1):
+                continue
+            if net not in gates:
+                return False
+            seen.add(net)
+            stack += gates[net]
+        return True
+
+    # Entries added to f are undone when the pair is dropped, so a
+    # rejected operand never stays a variable.
+    def proves(k):
+        l, r = chosen[k]
+        carry = carries[k][1]
+        known = set(f)
+        try:
+            a, b = operand(l), operand(r)
+            if function(bus[k]) == bdd.xor(bdd.xor(a, b), carry):
+                carries.append((value(l) & value(r) | carries[k][0] & (value(l) ^ value(r)),
+                                bdd.nand(bdd.nand(a, b), bdd.nand(carry, bdd.xor(a, b)))))
+                added.append([net for net in f if net not in known])
+                return True
+        except _Blowup:
+            pass
+        drop([net for net in f if net not in known])
+        return False
+
+    def drop(nets):
+        for net in nets:
+            del f[net]
+
+    def solve(k):
+        steps[0] += 1
+        if k == len(bus):
+            return True
+        if steps[0] > budget:
+            return False
+        s = v[bus[k]] & full
+        target = s ^ carries[k][0]
+        candidates = [Netlist.CONST_0] + [net for net in near(bus[k]) if v[net] & full not in (s, s ^ full)]
+        signature = {}
+        for net in candidates:
+            signature.setdefault(v[net] & full, net)
+        options = []
+        for x in candidates:
+            for negated in (0, 1):
+                y = signature.get(target ^ (v[x] & full) ^ (full if negated else 0))
+                if y is not None and y != x:
+                    options.append(((x, 0), (y, negated)))
+        if target == s:
+            options.append(((bus[k], 0), (Netlist.CONST_0, 0)))
+        for pair in options:
+            chosen.append(pair)
+            if cuts_off(k) and proves(k):
+                if solve(k + 1):
+                    return True
+                carries.pop()
+                drop(added.pop())
+            chosen.pop()
+        return False
+
+    return chosen if solve(0) else None
+
+
+# Word polynomial sum(2^k * bus[k]) mod 2^len(bus) over the input bits.
+def _word_polynomial(nl: Netlist, bus, blocks, node_limit, term_limit, rng) -> Dict[frozenset, int]:
+    poly = _Polynomial((1 << len(bus)) - 1, term_limit)
+    v = _simulate(nl, SIGNATURE_LANES, rng)
+    pairs = _final_adder(nl, bus, v, SIGNATURE_LANES, node_limit)
+    if pairs:
+        terms = [(k, net, negated) for k, pair in enumerate(pairs) for net, negated in pair]
+    else:
+        terms = [(k, net, 0) for k, net in enumerate(bus)]
+    for k, net, negated in terms:
+        sign = -1 if negated else 1
+        if negated:
+            poly.add(frozenset(), 1 << k)
+        if net == Netlist.CONST_1:
+            poly.add(frozenset(), sign << k)
+        elif net != Netlist.CONST_0:
+            poly.add(frozenset([net]), sign << k)
+    _rewrite(nl, poly, blocks)
+    return poly.terms
+
+
+def _buses(nl: Netlist, names):
+    for name in names:
+        left = nl.outputs["left." + name][0]
+        right = nl.outputs["right." + name][0]
+        width = len(left)
+        while width and left[width - 1] == right[width - 1]:
+            width -= 1
+        yield name, left[:width], right[:width]
+
+
+# Decide the given outputs of a miter. Returns {name: method} for the
+# decided ones and, if some output differs, (method, input values).
+def _decide(nl: Netlist, names, node_limit, term_limit, rng, algebraic=True):
+    decided = {}
+    pending = []
+    for name, left, right in _buses(nl, names):
+        if left == right:
+            decided[name] = "structural"
+        else:
+            pending.append((name, left, right))
+    if not pending:
+        return decided, None
+
+    bdd = BDD(node_limit)
+    levels = _levels(nl)
+    try:
+        f = _bdds(nl, bdd, levels, [net for _, left, right in pending for net in left + right])
+        by_level = {level: net for net, level in levels.items()}
+        for name, left, right in pending:
+            for a, b in zip(left, right):
+                if f[a] != f[b]:
+                    path = bdd.sat_one(bdd.xor(f[a], f[b]))
+                    return decided, ("bdd", _assignment(nl, [by_level[level] for level, bit in path.items() if bit]))
+            decided[name] = "bdd"
+        return decided, None
+    except _Blowup:
+        if not algebraic:
+            return decided, None
+
+    blocks = _blocks(nl)
+    for name, left, right in pending:
+        try:
+            p = _word_polynomial(nl, left, blocks, node_limit, term_limit, rng)
+            q = _word_polynomial(nl, right, blocks, node_limit, term_limit, rng)
+        except _Blowup:
+            continue
+        if p != q:
+            mask = (1 << len(left)) - 1
+            diff = [m for m in set(p) | set(q) if (p.get(m, 0) - q.get(m, 0)) & mask]
+            return decided, ("algebraic", _assignment(nl, min(diff, key=len)))
+        decided[name] = "algebraic"
+    return decided, None
+
+
+def equivalent(left, right, num_bits=None, vectors=SIMULATION_LANES, node_limit=200000, term_limit=200000,
+               split_bits=3, seed=0) -> Dict:
+    left = _as_netlist(left, num_bits)
+    right = _as_netlist(right, num_bits)
+    nl = optimize(miter(left, right))
+    names = list(left.outputs)
+    rng = random.Random(seed)
+    outputs = {name: set() for name in names}
+
+    def differs(method, inputs):
+        got = left.run(inputs)
+        want = right.run(inputs)
+        assert got != want, f"{method} counterexample {inputs} does not reproduce"
+        for name in names:
+            if got[name] != want[name]:
+                outputs[name] = {method}
+        return {"equivalent": False, "outputs": {name: sorted(m) for name, m in outputs.items()},
+                "counterexample": {"inputs": inputs, "left": got, "right": want}}
+
+    if vectors:
+        v = _simulate(nl, vectors, rng)
+        lanes = (1 << vectors) - 1
+        diff = 0
+        for name, l, r in _buses(nl, names):
+            for a, b in zip(l, r):
+                diff |= (v[a] ^ v[b]) & lanes
+        if diff:
+            return differs("simulation", _lane(nl, v, (diff & -diff).bit_length() - 1))
+
+    # Rewriting a word through a mux selected by narrow inputs blows up, so
+    # with such inputs algebraic rewriting is left to the cofactors.
+    narrow = [name for name, (bus, _) in nl.inputs.items() if len(bus) <= split_bits]
+    decided, found = _decide(nl, names, node_limit, term_limit, rng, algebraic=not narrow)
+    if found:
+        return differs(*found)
+    for name, method in decided.items():
+        outputs[name].add(method)
+    pending = [name for name in names if name not in decided]
+
+    # Split on every value of the narrow inputs and decide each cofactor.
+    if pending and narrow:
+        for values in itertools.product(*[range(1 << len(nl.inputs[name][0])) for name in narrow]):
+            constants = {}
+            for name, x in zip(narrow, values):
+                bus, signed = nl.inputs[name]
+                constants[name] = x - (1 << len(bus)) if signed and x >> (len(bus) - 1) else x
+            case, found = _decide(optimize(nl, constants), pending, node_limit, term_limit, rng)
+            if found:
+                return differs("split " + found[0], dict(found[1], **constants))
+            for name in pending:
+                outputs[name].add(case.get(name, "undecided"))
+    else:
+        for name in pending:
+            outputs[name].add("undecided")
+    undecided = any("undecided" in methods for methods in outputs.values())
+    return {"equivalent": None if undecided else True, "outputs": {name: sorted(m) for name, m in outputs.items()},
+            "counterexample": None}
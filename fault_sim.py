@@ -0,0 +1,114 @@
+from typing import Dict, Iterable, List, Tuple
+
+from netlist import Netlist
+
+
+# Parallel-fault simulation of single stuck-at faults on a compiled netlist.
+#
+#   nl = compile_component(FullAdder_multi_bits(8))
+#   result = FaultSimulator(nl).run(vectors)
+#   result["coverage"], result["undetected"]
+#
+# A fault is (net, stuck_at) with stuck_at 0 or 1, on any primary input or
+# gate output. Faults are simulated in groups: bit lane 0 of every net is
+# the fault-free machine and lane k carries the k-th fault of the group, so
+# one pass over the program evaluates up to lanes - 1 faulty copies at
+# once. A fault is forced by masking its lane right after its net is
+# computed; it is detected by a vector when any output bit differs from
+# lane 0. A group stops as soon as all its faults are detected (fault
+# dropping).
+#
+# Faults are on the netlist as compiled: use the unoptimized netlist to
+# study the component's own structure.
+Fault = Tuple[int, int]
+
+
+def faults(nl: Netlist) -> List[Fault]:
+    nets = [net for bus, _ in nl.inputs.values() for net in bus]
+    nets += [out for _, out, _, _ in nl.gates]
+    return [(net, stuck_at) for net in nets for stuck_at in (0, 1)]
+
+
+# Port bit ("A[3]") or internal net ("n123") name, for reports.
+def net_name(nl: Netlist, net) -> str:
+    for ports in (nl.inputs, nl.outputs):
+        for name, (bus, _) in ports.items():
+            if net in bus:
+                return f"{name}[{bus.index(net)}]"
+    return f"n{net}"
+
+
+class FaultSimulator:
+    def __init__(self, nl: Netlist, fault_list: List[Fault] = None, lanes=4096):
+        assert lanes >= 2
+        self.netlist = nl
+        self.faults = list(faults(nl) if fault_list is None else fault_list)
+        self.lanes = lanes
+
+    # {net: (and mask, or mask)} forcing every fault of the group in its lane
+    @staticmethod
+    def _injection(group):
+        inject = {}
+        for lane, (net, stuck_at) in enumerate(group, 1):
+            keep, force = inject.get(net, (-1, 0))
+            if stuck_at:
+                force |= 1 << lane
+            else:
+                keep &= ~(1 << lane)
+            inject[net] = (keep, force)
+        return inject
+
+    def _simulate(self, inputs, inject, mask):
+        nl = self.netlist
+        v = nl._slots()
+        for name, (bus, signed) in nl.inputs.items():
+            x = inputs[name]
+            if signed:
+                lim = 1 << (len(bus) - 1)
+                assert -lim <= x < lim, f"{name}={x} does not fit in {len(bus)} signed bits"
+            for i, net in enumerate(bus):
+                v[net] = -((x >> i) & 1)
+                if net in inject:
+                    keep, force = inject[net]
+                    v[net] = (v[net] & keep) | force
+        for out, a, b in nl.program:
+            x = ~(v[a] & v[b])
+            m = inject.get(out)
+            if m is not None:
+                x = (x & m[0]) | m[1]
+            v[out] = x
+        diff = 0
+        for bus, _ in nl.outputs.values():
+            for net in bus:
+                diff |= v[net] ^ -(v[net] & 1)
+        return diff & mask
+
+    # vectors: input dicts, as for Netlist.run. Returns the fault count,
+    # {fault: index of the first detecting vector}, the undetected faults,
+    # the coverage and the number of (group, vector) passes simulated.
+    def run(self, vectors: Iterable[Dict[str, int]]) -> Dict:
+        vectors = list(vectors)
+        detected: Dict[Fault, int] = {}
+        passes = 0
+        for start in range(0, len(self.faults), self.lanes - 1):
+            group = self.faults[start:start + self.lanes - 1]
+            inject = self._injection(group)
+            remaining = ((1 << len(group)) - 1) << 1
+            for index, inputs in enumerate(vectors):
+                if not remaining:
+                    break
+                passes += 1
+                hits = self._simulate(inputs, inject, remaining)
+                remaining &= ~hits
+                while hits:
+                    low = hits & -hits
+                    detected.setdefault(group[low.bit_length() - 2], index)
+                    hits ^= low
+        undetected = [fault for fault in self.faults if fault not in detected]
+        return {
+            "faults": len(self.faults),
+            "detected": detected,
+            "undetected": undetected,
+            "coverage": len(detected) / len(self.faults) if self.faults else 1.0,
+            "passes": passes,
+        }
@@ -1,5 +1,6 @@
 from logic_gates import *
 from arithmetic import *
+from utils import check_inputs, shared
 
 
 # op[in]: 0-3
@@ -13,35 +14,60 @@ from arithmetic import *
 #   2   NOR
 #   3   AND
 class LogicEngine:
+    __slots__ = ("cache", "_netlists", "_inputs_checked", "splitter", "decoder", "swc", "or_gate", "nand_gate", "nor_gate", "and_gate",
+                 "or_gate_4way")
+    input_names = ("A", "B", "op")
+    output_names = ("C",)
+
     def __init__(self):
-        self.splitter = Splitter_8bit()
-        self.decoder = Decoder_3bit()
-        self.swc = SWC()
+        self.splitter = shared(Splitter_8bit)
+        self.decoder = shared(Decoder_3bit)
+        self.swc = shared(SWC)
+
+        self.or_gate = shared(ORGate)
+        self.nand_gate = shared(NANDGate)
+        self.nor_gate = shared(NORGate)
+        self.and_gate = shared(ANDGate)
 
-        self.or_gate = ORGate()
-        self.nand_gate = NANDGate()
-        self.nor_gate = NORGate()
-        self.and_gate = ANDGate()
+        self.or_gate_4way = shared(ORGate_4way)
 
-        self.or_gate_4way = ORGate_4way()
+    def call(self, A, B, op):
+        op = self.decoder.call(self.splitter.call(op)[:3])
 
+        or_out = self.or_gate.call(A, B)
+        nand_out = self.nand_gate.call(A, B)
+        nor_out = self.nor_gate.call(A, B)
+        and_out = self.and_gate.call(A, B)
+
+        out = [
+            self.swc.call(or_out, op[0]),
+            self.swc.call(nand_out, op[1]),
+            self.swc.call(nor_out, op[2]),
+            self.swc.call(and_out, op[3])
+        ]
+        return self.or_gate_4way.call(out)
+
+    @check_inputs
     def run(self, inputs):
+        return {"C": self.call(inputs["A"], inputs["B"], inputs["op"])}
+
+    def build(self, nl, inputs):
         A = inputs["A"]
         B = inputs["B"]
-        op = self.decoder.run(
-            {"A": self.splitter.run({"A": inputs["op"]})["B"][:3]}
+        op = self.decoder.build(
+            nl, {"A": self.splitter.build(nl, {"A": inputs["op"]})["B"][:3]}
         )["B"]
 
-        or_out = self.or_gate.run({"A": A, "B": B})["C"]
-        nand_out = self.nand_gate.run({"A": A, "B": B})["C"]
-        nor_out = self.nor_gate.run({"A": A, "B": B})["C"]
-        and_out = self.and_gate.run({"A": A, "B": B})["C"]
+        or_out = self.or_gate.build(nl, {"A": A, "B": B})["C"]
+        nand_out = self.nand_gate.build(nl, {"A": A, "B": B})["C"]
+        nor_out = self.nor_gate.build(nl, {"A": A, "B": B})["C"]
+        and_out = self.and_gate.build(nl, {"A": A, "B": B})["C"]
 
         out = [
-            self.swc.run({"A": or_out, "S": op[0]})["B"],
-            self.swc.run({"A": nand_out, "S": op[1]})["B"],
-            self.swc.run({"A": nor_out, "S": op[2]})["B"],
-            self.swc.run({"A": and_out, "S": op[3]})["B"]
+            self.swc.build(nl, {"A": or_out, "S": op[0]})["B"],
+            self.swc.build(nl, {"A": nand_out, "S": op[1]})["B"],
+            self.swc.build(nl, {"A": nor_out, "S": op[2]})["B"],
+            self.swc.build(nl, {"A": and_out, "S": op[3]})["B"]
         ]
         return {"C":
-                self.or_gate_4way.run({"A": out})["B"]}
+                self.or_gate_4way.build(nl, {"A": out})["B"]}
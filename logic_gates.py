@@ -1,128 +1,194 @@
 from abc import abstractmethod, ABC
-from typing import Dict
-from utils import check_inputs
+from typing import Dict, List, Union
+from utils import check_inputs, shared
 
 
+# Ports are declared once per class: input_names and output_names.
+#
+# call() is the fast path: inputs are positional in input_names order and
+# the result is the bare output value, or a tuple in output_names order
+# when there are several. run() keeps the dict-in/dict-out convention as a
+# thin wrapper over call(). Components use __slots__; the base slots hold
+# optional per-instance state (memoization cache, compiled netlists).
 class Gate:
+    __slots__ = ("cache", "_netlists", "_inputs_checked")
+    input_names = ("A", "B")
+    output_names = ("C",)
+
     def __init__(self):
-        self.input_names = ("A", "B")
+        pass
 
     @abstractmethod
-    def run(self, inputs: Dict[str, int]) -> Dict[str, int]:
+    def call(self, *args):
         pass
 
+    @check_inputs
+    def run(self, inputs: Dict[str, int]) -> Dict[str, int]:
+        out = self.call(*[inputs[name] for name in self.input_names])
+        if len(self.output_names) == 1:
+            return {self.output_names[0]: out}
+        return dict(zip(self.output_names, out))
+
+    # Lower the gate into a netlist (see netlist.py). Same ports as run(),
+    # but values are net ids or lists of net ids.
+    def build(self, nl, inputs: Dict[str, Union[int, List[int]]]) -> Dict[str, Union[int, List[int]]]:
+        raise NotImplementedError(f"{type(self).__name__} has no netlist lowering")
+
+    # Evaluate many input vectors in one pass over the compiled netlist,
+    # packing one vector per bit lane (see netlist.run_batch).
+    def run_batch(self, samples: List[Dict[str, int]], num_bits=None) -> List[Dict[str, int]]:
+        from netlist import run_batch
+        return run_batch(self, samples, num_bits)
+
 
 # B = NOT(A)
 class NOTGate(Gate, ABC):
+    __slots__ = ()
+    input_names = ("A",)
+    output_names = ("B",)
+
     def __init__(self):
         super(NOTGate, self).__init__()
-        self.input_names = ("A",)
 
-    @check_inputs
-    def run(self, inputs: Dict[str, int]) -> Dict[str, int]:
-        return {"B": ~inputs["A"]}
+    def call(self, A):
+        return ~A
+
+    def build(self, nl, inputs):
+        return {"B": nl.not_(inputs["A"])}
 
 
 # C = NAND(A, B)
 class NANDGate(Gate, ABC):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__()
-        self.input_names = ("A", "B")
 
-    @check_inputs
-    def run(self, inputs: Dict[str, int]) -> Dict[str, int]:
-        return {"C": ~(inputs["A"] & inputs["B"])}
+    def call(self, A, B):
+        return ~(A & B)
+
+    def build(self, nl, inputs):
+        return {"C": nl.nand(inputs["A"], inputs["B"])}
 
 
 # C = A AND B
 class ANDGate(Gate, ABC):
+    __slots__ = ("nand_gate", "not_gate")
+
     def __init__(self):
         super().__init__()
-        self.input_names = ("A", "B")
-        self.nand_gate = NANDGate()
-        self.not_gate = NOTGate()
+        self.nand_gate = shared(NANDGate)
+        self.not_gate = shared(NOTGate)
 
-    @check_inputs
-    def run(self, inputs: Dict[str, int]) -> Dict[str, int]:
-        return {"C": self.not_gate.run({"A": self.nand_gate.run(inputs)["C"]})["B"]}
+    def call(self, A, B):
+        return self.not_gate.call(self.nand_gate.call(A, B))
+
+    def build(self, nl, inputs):
+        return {"C": self.not_gate.build(nl, {"A": self.nand_gate.build(nl, inputs)["C"]})["B"]}
 
 
 class ORGate(Gate, ABC):
+    __slots__ = ("nand_gate", "not_gate")
+
     def __init__(self):
         super(ORGate, self).__init__()
-        self.input_names = ("A", "B")
-        self.nand_gate = NANDGate()
-        self.not_gate = NOTGate()
-
-    @check_inputs
-    def run(self, inputs: Dict[str, int]) -> Dict[str, int]:
-        not_out_A = self.not_gate.run({"A": inputs["A"]})["B"]
-        not_out_B = self.not_gate.run({"A": inputs["B"]})["B"]
-        out = self.nand_gate.run({"A": not_out_A, "B": not_out_B})["C"]
+        self.nand_gate = shared(NANDGate)
+        self.not_gate = shared(NOTGate)
+
+    def call(self, A, B):
+        not_out_A = self.not_gate.call(A)
+        not_out_B = self.not_gate.call(B)
+        return self.nand_gate.call(not_out_A, not_out_B)
+
+    def build(self, nl, inputs):
+        not_out_A = self.not_gate.build(nl, {"A": inputs["A"]})["B"]
+        not_out_B = self.not_gate.build(nl, {"A": inputs["B"]})["B"]
+        out = self.nand_gate.build(nl, {"A": not_out_A, "B": not_out_B})["C"]
         return {"C": out}
 
 
 # A[in]: List[int]
 # B[out]
 class ORGate_4way(Gate, ABC):
+    __slots__ = ("or_gate_0", "or_gate_1", "or_gate_2")
+    input_names = ("A",)
+    output_names = ("B",)
+
     def __init__(self):
         super(ORGate_4way, self).__init__()
-        self.input_names = ("A",)
-        self.or_gate_0 = ORGate()
-        self.or_gate_1 = ORGate()
-        self.or_gate_2 = ORGate()
+        self.or_gate_0 = shared(ORGate)
+        self.or_gate_1 = shared(ORGate)
+        self.or_gate_2 = shared(ORGate)
 
-    @check_inputs
-    def run(self, inputs: Dict[str, int]) -> Dict[str, int]:
+    def call(self, A):
+        or_out_0 = self.or_gate_0.call(A[0], A[1])
+        or_out_1 = self.or_gate_1.call(A[2], A[3])
+        return self.or_gate_2.call(or_out_0, or_out_1)
+
+    def build(self, nl, inputs):
         A = inputs["A"]
-        or_out_0 = self.or_gate_0.run({"A": A[0], "B": A[1]})["C"]
-        or_out_1 = self.or_gate_1.run({"A": A[2], "B": A[3]})["C"]
-        or_out_2 = self.or_gate_2.run({"A": or_out_0, "B": or_out_1})["C"]
+        or_out_0 = self.or_gate_0.build(nl, {"A": A[0], "B": A[1]})["C"]
+        or_out_1 = self.or_gate_1.build(nl, {"A": A[2], "B": A[3]})["C"]
+        or_out_2 = self.or_gate_2.build(nl, {"A": or_out_0, "B": or_out_1})["C"]
         return {"B": or_out_2}
 
 
 class NORGate(Gate, ABC):
+    __slots__ = ("or_gate", "not_gate")
+
     def __init__(self):
         super(NORGate, self).__init__()
-        self.or_gate = ORGate()
-        self.not_gate = NOTGate()
+        self.or_gate = shared(ORGate)
+        self.not_gate = shared(NOTGate)
 
-    @check_inputs
-    def run(self, inputs: Dict[str, int]) -> Dict[str, int]:
-        or_out = self.or_gate.run(inputs)["C"]
-        not_out = self.not_gate.run({"A": or_out})["B"]
+    def call(self, A, B):
+        return self.not_gate.call(self.or_gate.call(A, B))
+
+    def build(self, nl, inputs):
+        or_out = self.or_gate.build(nl, inputs)["C"]
+        not_out = self.not_gate.build(nl, {"A": or_out})["B"]
         return {"C": not_out}
 
 
 class XORGate(Gate, ABC):
+    __slots__ = ("not_gate", "and_gate", "or_gate")
+
     def __init__(self):
         super(XORGate, self).__init__()
-        self.not_gate = NOTGate()
-        self.and_gate = ANDGate()
-        self.or_gate = ORGate()
-
-    @check_inputs
-    def run(self, inputs: Dict[str, int]) -> Dict[str, int]:
+        self.not_gate = shared(NOTGate)
+        self.and_gate = shared(ANDGate)
+        self.or_gate = shared(ORGate)
+
+    def call(self, A, B):
+        not_A = self.not_gate.call(A)
+        not_B = self.not_gate.call(B)
+        and_0 = self.and_gate.call(not_A, B)
+        and_1 = self.and_gate.call(not_B, A)
+        return self.or_gate.call(and_0, and_1)
+
+    def build(self, nl, inputs):
         A = inputs["A"]
         B = inputs["B"]
-        not_A = self.not_gate.run({"A": A})["B"]
-        not_B = self.not_gate.run({"A": B})["B"]
-        and_0 = self.and_gate.run({"A": not_A, "B": B})["C"]
-        and_1 = self.and_gate.run({"A": not_B, "B": A})["C"]
-        out = self.or_gate.run({"A": and_0, "B": and_1})["C"]
+        not_A = self.not_gate.build(nl, {"A": A})["B"]
+        not_B = self.not_gate.build(nl, {"A": B})["B"]
+        and_0 = self.and_gate.build(nl, {"A": not_A, "B": B})["C"]
+        and_1 = self.and_gate.build(nl, {"A": not_B, "B": A})["C"]
+        out = self.or_gate.build(nl, {"A": and_0, "B": and_1})["C"]
         return {"C": out}
 
 
 class XNORGate(Gate, ABC):
+    __slots__ = ("xor_gate", "not_gate")
+
     def __init__(self):
         super(XNORGate, self).__init__()
-        self.xor_gate = XORGate()
-        self.not_gate = NOTGate()
+        self.xor_gate = shared(XORGate)
+        self.not_gate = shared(NOTGate)
 
-    @check_inputs
-    def run(self, inputs: Dict[str, int]) -> Dict[str, int]:
-        A = inputs["A"]
-        B = inputs["B"]
-        xor_out = self.xor_gate.run({"A": A, "B": B})["C"]
-        out = self.not_gate.run({"A": xor_out})["B"]
-        return {"C": out}
\ No newline at end of file
+    def call(self, A, B):
+        return self.not_gate.call(self.xor_gate.call(A, B))
+
+    def build(self, nl, inputs):
+        xor_out = self.xor_gate.build(nl, {"A": inputs["A"], "B": inputs["B"]})["C"]
+        out = self.not_gate.build(nl, {"A": xor_out})["B"]
+        return {"C": out}
@@ -0,0 +1,197 @@
+import json
+import mmap
+import os
+from array import array
+from typing import Dict, List, Sequence
+
+from arith_engine import ArithEngine
+from logic_engine import LogicEngine
+from logic_gates import Gate
+from netlist import compile_component, port_spec
+from codegen import structure_hash
+from optimize import optimize
+
+
+# Precomputed lookup tables for small components.
+#
+#   table = lookup_table(ArithEngine(8), path="alu8.lut")
+#   table.call(A, B, op)                # one indexed read
+#   table.run({"A": A, "B": B, "op": op})
+#
+# The table is built once by evaluating every input combination through
+# the component's compiled (gate-level) netlist, in bit-sliced batches.
+# Inputs are num_bits wide (C and S are 1 bit, an engine's op is 3) and
+# their low bits are packed into the index, first input lowest. signed
+# selects the domain of the data inputs: [0, 2^n) or [-2^(n-1), 2^(n-1));
+# op, C and S are always unsigned. Outputs are stored exactly, in the
+# smallest array type that holds them.
+#
+# Neither domain covers the full num_bits + 1 bit range of an engine's
+# ports: an 8-bit engine table takes -128..127 or 0..255, not the -127..128
+# the engine tests draw from, and is no drop-in for the engine there.
+# Covering both views would take 9-bit A and B, 21 input bits, over
+# MAX_INPUT_BITS. Values outside the domain are rejected, never wrapped.
+#
+# File layout: a JSON header line, padded to 8 bytes, then one array per
+# output. Files are memory-mapped on load, so opening a table costs no
+# rebuild and no copy. The header records the structure hash of the netlist
+# the table came from; lookup_table() rebuilds when it no longer matches.
+MAX_INPUT_BITS = 20
+MAGIC = "ic_design-lut"
+TYPECODES = "bBhHiIq"
+UNSIGNED = ("op", "C", "S")
+
+
+def _widths(component, num_bits):
+    if isinstance(component, (ArithEngine, LogicEngine)):
+        num_bits = num_bits or getattr(component, "num_bits", 8)
+        return {"A": num_bits, "B": num_bits, "op": 3}
+    widths, _ = port_spec(component, num_bits)
+    return {name: width for name, (width, _) in widths.items()}
+
+
+# Gate ports are signed and num_bits wide; an unsigned domain needs one
+# more bit. Engines already take one extra bit, arithmetic blocks are
+# unsigned and mask their inputs.
+def _netlist(component, num_bits, signed):
+    if isinstance(component, Gate) and not signed:
+        num_bits = (num_bits or 8) + 1
+    return optimize(compile_component(component, num_bits))
+
+
+def _typecode(values):
+    low, high = min(values, default=0), max(values, default=0)
+    for code in TYPECODES:
+        bits = array(code).itemsize * 8
+        if code.islower() and -(1 << (bits - 1)) <= low and high < (1 << (bits - 1)):
+            return code
+        if code.isupper() and low >= 0 and high < (1 << bits):
+            return code
+    raise OverflowError(f"outputs in [{low}, {high}] do not fit in 64 bits")
+
+
+class LookupTable:
+    def __init__(self, widths: Dict[str, int], signed, outputs: Dict[str, Sequence[int]], structure=None):
+        self.input_names = tuple(widths)
+        self.widths = widths
+        self.signed = signed
+        self.output_names = tuple(outputs)
+        self.tables = outputs
+        self.structure = structure
+        self._fields = []
+        self._domains = {}
+        offset = 0
+        for name in self.input_names:
+            n = widths[name]
+            self._fields.append((offset, (1 << n) - 1))
+            if signed and name not in UNSIGNED:
+                self._domains[name] = (-(1 << (n - 1)), 1 << (n - 1))
+            else:
+                self._domains[name] = (0, 1 << n)
+            offset += n
+        self.size = 1 << offset
+        self._mmap = None
+
+    def _check(self, name, x):
+        low, high = self._domains[name]
+        assert low <= x < high, f"{name}={x} is outside the table domain [{low}, {high})"
+
+    def index(self, *args) -> int:
+        idx = 0
+        for x, (offset, mask) in zip(args, self._fields):
+            idx |= (x & mask) << offset
+        return idx
+
+    def call(self, *args):
+        for name, x in zip(self.input_names, args):
+            self._check(name, x)
+        idx = self.index(*args)
+        if len(self.output_names) == 1:
+            return self.tables[self.output_names[0]][idx]
+        return tuple(self.tables[name][idx] for name in self.output_names)
+
+    def run(self, inputs: Dict[str, int]) -> Dict[str, int]:
+        for name in self.input_names:
+            assert name in inputs, f"table is missing input {name!r}, got {sorted(inputs)}"
+        for name in self.input_names:
+            self._check(name, inputs[name])
+        idx = self.index(*[inputs[name] for name in self.input_names])
+        return {name: self.tables[name][idx] for name in self.output_names}
+
+    @classmethod
+    def build(cls, component, num_bits=None, signed=False, lanes=4096) -> "LookupTable":
+        widths = _widths(component, num_bits)
+        total = sum(widths.values())
+        assert total <= MAX_INPUT_BITS, f"{total} input bits is too many for a table (max {MAX_INPUT_BITS})"
+        nl = _netlist(component, num_bits, signed)
+        table = cls(widths, signed, {}, structure_hash(nl))
+        values: Dict[str, List[int]] = {name: [] for name in nl.outputs}
+        for start in range(0, table.size, lanes):
+            columns = {}
+            for name, (offset, mask) in zip(table.input_names, table._fields):
+                column = [(idx >> offset) & mask for idx in range(start, min(start + lanes, table.size))]
+                if table._domains[name][0] < 0:
+                    top = (mask + 1) >> 1
+                    column = [x - (top << 1) if x & top else x for x in column]
+                columns[name] = column
+            for name, xs in nl.run_columns(columns, lanes).items():
+                values[name] += xs
+        table.output_names = tuple(values)
+        table.tables = {name: array(_typecode(xs), xs) for name, xs in values.items()}
+        return table
+
+    def save(self, path):
+        outputs = {}
+        offset = 0
+        for name in self.output_names:
+            data = self.tables[name]
+            outputs[name] = {"typecode": data.typecode, "offset": offset}
+            offset += -(-len(data) * data.itemsize // 8) * 8
+        header = json.dumps({
+            "magic": MAGIC,
+            "widths": self.widths,
+            "signed": self.signed,
+            "outputs": outputs,
+            "structure": self.structure,
+        }).encode()
+        header += b" " * (-(len(header) + 1) % 8) + b"\n"
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(header)
+            for name in self.output_names:
+                data = self.tables[name].tobytes()
+                f.write(data + b"\0" * (-len(data) % 8))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path) -> "LookupTable":
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            assert header.get("magic") == MAGIC, f"{path} is not a lookup table"
+            start = f.tell()
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        widths = header["widths"]
+        size = 1 << sum(widths.values())
+        view = memoryview(buf)
+        outputs = {}
+        for name, spec in header["outputs"].items():
+            offset = start + spec["offset"]
+            itemsize = array(spec["typecode"]).itemsize
+            outputs[name] = view[offset:offset + size * itemsize].cast(spec["typecode"])
+        table = cls(widths, header["signed"], outputs, header["structure"])
+        table._mmap = buf
+        return table
+
+
+# Load the table at path if it was built from the component's current
+# structure, otherwise build it and save it there.
+def lookup_table(component, num_bits=None, signed=False, path=None) -> LookupTable:
+    if path is not None and os.path.exists(path):
+        table = LookupTable.load(path)
+        nl = _netlist(component, num_bits, signed)
+        if table.structure == structure_hash(nl) and table.signed == signed:
+            return table
+    table = LookupTable.build(component, num_bits, signed)
+    if path is not None:
+        table.save(path)
+    return table
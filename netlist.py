@@ -0,0 +1,272 @@
+from typing import Dict, List, Tuple
+
+from logic_gates import *
+from arithmetic import *
+from arith_engine import ArithEngine
+from logic_engine import LogicEngine
+
+
+# A Netlist is a flat, levelized list of NAND/NOT primitives over integer
+# net slots. Components lower themselves into it through build(), which
+# mirrors run() but passes net ids (or lists of net ids for buses) instead
+# of values.
+#
+# Every primitive is stored as (kind, out, a, b) and evaluated as
+# v[out] = ~(v[a] & v[b]); a NOT is a NAND with both inputs tied, so the
+# evaluator is a single tight loop with no per-gate dispatch.
+#
+# Net 0 is constant 0 and net 1 is constant 1 (stored as -1, i.e. all ones,
+# so constants stay correct when slots carry packed words).
+#
+# The netlist pays off in batches only. run() on one vector walks every
+# gate, so for ArithEngine(32) it takes ~2 ms against ~0.2-0.4 ms for the
+# component's own call(). run_columns() packs up to 4096 vectors into each
+# slot and evaluates them in one pass, ~20 us per vector.
+class Netlist:
+    CONST_0 = 0
+    CONST_1 = 1
+
+    NAND = "NAND"
+    NOT = "NOT"
+
+    def __init__(self):
+        self.num_nets = 2
+        self.level = [0, 0]
+        self.gates: List[Tuple[str, int, int, int]] = []
+        self.inputs: Dict[str, Tuple[List[int], bool]] = {}
+        self.outputs: Dict[str, Tuple[List[int], bool]] = {}
+        self.program: List[Tuple[int, int, int]] = []
+
+    def new_net(self, level=0):
+        net = self.num_nets
+        self.num_nets += 1
+        self.level.append(level)
+        return net
+
+    def _gate(self, kind, a, b):
+        out = self.new_net(max(self.level[a], self.level[b]) + 1)
+        self.gates.append((kind, out, a, b))
+        return out
+
+    @staticmethod
+    def _broadcast(a, b):
+        if not isinstance(a, list):
+            a = [a] * len(b)
+        if not isinstance(b, list):
+            b = [b] * len(a)
+        assert len(a) == len(b), f"bus width mismatch: {len(a)} != {len(b)}"
+        return a, b
+
+    def nand(self, a, b):
+        if isinstance(a, list) or isinstance(b, list):
+            a, b = self._broadcast(a, b)
+            return [self._gate(self.NAND, x, y) for x, y in zip(a, b)]
+        return self._gate(self.NAND, a, b)
+
+    def not_(self, a):
+        if isinstance(a, list):
+            return [self._gate(self.NOT, x, x) for x in a]
+        return self._gate(self.NOT, a, a)
+
+    def and_(self, a, b):
+        return self.not_(self.nand(a, b))
+
+    def extend(self, bus, width):
+        assert len(bus) <= width
+        return bus + [self.CONST_0] * (width - len(bus))
+
+    def add_input(self, name, width, signed=False):
+        bus = [self.new_net() for _ in range(width)]
+        self.inputs[name] = (bus, signed)
+        return bus
+
+    def add_output(self, name, bus, signed=False):
+        if not isinstance(bus, list):
+            bus = [bus]
+        self.outputs[name] = (bus, signed)
+
+    # Drop gates that no output depends on (e.g. bits that a Splitter masks
+    # off), then sort by logic level. Construction order is already
+    # topological; levelizing groups independent gates and gives the depth.
+    def finalize(self):
+        live = set()
+        for bus, _ in self.outputs.values():
+            live.update(bus)
+        kept = []
+        for g in reversed(self.gates):
+            if g[1] in live:
+                live.add(g[2])
+                live.add(g[3])
+                kept.append(g)
+        self.gates = kept[::-1]
+        self.gates.sort(key=lambda g: self.level[g[1]])
+        self.program = [(out, a, b) for _, out, a, b in self.gates]
+        return self
+
+    @property
+    def gate_count(self):
+        return len(self.gates)
+
+    @property
+    def depth(self):
+        return max((self.level[out] for _, out, _, _ in self.gates), default=0)
+
+    def count(self, kind):
+        return sum(1 for g in self.gates if g[0] == kind)
+
+    def levels(self) -> List[List[Tuple[str, int, int, int]]]:
+        out = [[] for _ in range(self.depth)]
+        for g in self.gates:
+            out[self.level[g[1]] - 1].append(g)
+        return out
+
+    def _slots(self):
+        v = [0] * self.num_nets
+        v[self.CONST_1] = -1
+        return v
+
+    # Inputs are checked here, once per call; the gates inside a netlist
+    # never re-validate, whatever utils.set_validation says.
+    def _load(self, v, inputs):
+        for name, (bus, signed) in self.inputs.items():
+            assert name in inputs, f"netlist is missing input {name!r}, got {sorted(inputs)}"
+            x = inputs[name]
+            if signed:
+                lim = 1 << (len(bus) - 1)
+                assert -lim <= x < lim, f"{name}={x} does not fit in {len(bus)} signed bits"
+            for i, net in enumerate(bus):
+                v[net] = (x >> i) & 1
+
+    def _unload(self, v):
+        outs = {}
+        for name, (bus, signed) in self.outputs.items():
+            x = 0
+            for i, net in enumerate(bus):
+                x |= (v[net] & 1) << i
+            if signed and x >> (len(bus) - 1):
+                x -= 1 << len(bus)
+            outs[name] = x
+        return outs
+
+    def evaluate(self, v):
+        for out, a, b in self.program:
+            v[out] = ~(v[a] & v[b])
+        return v
+
+    def run(self, inputs: Dict[str, int]) -> Dict[str, int]:
+        v = self._slots()
+        self._load(v, inputs)
+        return self._unload(self.evaluate(v))
+
+    # Bit-sliced load: bit k of the word on each input net is that net's
+    # bit for vector k, so one pass over the program evaluates every lane.
+    # Planes are transposed through bit strings to keep it O(lanes).
+    def _load_lanes(self, v, columns):
+        for name, (bus, signed) in self.inputs.items():
+            xs = columns[name][::-1]
+            if signed:
+                lim = 1 << (len(bus) - 1)
+                for x in xs:
+                    assert -lim <= x < lim, f"{name}={x} does not fit in {len(bus)} signed bits"
+            for i, net in enumerate(bus):
+                v[net] = int("".join("1" if (x >> i) & 1 else "0" for x in xs), 2)
+
+    def _unload_lanes(self, v, lanes):
+        outs = {}
+        mask = (1 << lanes) - 1
+        for name, (bus, signed) in self.outputs.items():
+            planes = [format(v[net] & mask, "0%db" % lanes)[::-1] for net in reversed(bus)]
+            top = 1 << (len(bus) - 1)
+            xs = []
+            for k in range(lanes):
+                x = int("".join(plane[k] for plane in planes), 2)
+                if signed and x & top:
+                    x -= top << 1
+                xs.append(x)
+            outs[name] = xs
+        return outs
+
+    # Columnar batch: {name: sequence of values} in, {name: list} out.
+    def run_columns(self, columns: Dict[str, List[int]], lanes=4096) -> Dict[str, List[int]]:
+        n = len(next(iter(columns.values())))
+        outs = {name: [] for name in self.outputs}
+        for start in range(0, n, lanes):
+            chunk = {name: columns[name][start:start + lanes] for name in self.inputs}
+            v = self._slots()
+            self._load_lanes(v, chunk)
+            for name, xs in self._unload_lanes(self.evaluate(v), min(lanes, n - start)).items():
+                outs[name] += xs
+        return outs
+
+    def run_batch(self, samples: List[Dict[str, int]], lanes=4096) -> List[Dict[str, int]]:
+        if not samples:
+            return []
+        columns = {name: [sample[name] for sample in samples] for name in self.inputs}
+        outs = self.run_columns(columns, lanes)
+        return [dict(zip(outs, values)) for values in zip(*outs.values())]
+
+
+# Port widths and signedness of a top-level component.
+#
+# Gates are bitwise on unbounded ints, so their ports are num_bits wide and
+# signed (results like ~A are negative). The engines mix bitwise and
+# arithmetic ops, so A and B get one extra bit: any value in
+# [-2^num_bits, 2^num_bits) is represented exactly, which covers both the
+# signed and the unsigned view of a num_bits operand. Arithmetic blocks
+# mask their inputs through a Splitter, so their ports are unsigned. SWC
+# and the shifts pass any width through and have no num_bits of their own,
+# so they must be compiled with an explicit one.
+WIDTHLESS = (SWC, ShiftLeft, ShiftRight)
+
+
+def port_spec(component, num_bits=None):
+    if isinstance(component, (ORGate_4way, Hub, Decoder_multi_bits)):
+        raise NotImplementedError(f"{type(component).__name__} takes a list input and cannot be compiled standalone")
+    if isinstance(component, (ArithEngine, LogicEngine)):
+        num_bits = num_bits or getattr(component, "num_bits", 8)
+        return {"A": (num_bits + 1, True), "B": (num_bits + 1, True), "op": (3, False)}, True
+    if isinstance(component, Gate):
+        num_bits = num_bits or 8
+        return {name: (num_bits, True) for name in component.input_names}, True
+    if isinstance(component, Arithmetic):
+        if isinstance(component, WIDTHLESS) and num_bits is None:
+            raise ValueError(f"{type(component).__name__} has no width of its own, pass num_bits")
+        num_bits = num_bits or getattr(component, "num_bits", 1)
+        widths = {}
+        for name in component.input_names:
+            widths[name] = (1, False) if name in ("C", "S") else (num_bits, False)
+        return widths, False
+    raise NotImplementedError(f"{type(component).__name__} has no port spec")
+
+
+def compile_component(component, num_bits=None) -> Netlist:
+    widths, signed = port_spec(component, num_bits)
+    nl = Netlist()
+    inputs = {name: nl.add_input(name, width, sig) for name, (width, sig) in widths.items()}
+    outputs = component.build(nl, inputs)
+    for name, bus in outputs.items():
+        nl.add_output(name, bus, signed)
+    return nl.finalize()
+
+
+# Area and depth of a component, counted on its compiled netlist.
+def report(component, num_bits=None) -> Dict[str, int]:
+    nl = compile_component(component, num_bits)
+    return {
+        "gates": nl.gate_count,
+        "nand": nl.count(Netlist.NAND),
+        "not": nl.count(Netlist.NOT),
+        "depth": nl.depth,
+    }
+
+
+# Compile and optimize once per width and keep the netlist on the
+# component, so repeated batches only pay for evaluating the reduced graph.
+def run_batch(component, samples, num_bits=None, lanes=4096):
+    from optimize import optimize
+    if getattr(component, "_netlists", None) is None:
+        component._netlists = {}
+    netlists = component._netlists
+    if num_bits not in netlists:
+        netlists[num_bits] = optimize(compile_component(component, num_bits))
+    return netlists[num_bits].run_batch(samples, lanes)
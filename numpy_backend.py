@@ -0,0 +1,111 @@
+from typing import Dict
+
+import numpy as np
+
+from netlist import Netlist, compile_component
+
+
+# Evaluate a compiled netlist over NumPy arrays of operands.
+#
+# Every input bit becomes a bit plane packed 64 vectors per uint64 word, and
+# the netlist program runs once per chunk with whole arrays in the slots, so
+# the cost per primitive is one vectorized NAND over len(A) / 64 words.
+# Outputs are decoded back to int64 with the same width and sign rules as
+# Netlist.run, so results match the scalar path element for element.
+#
+# Ports wider than INT64_BITS (e.g. the 65-bit ports of ArithEngine(64))
+# do not fit in int64. Their inputs may be int64 arrays (sign-extended
+# into the upper bits) or object arrays / lists of Python ints, and their
+# outputs are object arrays of Python ints, decoded in 63-bit chunks so the
+# bit unpacking stays vectorized.
+ONES = np.uint64(0xFFFFFFFFFFFFFFFF)
+INT64_BITS = 63
+
+
+def _pack(x, bit):
+    if x.dtype != object:
+        bit = min(bit, INT64_BITS)
+    bits = ((x >> bit) & 1).astype(np.uint8)
+    packed = np.packbits(bits, bitorder="little")
+    pad = (-len(packed)) % 8
+    return np.concatenate([packed, np.zeros(pad, dtype=np.uint8)]).view(np.uint64)
+
+
+def _unpack(word, n):
+    if np.ndim(word) == 0:
+        return np.full(n, int(word) & 1, dtype=np.int64)
+    return np.unpackbits(word.view(np.uint8), bitorder="little")[:n].astype(np.int64)
+
+
+# int64 where the port fits, otherwise int64 if the values do, else object.
+def _column(x, width):
+    if width <= INT64_BITS:
+        return np.asarray(x, dtype=np.int64)
+    if isinstance(x, np.ndarray) and x.dtype in (np.uint64, object):
+        return x.astype(object)
+    try:
+        return np.asarray(x, dtype=np.int64)
+    except OverflowError:
+        return np.asarray(list(x), dtype=object)
+
+
+def _decode(v, bus, n):
+    chunks = []
+    for low in range(0, len(bus), INT64_BITS):
+        x = np.zeros(n, dtype=np.int64)
+        for i, net in enumerate(bus[low:low + INT64_BITS]):
+            x |= _unpack(v[net], n) << i
+        chunks.append(x)
+    if len(chunks) == 1:
+        return chunks[0]
+    x = np.zeros(n, dtype=object)
+    for k, chunk in enumerate(chunks):
+        x |= chunk.astype(object) << (k * INT64_BITS)
+    return x
+
+
+def run_arrays(nl: Netlist, inputs: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    n = len(next(iter(inputs.values())))
+    v = [np.uint64(0)] * nl.num_nets
+    v[nl.CONST_1] = ONES
+    for name, (bus, signed) in nl.inputs.items():
+        x = _column(inputs[name], len(bus))
+        if len(x) != n:
+            raise ValueError(f"{name} has {len(x)} elements, expected {n}")
+        if signed:
+            lim = 1 << (len(bus) - 1)
+            if not ((x >= -lim) & (x < lim)).all():
+                raise ValueError(f"{name} does not fit in {len(bus)} signed bits")
+        for i, net in enumerate(bus):
+            v[net] = _pack(x, i)
+    nl.evaluate(v)
+    outs = {}
+    for name, (bus, signed) in nl.outputs.items():
+        x = _decode(v, bus, n)
+        if signed:
+            top = 1 << (len(bus) - 1)
+            x = np.where(x & top, x - (top << 1), x)
+        outs[name] = x
+    return outs
+
+
+# A: np.ndarray[int]
+# B: np.ndarray[int]
+# op: np.ndarray[int]
+# C[out]: np.ndarray[int64], or object for ports over INT64_BITS wide
+class ArrayEngine:
+    def __init__(self, engine, num_bits=None, chunk=1 << 14):
+        self.netlist = compile_component(engine, num_bits)
+        self.chunk = chunk
+
+    def run(self, inputs: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        inputs = {name: _column(x, len(self.netlist.inputs[name][0])) if name in self.netlist.inputs else x
+                  for name, x in inputs.items()}
+        n = len(next(iter(inputs.values())))
+        outs = {name: np.zeros(n, dtype=np.int64 if len(bus) <= INT64_BITS else object)
+                for name, (bus, _) in self.netlist.outputs.items()}
+        for start in range(0, n, self.chunk):
+            part = run_arrays(self.netlist, {name: x[start:start + self.chunk] for name, x in inputs.items()})
+            for name, x in part.items():
+                outs[name][start:start + self.chunk] = x
+        return outs
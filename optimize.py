@@ -0,0 +1,86 @@
+from typing import Dict, Tuple
+
+from netlist import Netlist, compile_component
+
+
+# Structural optimizer for compiled netlists.
+#
+#   nl = optimize(compile_component(ArithEngine(8)), constants={"op": 4})
+#
+# One forward pass over the levelized program rebuilds the netlist with:
+#
+#   constant propagation  NAND(0, x) = 1, NAND(1, x) = NOT x, NOT 0 = 1 ...
+#                         constants={port: value} ties an input port to a
+#                         fixed value first (e.g. a fixed op, which folds
+#                         the decoder and the unselected SWC datapaths away)
+#   double-NOT removal    NOT(NOT x) = x, which collapses the NOT(NAND) of
+#                         an AND feeding the NOT inputs of an OR
+#   complements          NAND(x, NOT x) = 1
+#   CSE                   NAND is commutative, so (min, max) of its inputs
+#                         is the key; equal keys share one gate
+#
+# and finalize() removes the gates no output depends on. Operands are
+# already canonical when a gate is visited, so a single pass reaches the
+# fixpoint. The result is an ordinary Netlist: run(), run_batch(),
+# EventSimulator and codegen all simulate the reduced graph. A fixed port
+# is dropped from the inputs, so run() ignores it.
+def optimize(nl: Netlist, constants: Dict[str, int] = None) -> Netlist:
+    constants = constants or {}
+    out = Netlist()
+    rep = {Netlist.CONST_0: Netlist.CONST_0, Netlist.CONST_1: Netlist.CONST_1}
+    for name, (bus, signed) in nl.inputs.items():
+        if name in constants:
+            x = constants[name]
+            if signed:
+                lim = 1 << (len(bus) - 1)
+                assert -lim <= x < lim, f"{name}={x} does not fit in {len(bus)} signed bits"
+            for i, net in enumerate(bus):
+                rep[net] = Netlist.CONST_1 if (x >> i) & 1 else Netlist.CONST_0
+        else:
+            rep.update(zip(bus, out.add_input(name, len(bus), signed)))
+
+    inverse = {}   # NOT output -> its input, in the new netlist
+    shared = {}    # (a, b) -> NAND output, NOT is (x, x)
+
+    def nand(a, b):
+        if a == Netlist.CONST_0 or b == Netlist.CONST_0:
+            return Netlist.CONST_1
+        if a == Netlist.CONST_1:
+            a = b
+        elif b == Netlist.CONST_1:
+            b = a
+        if a == b:
+            if a == Netlist.CONST_1:
+                return Netlist.CONST_0
+            if a in inverse:
+                return inverse[a]
+        elif inverse.get(a) == b or inverse.get(b) == a:
+            return Netlist.CONST_1
+        key = (min(a, b), max(a, b))
+        if key not in shared:
+            if a == b:
+                shared[key] = out.not_(a)
+                inverse[shared[key]] = a
+            else:
+                shared[key] = out.nand(a, b)
+        return shared[key]
+
+    for _, net, a, b in nl.gates:
+        rep[net] = nand(rep[a], rep[b])
+    for name, (bus, signed) in nl.outputs.items():
+        out.add_output(name, [rep[net] for net in bus], signed)
+    return out.finalize()
+
+
+def optimize_component(component, num_bits=None, constants: Dict[str, int] = None) -> Netlist:
+    return optimize(compile_component(component, num_bits), constants)
+
+
+# Gate counts and depth before and after, as (before, after) pairs.
+def summary(before: Netlist, after: Netlist) -> Dict[str, Tuple[int, int]]:
+    return {
+        "gates": (before.gate_count, after.gate_count),
+        "nand": (before.count(Netlist.NAND), after.count(Netlist.NAND)),
+        "not": (before.count(Netlist.NOT), after.count(Netlist.NOT)),
+        "depth": (before.depth, after.depth),
+    }
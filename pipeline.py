@@ -0,0 +1,214 @@
+from typing import Dict, List, Optional, Sequence, Union
+
+from arith_engine import ArithEngine
+from netlist import Netlist, compile_component, port_spec
+
+
+# Pipelined, clocked simulation of ArithEngine / LogicEngine.
+#
+#   pipe = Pipeline(ArithEngine(32))                         # 3 stages
+#   pipe = Pipeline(ArithEngine(32), [("decode", "compute"), ("mux",)])
+#   pipe = Pipeline(ArithEngine(32), 8)                      # 8 balanced
+#   results = pipe.run(ops)        # one new operation per cycle
+#   pipe.stats()                   # throughput, latency, per-stage depth
+#
+# The engine datapath is cut into three steps, each written once against
+# the engine's own sub-gates: with nl=None it evaluates through call(),
+# otherwise it lowers through build() into nl (like GateNetwork).
+#
+#   decode    op -> Splitter_8bit -> Decoder_3bit select lines
+#   compute   every datapath: the gates, and for ArithEngine the adder,
+#             Sub and Mul
+#   mux       SWC per datapath and the ORGate_4way output mux
+#
+# stages groups consecutive steps; a pipeline register sits after every
+# stage. clock() moves every register one stage forward and latches a new
+# operation (or a bubble) at the input, so results retire len(stages)
+# cycles after they are issued. Each stage is also compiled on its own
+# netlist, with the incoming register as its inputs, to give its gate
+# depth: the slowest stage sets the clock period.
+#
+# The steps are far from even (at 32 bits compute is ~430 levels deep,
+# decode and mux ~10), so stages may instead be a stage count. The engine
+# is then compiled once and cut by logic level: stage k holds the gates of
+# levels (D*k/n, D*(k+1)/n] of the depth-D netlist, so stage depths differ
+# by at most one, and the register after a stage holds every net computed
+# at or before the cut that a later level (or an output) still reads.
+STEPS = ("decode", "compute", "mux")
+GATES = ("or", "nand", "nor", "and")
+ARITH = ("add", "sub", "mul")
+
+
+def _eval(nl, component, out, **inputs):
+    if nl is not None:
+        return component.build(nl, inputs)[out]
+    result = component.call(*[inputs[name] for name in component.input_names])
+    if len(component.output_names) == 1:
+        return result
+    return result[component.output_names.index(out)]
+
+
+def _datapaths(engine):
+    return GATES + ARITH if isinstance(engine, ArithEngine) else GATES
+
+
+def _decode(engine, nl, x):
+    bits = _eval(nl, engine.splitter, "B", A=x["op"])[:3]
+    return {"A": x["A"], "B": x["B"], "sel": _eval(nl, engine.decoder, "B", A=bits)}
+
+
+def _compute(engine, nl, x):
+    A = x["A"]
+    B = x["B"]
+    out = {"sel": x["sel"]}
+    for name in GATES:
+        out[name] = _eval(nl, getattr(engine, name + "_gate"), "C", A=A, B=B)
+    if isinstance(engine, ArithEngine):
+        zero = 0 if nl is None else nl.CONST_0
+        out["add"] = _eval(nl, engine.adder, "sum", A=A, B=B, C=zero)
+        out["sub"] = _eval(nl, engine.suber, "sum", A=A, B=B)
+        out["mul"] = _eval(nl, engine.mul, "C", A=A, B=B)
+        if nl is not None:
+            for name in ARITH:
+                out[name] = nl.extend(out[name], len(A))
+    return out
+
+
+def _mux(engine, nl, x):
+    sel = x["sel"]
+    outs = [_eval(nl, engine.swc, "B", A=x[name], S=sel[i]) for i, name in enumerate(_datapaths(engine))]
+    out = _eval(nl, engine.or_gate_4way, "B", A=outs[:4])
+    if len(outs) > 4:
+        out = _eval(nl, engine.or_gate_4way, "B", A=[out] + outs[4:])
+    return {"C": out}
+
+
+_STEP_FUNCS = {"decode": _decode, "compute": _compute, "mux": _mux}
+
+
+class Pipeline:
+    def __init__(self, engine, stages: Union[int, Sequence[Sequence[str]]] = (("decode",), ("compute",), ("mux",))):
+        self.engine = engine
+        self.netlist = None
+        if isinstance(stages, int):
+            self._cut(stages)
+            stages = [("levels", low, high) for low, high in self._bounds]
+        else:
+            stages = [tuple(stage) for stage in stages]
+            assert [step for stage in stages for step in stage] == list(STEPS), \
+                f"stages must split {STEPS} in order, got {stages}"
+        self.stages = stages
+        self.registers: List[Optional[Dict]] = [None] * len(stages)
+        self.cycles = 0
+        self.issued = 0
+        self.retired = 0
+        self.total_latency = 0
+        self._depths = None
+
+    # Cut the compiled engine into n stages of (nearly) equal logic depth.
+    # live[k] lists the nets held in the register in front of stage k.
+    def _cut(self, n):
+        nl = self.netlist = compile_component(self.engine)
+        depth = nl.depth
+        assert 1 <= n <= depth, f"stages={n} must be between 1 and the netlist depth {depth}"
+        self._bounds = [(depth * k // n, depth * (k + 1) // n) for k in range(n)]
+        last_use = {}
+        for out, a, b in nl.program:
+            for net in (a, b):
+                last_use[net] = max(last_use.get(net, 0), nl.level[out])
+        for bus, _ in nl.outputs.values():
+            for net in bus:
+                last_use[net] = depth + 1
+        self._programs = [[g for g in nl.program if low < nl.level[g[0]] <= high] for low, high in self._bounds]
+        self._live = [[net for net, use in sorted(last_use.items())
+                       if net > Netlist.CONST_1 and nl.level[net] <= low < use] for low, _ in self._bounds]
+
+    def _level_stage(self, index, x):
+        nl = self.netlist
+        v = nl._slots()
+        if index == 0:
+            nl._load(v, x)
+        else:
+            for net, value in x.items():
+                v[net] = value
+        for out, a, b in self._programs[index]:
+            v[out] = ~(v[a] & v[b])
+        if index == len(self.stages) - 1:
+            return nl._unload(v)
+        return {net: v[net] for net in self._live[index + 1]}
+
+    def _stage(self, index, nl, x):
+        if self.netlist is not None:
+            return self._level_stage(index, x)
+        for step in self.stages[index]:
+            x = _STEP_FUNCS[step](self.engine, nl, x)
+        return x
+
+    # One clock edge. registers[k] holds the input of stage k; every stage
+    # evaluates and latches into the next register, the last stage
+    # retires. inputs=None issues a bubble. Returns the retired result as
+    # {"C": value} or None.
+    def clock(self, inputs: Optional[Dict[str, int]] = None) -> Optional[Dict[str, int]]:
+        self.cycles += 1
+        results = []
+        for k, reg in enumerate(self.registers):
+            if reg is None:
+                results.append(None)
+            else:
+                state, issued_at = reg
+                results.append((self._stage(k, None, state), issued_at))
+        retired = results[-1]
+        self.registers = [None] + results[:-1]
+        if inputs is not None:
+            self.registers[0] = ({"A": inputs["A"], "B": inputs["B"], "op": inputs["op"]}, self.cycles)
+            self.issued += 1
+        if retired is None:
+            return None
+        self.retired += 1
+        self.total_latency += self.cycles - retired[1]
+        return retired[0]
+
+    # Issue one operation per cycle, then drain; results in issue order.
+    def run(self, stream) -> List[Dict[str, int]]:
+        out = []
+        for inputs in stream:
+            result = self.clock(inputs)
+            if result is not None:
+                out.append(result)
+        while any(reg is not None for reg in self.registers):
+            result = self.clock()
+            if result is not None:
+                out.append(result)
+        return out
+
+    # Gate depth of every stage, each compiled from its input register.
+    def stage_depths(self) -> List[int]:
+        if self._depths is None and self.netlist is not None:
+            self._depths = [high - low for low, high in self._bounds]
+        if self._depths is None:
+            widths, _ = port_spec(self.engine)
+            shapes = {name: width for name, (width, _) in widths.items()}
+            self._depths = []
+            for k in range(len(self.stages)):
+                nl = Netlist()
+                x = {name: nl.add_input(name, width) for name, width in shapes.items()}
+                x = self._stage(k, nl, x)
+                for name, bus in x.items():
+                    nl.add_output(name, bus)
+                nl.finalize()
+                self._depths.append(nl.depth)
+                shapes = {name: len(bus) if isinstance(bus, list) else 1 for name, bus in x.items()}
+        return self._depths
+
+    def stats(self) -> Dict:
+        depths = self.stage_depths()
+        return {
+            "stages": len(self.stages),
+            "cycles": self.cycles,
+            "issued": self.issued,
+            "retired": self.retired,
+            "throughput": self.retired / self.cycles if self.cycles else 0.0,
+            "latency": self.total_latency / self.retired if self.retired else float(len(self.stages)),
+            "stage_depth": depths,
+            "critical_depth": max(depths),
+        }
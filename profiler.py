@@ -0,0 +1,138 @@
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from logic_gates import *
+from arithmetic import *
+from arith_engine import ArithEngine
+from logic_engine import LogicEngine
+from netlist import Netlist
+from utils import _memoized_classes
+
+
+# Opt-in profiler for the component call tree.
+#
+#   with Profiler() as prof:
+#       ArithEngine(8).run({"A": 1, "B": 2, "op": 4})
+#   print(prof.table())
+#   prof.write_folded("arith.folded")   # flamegraph.pl / speedscope input
+#
+# While active, every call() defined on a component class (and
+# Netlist.evaluate) is wrapped; run() goes through call(), so both entry
+# points are covered. The wrappers record call counts, cumulative and self
+# time per class and per call path (the stack of classes down to the
+# call). Sub-gates are shared flyweights (utils.shared), so one instance
+# serves every parent; the path, not the instance, tells two uses of a
+# class apart. Leaving the block puts
+# the original methods back, so there is no cost at all when profiling is
+# off. primitives counts the NAND/NOT gates evaluated by netlists. A
+# NANDGate or NOTGate call works on whole words, so it is one row of the
+# table, not a gate evaluation.
+def _component_classes():
+    classes = [ArithEngine, LogicEngine]
+    todo = [Gate, Arithmetic]
+    while todo:
+        cls = todo.pop()
+        classes.append(cls)
+        todo.extend(cls.__subclasses__())
+    memoized = set(_memoized_classes.values())
+    return [cls for cls in dict.fromkeys(classes) if "call" in cls.__dict__ and cls not in memoized]
+
+
+class Profiler:
+    active = None
+
+    def __init__(self):
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.cumulative: Dict[str, float] = defaultdict(float)
+        self.self_time: Dict[str, float] = defaultdict(float)
+        self.path_calls: Dict[Tuple[str, ...], int] = defaultdict(int)
+        self.path_time: Dict[Tuple[str, ...], float] = defaultdict(float)
+        self.stacks: Dict[Tuple[str, ...], float] = defaultdict(float)
+        self.primitives: Dict[str, int] = defaultdict(int)
+        self._stack: List[str] = []
+        self._child: List[float] = []
+        self._saved = []
+
+    def _wrap(self, name, func):
+        prof = self
+
+        def wrapper(obj, *args, **kw):
+            prof._stack.append(name)
+            prof._child.append(0.0)
+            start = time.perf_counter()
+            try:
+                return func(obj, *args, **kw)
+            finally:
+                elapsed = time.perf_counter() - start
+                child = prof._child.pop()
+                prof.calls[name] += 1
+                prof.cumulative[name] += elapsed
+                prof.self_time[name] += elapsed - child
+                path = tuple(prof._stack)
+                prof.path_calls[path] += 1
+                prof.path_time[path] += elapsed
+                prof.stacks[path] += elapsed - child
+                prof._stack.pop()
+                if prof._child:
+                    prof._child[-1] += elapsed
+
+        return wrapper
+
+    def _wrap_evaluate(self, func):
+        prof = self
+        wrapped = self._wrap("Netlist.evaluate", func)
+        counts = {}
+
+        def evaluate(nl, v):
+            if id(nl) not in counts:
+                counts[id(nl)] = (nl.count(Netlist.NAND), nl.count(Netlist.NOT))
+            prof.primitives["NAND"] += counts[id(nl)][0]
+            prof.primitives["NOT"] += counts[id(nl)][1]
+            return wrapped(nl, v)
+
+        return evaluate
+
+    def start(self):
+        assert Profiler.active is None, "a Profiler is already active"
+        Profiler.active = self
+        for cls in _component_classes():
+            call = cls.__dict__["call"]
+            self._saved.append((cls, "call", call))
+            setattr(cls, "call", self._wrap(cls.__name__, call))
+        self._saved.append((Netlist, "evaluate", Netlist.evaluate))
+        Netlist.evaluate = self._wrap_evaluate(Netlist.evaluate)
+        return self
+
+    def stop(self):
+        for cls, attr, func in reversed(self._saved):
+            setattr(cls, attr, func)
+        self._saved = []
+        Profiler.active = None
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # One row per class, sorted by self time; paths is the number of
+    # distinct call paths that reach the class.
+    def table(self, limit=None) -> str:
+        rows = sorted(self.calls, key=lambda name: self.self_time[name], reverse=True)[:limit]
+        lines = [f"{'component':<24}{'calls':>12}{'cumulative s':>16}{'self s':>12}{'paths':>12}"]
+        for name in rows:
+            paths = sum(1 for path in self.path_calls if path[-1] == name)
+            lines.append(f"{name:<24}{self.calls[name]:>12}{self.cumulative[name]:>16.6f}"
+                         f"{self.self_time[name]:>12.6f}{paths:>12}")
+        lines.append(f"netlist gates evaluated: NAND={self.primitives['NAND']} NOT={self.primitives['NOT']}")
+        return "\n".join(lines)
+
+    # Folded stacks, "A;B;C <self time in microseconds>" per line.
+    def folded(self) -> List[str]:
+        return [f"{';'.join(stack)} {round(seconds * 1e6)}" for stack, seconds in sorted(self.stacks.items())]
+
+    def write_folded(self, path):
+        with open(path, "w") as f:
+            f.write("\n".join(self.folded()) + "\n")
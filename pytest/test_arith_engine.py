@@ -32,4 +32,51 @@ def test_arith_engine():
             ref_out = A - B
         elif op == 6:
             ref_out = (A * B) % 256
-        assert out == ref_out or abs(out) + abs(ref_out) == pow(2, 8)
\ No newline at end of file
+        assert out == ref_out or abs(out) + abs(ref_out) == pow(2, 8)
+
+
+def test_arith_engine_fast_datapath():
+    samples = generate_samples(("A", "B"), -127, 128, sample_limit=300)
+    ops = generate_samples(("op",), 0, 6, sample_limit=300)
+    ref = ArithEngine(8)
+    ae = ArithEngine(8, adder=KoggeStoneAdder, mul=BoothMul)
+    for foo, bar in zip(samples, ops):
+        inputs = {"A": foo["A"], "B": foo["B"], "op": bar["op"]}
+        assert ae.run(inputs)["C"] == ref.run(inputs)["C"]
+
+
+def test_arith_engine_functional_mode():
+    samples = generate_samples(("A", "B"), -127, 128, sample_limit=500)
+    ops = generate_samples(("op",), 0, 7, sample_limit=500)
+    structural = ArithEngine(8)
+    functional = ArithEngine(8, mode="functional")
+    for foo, bar in zip(samples, ops):
+        inputs = {"A": foo["A"], "B": foo["B"], "op": bar["op"]}
+        assert functional.run(inputs)["C"] == structural.run(inputs)["C"]
+
+
+def test_arith_engine_call():
+    ae = ArithEngine(8)
+    assert ae.call(6, 7, ArithEngine.OPS["MUL"]) == 42
+    assert ae.run({"A": 6, "B": 7, "op": ArithEngine.OPS["SUB"]}) == {"C": 255}
+
+
+def test_arith_engine_128bit():
+    mask = pow(2, 128) - 1
+    samples = generate_samples(("A", "B"), 0, mask, sample_limit=50)
+    ae = ArithEngine(128)
+    for sample in samples:
+        A = sample["A"]
+        B = sample["B"]
+        assert ae.call(A, B, ArithEngine.OPS["AND"]) == A & B
+        assert ae.call(A, B, ArithEngine.OPS["ADD"]) == (A + B) & mask
+        assert ae.call(A, B, ArithEngine.OPS["SUB"]) == (A - B) & mask
+        assert ae.call(A, B, ArithEngine.OPS["MUL"]) == (A * B) & mask
+
+
+def test_arith_engine_lazy_datapaths():
+    ae = ArithEngine(12, mode="functional")
+    assert ae.call(5, 3, ArithEngine.OPS["AND"]) == 1
+    assert ae._mul is None and ae._adder is None
+    assert ae.call(5, 3, ArithEngine.OPS["MUL"]) == 15
+    assert ae._mul is ArithEngine(12).mul
@@ -41,3 +41,87 @@ def test_mul_8bit():
 
 def test_mul_32bit():
     helper_mul_multi_bits(32)
+
+
+def test_fulladder_32bit_batch():
+    samples = generate_samples(("A", "B", "C"), 0, pow(2, 32) - 1)
+    for sample in samples:
+        sample["C"] &= 1
+    adder = FullAdder_multi_bits(32)
+    for sample, output in zip(samples, adder.run_batch(samples)):
+        total = sample["A"] + sample["B"] + sample["C"]
+        assert output["sum"] == total % pow(2, 32) and output["car"] == total >> 32
+
+
+def test_mul_32bit_batch():
+    samples = generate_samples(("A", "B"), 0, pow(2, 32) - 1)
+    for sample, output in zip(samples, Mul(32).run_batch(samples)):
+        assert output["C"] == (sample["A"] * sample["B"]) % pow(2, 32)
+
+
+# Checks call() and the _add network lowered into the netlist.
+def helper_adder(adder, num_bits):
+    from netlist import compile_component
+    nl = compile_component(adder)
+    samples = generate_samples(("A", "B"), 0, pow(2, num_bits) - 1, sample_limit=300)
+    C = generate_samples(("C",), 0, 1, sample_limit=300)
+    for ab, car in zip(samples, C):
+        total = ab["A"] + ab["B"] + car["C"]
+        expected = {"sum": total % pow(2, num_bits), "car": total >> num_bits}
+        assert adder.run({"A": ab["A"], "B": ab["B"], "C": car["C"]}) == expected
+        assert nl.run({"A": ab["A"], "B": ab["B"], "C": car["C"]}) == expected
+
+
+def test_carry_lookahead_adder():
+    helper_adder(CarryLookaheadAdder(8), 8)
+    helper_adder(CarryLookaheadAdder(32), 32)
+
+
+def test_carry_select_adder():
+    helper_adder(CarrySelectAdder(8), 8)
+    helper_adder(CarrySelectAdder(30, block_bits=7), 30)
+
+
+def test_kogge_stone_adder():
+    helper_adder(KoggeStoneAdder(8), 8)
+    helper_adder(KoggeStoneAdder(32), 32)
+
+
+def test_sub_with_kogge_stone():
+    sub = Sub(16, KoggeStoneAdder)
+    for ab in generate_samples(("A", "B"), 0, pow(2, 16) - 1, sample_limit=200):
+        assert sub.run(ab)["sum"] == (ab["A"] - ab["B"]) % pow(2, 16)
+
+
+def test_wallace_mul():
+    for num_bits in (8, 32):
+        mul = WallaceMul(num_bits)
+        for ab in generate_samples(("A", "B"), 0, pow(2, num_bits) - 1, sample_limit=200):
+            assert mul.run(ab)["C"] == (ab["A"] * ab["B"]) % pow(2, num_bits)
+
+
+def test_booth_mul():
+    for num_bits in (7, 8, 32):
+        mul = BoothMul(num_bits)
+        for ab in generate_samples(("A", "B"), 0, pow(2, num_bits) - 1, sample_limit=200):
+            assert mul.run(ab)["C"] == (ab["A"] * ab["B"]) % pow(2, num_bits)
+
+
+def test_call():
+    assert HalfAdder().call(1, 1) == (0, 1)
+    assert FullAdder().call(1, 1, 1) == (1, 1)
+    assert KoggeStoneAdder(8).call(200, 100, 1) == (45, 1)
+    assert Sub(8).call(5, 7)[0] == 254
+    assert Mul(8).call(13, 11) == 143
+    assert Splitter(4).call(5) == [1, 0, 1, 0]
+    assert FullAdder_32bit().run({"A": 7, "B": 8, "C": 1}) == {"sum": 16, "car": 0}
+    for component in (FullAdder_32bit(), CarrySelectAdder(8), BoothMul(8)):
+        assert not hasattr(component, "__dict__")
+
+
+def test_ripple_words():
+    fa = FullAdder()
+    assert ripple_words(fa, pow(2, 64) - 1, 1, 0, 64) == (0, 1)
+    assert ripple_words(fa, pow(2, 64) - 1, 0, 1, 64) == (0, 1)
+    assert ripple_words(fa, 5, 9, 1, 4) == (15, 0)
+    assert KoggeStoneAdder(128).call(pow(2, 128) - 1, 0, 1) == (0, 1)
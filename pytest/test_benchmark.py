@@ -0,0 +1,25 @@
+import copy
+
+from benchmark import *
+
+
+def test_benchmark_run():
+    current = run(widths=(4,), repeat=1, batch_size=16, only="Add")
+    assert "FullAdder_multi_bits(4)" in current["results"]
+    for result in current["results"].values():
+        assert result["latency_s"] > 0 and result["batch_vectors_per_s"] > 0
+
+
+def test_benchmark_compare():
+    current = {"results": {"Mul(8)": {"latency_s": 1.0, "batch_vectors_per_s": 100.0}}}
+    assert compare(current, copy.deepcopy(current)) == []
+    slower = copy.deepcopy(current)
+    slower["results"]["Mul(8)"]["latency_s"] = 1.5
+    slower["results"]["Mul(8)"]["batch_vectors_per_s"] = 50.0
+    assert len(compare(slower, current, threshold=0.2)) == 2
+    assert compare(slower, current, threshold=1.0) == []
+
+
+def test_benchmark_construction():
+    results = construction(widths=(8,), repeat=1)
+    assert set(results["ArithEngine(8)"]) == {"cold_s", "warm_s", "first_call_s", "memory_bytes"}
@@ -0,0 +1,53 @@
+import codegen
+from arith_engine import ArithEngine
+from logic_gates import XORGate
+from arithmetic import KoggeStoneAdder
+from netlist import compile_component
+from optimize import optimize
+from utils import generate_samples
+
+
+def test_codegen_matches_netlist(tmp_path):
+    ae = ArithEngine(8)
+    ref = compile_component(ae)
+    nl = codegen.compile_component(ae, cache_dir=str(tmp_path))
+    samples = generate_samples(("A", "B"), -256, 255, sample_limit=300)
+    for sample, op in zip(samples, generate_samples(("op",), 0, 7, sample_limit=300)):
+        sample.update(op)
+        assert nl.run(sample) == ref.run(sample)
+        assert nl.call(sample["A"], sample["B"], sample["op"]) == ae.call(sample["A"], sample["B"], sample["op"])
+    assert nl.run_batch(samples) == ref.run_batch(samples)
+
+
+def test_codegen_multiple_outputs():
+    from arithmetic import KoggeStoneAdder
+    nl = codegen.compile_component(KoggeStoneAdder(8), cache_dir=None)
+    assert nl.call(200, 100, 1) == (45, 1)
+    assert nl.run({"A": 1, "B": 2, "C": 0}) == {"sum": 3, "car": 0}
+
+
+def test_codegen_disk_cache(tmp_path, monkeypatch):
+    nl = codegen.compile_component(XORGate(), 8, cache_dir=str(tmp_path))
+    key = nl.cache_key
+    for suffix in (".py", ".code", ".netlist"):
+        assert (tmp_path / (key + suffix)).exists()
+
+    # warm start: nothing is lowered, regenerated or recompiled
+    codegen._loaded.pop(key)
+    codegen._netlists.pop(key)
+    monkeypatch.setattr(codegen, "generate_source", lambda nl: None)
+    monkeypatch.setattr(codegen.netlist, "compile_component", lambda *args: None)
+    nl = codegen.compile_component(XORGate(), 8, cache_dir=str(tmp_path))
+    assert nl.call(5, 3) == 6 and nl.run_columns({"A": [5, 1], "B": [3, 1]}) == {"C": [6, 0]}
+
+
+def test_codegen_optimized_and_keyed():
+    ae = ArithEngine(16)
+    nl = codegen.compile_component(ae, cache_dir=None)
+    assert nl.gate_count == optimize(compile_component(ae)).gate_count < compile_component(ae).gate_count
+    assert nl.call(-300, 7, 6) == ae.call(-300, 7, 6)
+    key = codegen.component_key(ae)
+    assert key == nl.cache_key == codegen.component_key(ArithEngine(16))
+    assert key != codegen.component_key(ArithEngine(8))
+    assert key != codegen.component_key(ArithEngine(16, adder=KoggeStoneAdder))
+    assert key != codegen.component_key(ae, 17)
@@ -0,0 +1,128 @@
+import pytest
+
+from differential import *
+from differential import _engine_op
+from stimulus import random_batches, exhaustive_batches
+
+
+def test_golden_model_lookup():
+    assert golden_model(KoggeStoneAdder(8)) is golden_model(FullAdder_multi_bits(8))
+    assert golden_model(WallaceMul(8)) is golden_model(Mul(8))
+    with pytest.raises(NotImplementedError):
+        golden_model(object())
+
+
+def test_differential_gates():
+    ranges = {"A": (-256, 255), "B": (-256, 255)}
+    for gate in (NANDGate(), ANDGate(), ORGate(), NORGate(), XORGate(), XNORGate()):
+        result = differential(gate, random_batches(ranges, 500, 200))
+        assert result["vectors"] == 500 and result["mismatch_count"] == 0
+    assert differential(NOTGate(), {"A": list(range(-8, 8))})["mismatch_count"] == 0
+    batches = [{}, {"A": [], "B": []}, {"A": [1, 2], "B": [3, 4]}]
+    assert differential(ANDGate(), batches) == {"vectors": 2, "mismatch_count": 0, "mismatches": []}
+    assert differential(ANDGate(), {})["vectors"] == 0
+
+
+def test_differential_arithmetic():
+    ranges = {"A": (0, 255), "B": (0, 255), "C": (0, 1)}
+    for component in (FullAdder_multi_bits(8), KoggeStoneAdder(8), CarrySelectAdder(8)):
+        assert differential(component, random_batches(ranges, 500))["mismatch_count"] == 0
+    ranges = {"A": (0, 255), "B": (0, 255)}
+    for component in (Sub(8), Mul(8), WallaceMul(8), BoothMul(8)):
+        assert differential(component, random_batches(ranges, 500))["mismatch_count"] == 0
+    assert differential(Splitter(8), {"A": list(range(256))})["mismatch_count"] == 0
+    assert differential(Decoder_3bit(), {"A": [[a & 1, a >> 1 & 1, a >> 2] for a in range(8)]})["mismatch_count"] == 0
+
+
+def test_differential_engines():
+    ranges = {"A": (-127, 128), "B": (-127, 128), "op": (0, 7)}
+    for backend in ("call", "netlist"):
+        result = differential(ArithEngine(8), exhaustive_batches({"A": (-8, 7), "B": (-8, 7), "op": (0, 7)}),
+                              backend=backend, signed=False)
+        assert result["vectors"] == 2048 and result["mismatch_count"] == 0
+        result = differential(LogicEngine(), random_batches(ranges, 500), backend=backend, num_bits=8, signed=True)
+        assert result["mismatch_count"] == 0
+    ranges = {"A": (-pow(2, 31), pow(2, 32) - 1), "B": (-pow(2, 31), pow(2, 32) - 1), "op": (0, 7)}
+    result = differential(ArithEngine(32), random_batches(ranges, 2000, 500), backend="netlist", signed=False)
+    assert result["mismatch_count"] == 0
+
+
+def test_differential_minimizes_counterexamples():
+    engine = ArithEngine(16)
+    mask = pow(2, 16) - 1
+
+    # ADD drops the carry out of bit 7
+    def buggy(columns):
+        out = []
+        for op, a, b in zip(columns["op"], columns["A"], columns["B"]):
+            c = _engine_op(op, a, b, mask, True)
+            if op == 4 and ((a & 0xFF) + (b & 0xFF)) >> 8:
+                c = (c - 256) & mask
+            out.append(c)
+        return {"C": out}
+
+    ranges = {"A": (0, mask), "B": (0, mask), "op": (4, 5)}
+    result = differential(engine, random_batches(ranges, 1000), backend=buggy, max_mismatches=3)
+    assert 0 < result["mismatch_count"] < 1000
+    assert len(result["mismatches"]) == 3
+    first = result["mismatches"][0]
+    assert first["inputs"]["op"] == 4 and first["got"] != first["expected"]
+    # bits above the carry are shrunk away, op stays fixed
+    for mismatch in result["mismatches"]:
+        minimized = mismatch["minimized"]
+        assert minimized["op"] == 4
+        assert minimized["A"] < 256 and minimized["B"] < 256
+        assert minimized["A"] + minimized["B"] >= 256
+
+
+def test_differential_shifts_netlist():
+    for shift in (ShiftLeft(), ShiftRight()):
+        result = differential(shift, {"A": list(range(256))}, backend="netlist", num_bits=8)
+        assert result["mismatch_count"] == 0
+
+
+def test_vectorized_models_match_golden():
+    np = pytest.importorskip("numpy")
+    rng = np.random.default_rng(0)
+    components = [NOTGate(), NANDGate(), ANDGate(), ORGate(), NORGate(), XORGate(), XNORGate(), HalfAdder(),
+                  FullAdder(), FullAdder_multi_bits(8), KoggeStoneAdder(16), SWC(), NEG_multi_bits(8), Sub(8),
+                  ShiftLeft(), ShiftRight(), Mul(8), WallaceMul(8), ArithEngine(32), LogicEngine()]
+    for component in components:
+        columns = {name: rng.integers(-pow(2, 40), pow(2, 40), 500) for name in component.input_names}
+        for name in ("C", "S", "op"):
+            if name in columns:
+                columns[name] = rng.integers(0, 8 if name == "op" else 2, 500)
+        want = golden_model(component)(component, {name: x.tolist() for name, x in columns.items()})
+        got = vectorized_model(component)(component, columns)
+        assert {name: x.tolist() for name, x in got.items()} == want, type(component).__name__
+
+
+def test_differential_vectorized_backend():
+    np = pytest.importorskip("numpy")
+    from numpy_backend import ArrayEngine
+    engine = ArithEngine(32)
+    ranges = {"A": (-pow(2, 31), pow(2, 32) - 1), "B": (-pow(2, 31), pow(2, 32) - 1), "op": (0, 7)}
+    arrays = ArrayEngine(engine)
+    result = differential(engine, random_batches(ranges, 5000, 1000), backend=arrays.run, signed=False)
+    assert result["vectors"] == 5000 and result["mismatch_count"] == 0
+
+    # SUB off by one whenever bit 3 of A is set
+    def buggy(columns):
+        C = arrays.run(columns)["C"]
+        A, op = np.asarray(columns["A"]), np.asarray(columns["op"])
+        return {"C": np.where((op == 5) & (A & 8 != 0), C + 1, C)}
+
+    ranges = {"A": (0, 255), "B": (0, 255), "op": (4, 5)}
+    result = differential(engine, random_batches(ranges, 2000), backend=buggy, signed=False, max_mismatches=2)
+    assert result["mismatch_count"] > 0
+    for mismatch in result["mismatches"]:
+        assert type(mismatch["got"]["C"]) is int
+        assert mismatch["minimized"] == {"A": 8, "B": 0, "op": 5}
+
+
+def test_differential_wide_falls_back():
+    engine = ArithEngine(64, mode="functional")
+    ranges = {"A": (-pow(2, 63), pow(2, 64) - 1), "B": (-pow(2, 63), pow(2, 64) - 1), "op": (0, 7)}
+    assert differential(engine, random_batches(ranges, 300), signed=False)["mismatch_count"] == 0
+    wrong = lambda columns: {"C": [0] * len(columns["A"])}
+    assert differential(engine, {"A": [pow(2, 63)], "B": [1], "op": [0]}, backend=wrong)["mismatch_count"] == 1
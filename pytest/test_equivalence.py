@@ -0,0 +1,89 @@
+import pytest
+
+from equivalence import *
+from arithmetic import *
+from arith_engine import ArithEngine
+
+
+def equals(nl, bus, k):
+    hit = nl.CONST_1
+    for i, net in enumerate(bus):
+        hit = nl.and_(hit, net if (k >> i) & 1 else nl.not_(net))
+    return hit
+
+
+# Tie gate i of a compiled netlist's second input to 1: NAND(a, b) -> NOT a.
+def mutated(component, i):
+    nl = compile_component(component)
+    i = next(j for j in range(i, len(nl.gates)) if nl.gates[j][0] == nl.NAND)
+    kind, out, a, _ = nl.gates[i]
+    nl.gates[i] = (kind, out, a, nl.CONST_1)
+    return nl.finalize()
+
+
+def test_bdd():
+    bdd = BDD()
+    a, b, c = (bdd.variable(i) for i in range(3))
+    assert bdd.xor(a, a) == BDD.FALSE and bdd.xor(a, a ^ 1) == BDD.TRUE
+    assert bdd.and_(a, bdd.and_(b, c)) == bdd.and_(bdd.and_(c, a), b)
+    assert bdd.nand(a ^ 1, b ^ 1) == bdd.nand(bdd.nand(a, a), bdd.nand(b, b))
+    assert bdd.sat_one(bdd.and_(a, b ^ 1)) == {0: 1, 1: 0}
+    assert bdd.sat_one(bdd.and_(a, a ^ 1)) is None
+
+
+def test_miter_ports():
+    nl = miter(compile_component(Mul(8)), compile_component(WallaceMul(8)))
+    assert sorted(nl.outputs) == ["left.C", "right.C"]
+    assert nl.run({"A": 200, "B": 100}) == {"left.C": 200 * 100 & 255, "right.C": 200 * 100 & 255}
+    with pytest.raises(AssertionError):
+        miter(compile_component(Mul(8)), compile_component(FullAdder_multi_bits(8)))
+    with pytest.raises(AssertionError):
+        miter(compile_component(Mul(8)), compile_component(Mul(16)))
+
+
+def test_equivalent_adders():
+    for adder in (KoggeStoneAdder(32), CarrySelectAdder(32), CarryLookaheadAdder(32)):
+        result = equivalent(FullAdder_multi_bits(32), adder)
+        assert result["equivalent"] is True and result["counterexample"] is None
+        assert result["outputs"] == {"sum": ["bdd"], "car": ["bdd"]}
+    nl = compile_component(KoggeStoneAdder(32))
+    assert equivalent(nl, optimize(nl))["outputs"] == {"sum": ["structural"], "car": ["structural"]}
+
+
+def test_equivalent_multipliers():
+    for mul in (WallaceMul(16), BoothMul(16)):
+        result = equivalent(Mul(16), mul)
+        assert result["equivalent"] is True and result["outputs"] == {"C": ["algebraic"]}
+    result = equivalent(ArithEngine(16), ArithEngine(16, adder=KoggeStoneAdder, mul=WallaceMul))
+    assert result["equivalent"] is True
+    assert result["outputs"]["C"] == ["algebraic", "bdd", "structural"]
+
+
+def test_equivalent_finds_point_bug():
+    # sum bit 0 flips for one input pair out of 2^65: random vectors miss it
+    nl = compile_component(KoggeStoneAdder(32))
+    A, B = nl.inputs["A"][0], nl.inputs["B"][0]
+    hit = nl.and_(equals(nl, A, 0x12345678), equals(nl, B, 0x0F0F0F0F))
+    s = nl.outputs["sum"][0]
+    nl.add_output("sum", [nl.nand(nl.nand(s[0], nl.not_(hit)), nl.nand(nl.not_(s[0]), hit))] + s[1:])
+    nl.finalize()
+    result = equivalent(FullAdder_multi_bits(32), nl)
+    assert result["equivalent"] is False and result["outputs"]["sum"] == ["bdd"]
+    inputs = result["counterexample"]["inputs"]
+    assert inputs["A"] == 0x12345678 and inputs["B"] == 0x0F0F0F0F
+    assert result["counterexample"]["left"]["sum"] ^ result["counterexample"]["right"]["sum"] == 1
+
+
+def test_equivalent_multiplier_counterexample():
+    for mul in (WallaceMul(16), BoothMul(16)):
+        bad = mutated(mul, 1000)
+        result = equivalent(Mul(16), bad)
+        assert result["equivalent"] is False and result["outputs"]["C"] == ["simulation"]
+        result = equivalent(Mul(16), bad, vectors=0)
+        assert result["equivalent"] is False and result["outputs"]["C"] == ["algebraic"]
+        inputs = result["counterexample"]["inputs"]
+        assert result["counterexample"]["left"]["C"] == inputs["A"] * inputs["B"] & 0xFFFF
+        assert bad.run(inputs)["C"] != inputs["A"] * inputs["B"] & 0xFFFF
+    bad = mutated(ArithEngine(8), 1500)
+    result = equivalent(ArithEngine(8), bad, vectors=0, node_limit=20000)
+    assert result["equivalent"] is False and result["counterexample"]["inputs"]["op"] in range(8)
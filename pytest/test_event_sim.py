@@ -0,0 +1,24 @@
+from event_sim import *
+from netlist import *
+from utils import generate_samples
+
+
+def test_event_sim_matches_netlist():
+    nl = compile_component(ArithEngine(8))
+    sim = EventSimulator(nl)
+    samples = generate_samples(("A", "B"), -127, 128, sample_limit=300)
+    for sample, op in zip(samples, generate_samples(("op",), 0, 7, sample_limit=300)):
+        sample.update(op)
+        assert sim.run(sample) == nl.run(sample)
+
+
+def test_event_sim_activity():
+    nl = compile_component(FullAdder_multi_bits(16))
+    sim = EventSimulator(nl)
+    sim.run({"A": 0, "B": 0, "C": 0})
+    assert sim.evaluated == nl.gate_count
+    assert sim.run({"A": 0, "B": 0, "C": 0}) == {"sum": 0, "car": 0}
+    assert sim.evaluated == 0
+    assert sim.run({"A": 1 << 15, "B": 0, "C": 0}) == {"sum": 1 << 15, "car": 0}
+    assert 0 < sim.evaluated < nl.gate_count // 4
+    assert sim.run({"A": pow(2, 16) - 1, "B": 0, "C": 1}) == {"sum": 0, "car": 1}
@@ -0,0 +1,37 @@
+from fault_sim import *
+from netlist import compile_component
+from arithmetic import FullAdder_multi_bits, Mul
+from utils import generate_samples
+
+
+def serial(nl, fault, inputs):
+    net, stuck_at = fault
+    v = nl._slots()
+    nl._load(v, inputs)
+    for bus, _ in nl.inputs.values():
+        if net in bus:
+            v[net] = stuck_at
+    for out, a, b in nl.program:
+        v[out] = stuck_at if out == net else ~(v[a] & v[b]) & 1
+    return nl._unload(v)
+
+
+def test_fault_sim_matches_serial():
+    nl = compile_component(FullAdder_multi_bits(4))
+    vectors = generate_samples(("A", "B", "C"), 0, 15, sample_limit=20)
+    for sample in vectors:
+        sample["C"] &= 1
+    result = FaultSimulator(nl, lanes=64).run(vectors)
+    assert result["faults"] == len(faults(nl))
+    for fault in faults(nl):
+        first = next((i for i, x in enumerate(vectors) if serial(nl, fault, x) != nl.run(x)), None)
+        assert result["detected"].get(fault) == first
+
+
+def test_fault_sim_coverage():
+    nl = compile_component(Mul(4))
+    vectors = generate_samples(("A", "B"), 0, 15, sample_limit=200)
+    result = FaultSimulator(nl).run(vectors)
+    assert 0.5 < result["coverage"] < 1.0
+    assert len(result["detected"]) + len(result["undetected"]) == result["faults"]
+    assert net_name(nl, nl.inputs["A"][0][2]) == "A[2]"
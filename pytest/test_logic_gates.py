@@ -55,4 +55,20 @@ def test_xnor_gate():
     for sample in generate_samples(gate.input_names):
         ref_output = ~(sample["A"] ^ sample["B"])
         output = gate.run(sample)
-        assert output["C"] == ref_output
\ No newline at end of file
+        assert output["C"] == ref_output
+
+
+def test_run_batch():
+    for gate in (NANDGate(), ORGate(), XORGate(), XNORGate()):
+        samples = generate_samples(gate.input_names, -128, 127)
+        for sample, output in zip(samples, gate.run_batch(samples, 8)):
+            assert output == gate.run(sample)
+
+
+def test_call():
+    for gate in (NOTGate(), NANDGate(), ANDGate(), ORGate(), NORGate(), XORGate(), XNORGate()):
+        for sample in generate_samples(gate.input_names, -128, 127, sample_limit=100):
+            output = gate.call(*[sample[name] for name in gate.input_names])
+            assert gate.run(sample) == {gate.output_names[0]: output}
+    assert ORGate_4way().call([0, 0, 1, 0]) == 1
+    assert not hasattr(XORGate(), "__dict__")
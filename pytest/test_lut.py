@@ -0,0 +1,38 @@
+import pytest
+
+from lut import *
+from arithmetic import FullAdder_8bit, Mul
+from logic_engine import LogicEngine
+from utils import generate_samples
+
+
+def test_lut_matches_component(tmp_path):
+    engine = LogicEngine()
+    table = lookup_table(engine, signed=True, path=str(tmp_path / "logic.lut"))
+    samples = generate_samples(("A", "B"), -128, 127, sample_limit=300)
+    for sample, op in zip(samples, generate_samples(("op",), 0, 7, sample_limit=300)):
+        sample.update(op)
+        assert table.run(sample) == engine.run(sample)
+
+
+def test_lut_persisted(tmp_path):
+    path = str(tmp_path / "fa8.lut")
+    built = lookup_table(FullAdder_8bit(), path=path)
+    loaded = LookupTable.load(path)
+    assert isinstance(loaded.tables["sum"], memoryview)
+    assert loaded.structure == built.structure
+    for sample in generate_samples(("A", "B", "C"), 0, 1, sample_limit=20):
+        sample["A"] *= 200
+        assert loaded.run(sample) == FullAdder_8bit().run(sample)
+    assert loaded.call(255, 1, 1) == (1, 1)
+
+
+def test_lut_domain():
+    table = LookupTable.build(Mul(4))
+    assert table.call(15, 15) == 1 and table.size == 256
+    with pytest.raises(AssertionError, match="outside the table domain"):
+        table.call(16, 1)
+    table = LookupTable.build(LogicEngine(), signed=True)
+    assert table.call(-128, 127, 3) == LogicEngine().call(-128, 127, 3)
+    with pytest.raises(AssertionError, match=r"A=128 is outside the table domain \[-128, 128\)"):
+        table.call(128, 0, 0)
@@ -0,0 +1,95 @@
+import pytest
+
+from netlist import *
+from utils import generate_samples
+
+
+def helper_compare(component, samples, num_bits=None):
+    nl = compile_component(component, num_bits)
+    for sample in samples:
+        ref_output = component.run(dict(sample))
+        output = nl.run(sample)
+        for name in output:
+            assert output[name] == ref_output[name], f"{sample}: {output} != {ref_output}"
+
+
+def test_netlist_gates():
+    for gate in (NOTGate(), NANDGate(), ANDGate(), ORGate(), NORGate(), XORGate(), XNORGate()):
+        helper_compare(gate, generate_samples(gate.input_names, -128, 127, sample_limit=100), 8)
+
+
+def test_netlist_fulladder():
+    samples = generate_samples(("A", "B"), 0, 255, sample_limit=200)
+    for sample, car in zip(samples, generate_samples(("C",), 0, 1, sample_limit=200)):
+        sample.update(car)
+    helper_compare(FullAdder_multi_bits(8), samples)
+
+
+def test_netlist_sub_mul():
+    samples = generate_samples(("A", "B"), 0, 255, sample_limit=200)
+    helper_compare(Sub(8), samples)
+    helper_compare(Mul(8), samples)
+
+
+def test_netlist_widthless_blocks():
+    samples = generate_samples(("A",), 0, 255, sample_limit=100)
+    helper_compare(ShiftLeft(), samples, 8)
+    helper_compare(ShiftRight(), samples, 8)
+    assert compile_component(ShiftRight(), 8).run({"A": 200}) == {"B": 100}
+    for sample, s in zip(samples, generate_samples(("S",), 0, 1, sample_limit=100)):
+        sample.update(s)
+    helper_compare(SWC(), samples, 8)
+    assert SWC().run_batch([{"A": 37, "S": 1}], 8) == [{"B": 37}]
+    assert ShiftLeft().run_batch([{"A": 3}], 8) == [{"B": 6}]
+    for block in (SWC(), ShiftLeft(), ShiftRight()):
+        with pytest.raises(ValueError):
+            compile_component(block)
+
+
+def test_netlist_logic_engine():
+    samples = generate_samples(("A", "B"), -255, 255, sample_limit=300)
+    for sample, op in zip(samples, generate_samples(("op",), 0, 3, sample_limit=300)):
+        sample.update(op)
+    helper_compare(LogicEngine(), samples, 8)
+
+
+def test_netlist_arith_engine():
+    samples = generate_samples(("A", "B"), -127, 128, sample_limit=300)
+    for sample, op in zip(samples, generate_samples(("op",), 0, 7, sample_limit=300)):
+        sample.update(op)
+    helper_compare(ArithEngine(8), samples)
+
+
+def test_netlist_arith_engine_32bit():
+    samples = generate_samples(("A", "B"), -pow(2, 31), pow(2, 32) - 1, sample_limit=20)
+    for sample, op in zip(samples, generate_samples(("op",), 0, 6, sample_limit=20)):
+        sample.update(op)
+    helper_compare(ArithEngine(32), samples)
+
+
+def test_netlist_levels():
+    nl = compile_component(FullAdder_multi_bits(8))
+    assert nl.gate_count == nl.count(Netlist.NAND) + nl.count(Netlist.NOT)
+    assert sum(len(level) for level in nl.levels()) == nl.gate_count
+    assert len(nl.levels()) == nl.depth
+
+
+def test_netlist_run_batch_lanes():
+    nl = compile_component(ArithEngine(8))
+    samples = generate_samples(("A", "B"), -256, 255, sample_limit=500)
+    for sample, op in zip(samples, generate_samples(("op",), 0, 7, sample_limit=500)):
+        sample.update(op)
+    outputs = nl.run_batch(samples, lanes=64)
+    assert outputs == [nl.run(sample) for sample in samples]
+
+
+def test_netlist_report_adders():
+    ripple = report(FullAdder_multi_bits(32))
+    kogge_stone = report(KoggeStoneAdder(32))
+    assert kogge_stone["depth"] < ripple["depth"]
+    assert kogge_stone["gates"] > ripple["gates"]
+    for adder in (CarryLookaheadAdder(8), CarrySelectAdder(8), KoggeStoneAdder(8)):
+        samples = generate_samples(("A", "B"), 0, 255, sample_limit=100)
+        for sample, car in zip(samples, generate_samples(("C",), 0, 1, sample_limit=100)):
+            sample.update(car)
+        helper_compare(adder, samples)
@@ -0,0 +1,52 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from numpy_backend import *
+from arith_engine import ArithEngine
+from logic_engine import LogicEngine
+from arithmetic import Mul
+
+
+def helper_array_engine(engine, num_bits, low, high, num_ops, n=2000):
+    rng = np.random.default_rng(0)
+    A = rng.integers(low, high + 1, n)
+    B = rng.integers(low, high + 1, n)
+    op = rng.integers(0, num_ops, n)
+    C = ArrayEngine(engine, num_bits, chunk=512).run({"A": A, "B": B, "op": op})["C"]
+    for a, b, o, c in zip(A[:300], B[:300], op[:300], C[:300]):
+        assert engine.run({"A": int(a), "B": int(b), "op": int(o)})["C"] == c
+
+
+def test_array_arith_engine_8bit():
+    helper_array_engine(ArithEngine(8), None, -127, 128, 8)
+
+
+def test_array_arith_engine_32bit():
+    helper_array_engine(ArithEngine(32), None, -pow(2, 31), pow(2, 32) - 1, 7, n=50)
+
+
+def test_array_logic_engine():
+    helper_array_engine(LogicEngine(), 8, -256, 255, 4)
+
+
+def test_array_mul():
+    rng = np.random.default_rng(1)
+    A = rng.integers(0, 256, 1000)
+    B = rng.integers(0, 256, 1000)
+    C = ArrayEngine(Mul(8)).run({"A": A, "B": B})["C"]
+    assert (C == (A * B) % 256).all()
+
+
+def test_array_arith_engine_64bit():
+    engine = ArithEngine(64, mode="functional")
+    arrays = ArrayEngine(ArithEngine(64))
+    helper_array_engine(ArithEngine(64), None, -pow(2, 63), pow(2, 63) - 1, 8, n=100)
+    rng = np.random.default_rng(2)
+    A = [int(x) << 1 | 1 for x in rng.integers(-pow(2, 63), pow(2, 63) - 1, 100)]
+    op = [int(x) for x in rng.integers(0, 8, 100)]
+    C = arrays.run({"A": A, "B": A[::-1], "op": op})["C"]
+    assert C.dtype == object
+    assert list(C) == [engine.call(a, b, o) for a, b, o in zip(A, A[::-1], op)]
+    with pytest.raises(ValueError, match="does not fit in 65 signed bits"):
+        arrays.run({"A": [pow(2, 64)], "B": [0], "op": [0]})
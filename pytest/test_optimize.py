@@ -0,0 +1,33 @@
+from optimize import *
+from arith_engine import ArithEngine
+from logic_gates import XORGate
+from utils import generate_samples
+
+
+def test_optimize_matches_netlist():
+    nl = compile_component(ArithEngine(8))
+    opt = optimize(nl)
+    before, after = summary(nl, opt)["gates"]
+    assert after < before // 2
+    samples = generate_samples(("A", "B"), -256, 255, sample_limit=300)
+    for sample, op in zip(samples, generate_samples(("op",), 0, 7, sample_limit=300)):
+        sample.update(op)
+        assert opt.run(sample) == nl.run(sample)
+
+
+def test_optimize_double_not():
+    nl = compile_component(XORGate(), 8)
+    opt = optimize(nl)
+    assert summary(nl, opt) == {"gates": (72, 40), "nand": (24, 24), "not": (48, 16), "depth": (5, 3)}
+
+
+def test_optimize_fixed_op():
+    nl = compile_component(ArithEngine(8))
+    for op in range(8):
+        opt = optimize(nl, {"op": op})
+        assert "op" not in opt.inputs
+        for sample in generate_samples(("A", "B"), -256, 255, sample_limit=100):
+            sample["op"] = op
+            assert opt.run(sample) == nl.run(sample)
+    assert optimize(nl, {"op": ArithEngine.OPS["NAND"]}).gate_count == 9
+    assert optimize(nl, {"op": 7}).gate_count == 0
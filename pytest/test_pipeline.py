@@ -0,0 +1,50 @@
+import pytest
+
+from pipeline import *
+from logic_engine import LogicEngine
+from utils import generate_samples
+
+
+def test_pipeline_matches_engine():
+    for engine in (ArithEngine(8), LogicEngine()):
+        samples = generate_samples(("A", "B"), -256, 255, sample_limit=100)
+        for sample, op in zip(samples, generate_samples(("op",), 0, 7, sample_limit=100)):
+            sample.update(op)
+        for stages in ([("decode",), ("compute",), ("mux",)], [("decode", "compute"), ("mux",)], 1, 5):
+            pipe = Pipeline(engine, stages)
+            results = pipe.run(samples)
+            assert [r["C"] for r in results] == [engine.run(sample)["C"] for sample in samples]
+
+
+def test_pipeline_timing():
+    pipe = Pipeline(ArithEngine(8))
+    assert pipe.clock({"A": 2, "B": 3, "op": ArithEngine.OPS["ADD"]}) is None
+    assert pipe.clock({"A": 2, "B": 3, "op": ArithEngine.OPS["MUL"]}) is None
+    assert pipe.clock() is None
+    assert pipe.clock() == {"C": 5}
+    assert pipe.clock() == {"C": 6}
+    stats = pipe.stats()
+    assert stats["latency"] == 3 and stats["retired"] == 2 and stats["cycles"] == 5
+    assert stats["stage_depth"][1] == stats["critical_depth"] > stats["stage_depth"][0]
+
+
+def test_pipeline_balanced_stages():
+    engine = ArithEngine(16)
+    steps = Pipeline(engine).stage_depths()
+    for n in (3, 8):
+        pipe = Pipeline(engine, n)
+        depths = pipe.stage_depths()
+        assert len(depths) == n and sum(depths) == pipe.netlist.depth
+        assert max(depths) - min(depths) <= 1
+        assert max(depths) < max(steps)
+    pipe = Pipeline(engine, 8)
+    samples = [{"A": a, "B": b, "op": op} for a, b, op in ((300, -7, 6), (-32768, 65535, 4), (1234, 4321, 5))]
+    assert [r["C"] for r in pipe.run(samples)] == [engine.run(sample)["C"] for sample in samples]
+    assert pipe.stats()["latency"] == 8
+
+
+def test_pipeline_stages_checked():
+    with pytest.raises(AssertionError, match="in order"):
+        Pipeline(ArithEngine(8), [("compute",), ("decode",), ("mux",)])
+    with pytest.raises(AssertionError, match="between 1 and the netlist depth"):
+        Pipeline(ArithEngine(8), 0)
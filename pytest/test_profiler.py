@@ -0,0 +1,42 @@
+from profiler import *
+from netlist import compile_component
+
+
+def test_profiler_counts():
+    gate = XORGate()
+    with Profiler() as prof:
+        gate.run({"A": 1, "B": 0})
+    # XOR = 2 NOT + 2 AND(NAND, NOT) + OR(2 NOT, NAND)
+    assert prof.calls["XORGate"] == 1
+    assert prof.calls["ANDGate"] == 2 and prof.calls["ORGate"] == 1
+    assert prof.calls["NANDGate"] == 3 and prof.calls["NOTGate"] == 6
+    assert prof.primitives["NAND"] == prof.primitives["NOT"] == 0
+    assert prof.cumulative["XORGate"] >= prof.self_time["XORGate"] >= 0
+    assert ("XORGate", "ANDGate", "NANDGate") in prof.stacks
+    assert "netlist gates evaluated: NAND=0 NOT=0" in prof.table()
+
+
+def test_profiler_restores_methods():
+    call = ANDGate.__dict__["call"]
+    with Profiler():
+        assert ANDGate.__dict__["call"] is not call
+    assert ANDGate.__dict__["call"] is call
+    assert Profiler.active is None
+
+
+def test_profiler_folded_and_netlist():
+    ae = ArithEngine(8)
+    nl = compile_component(ae)
+    with Profiler() as prof:
+        ae.run({"A": 3, "B": 5, "op": 6})
+        nl.run({"A": 3, "B": 5, "op": 6})
+    assert prof.calls["ArithEngine"] == 1 and prof.calls["Netlist.evaluate"] == 1
+    assert prof.path_calls[("ArithEngine",)] == 1
+    # one shared ANDGate, reached through several parents
+    and_paths = [path for path in prof.path_calls if path[-1] == "ANDGate"]
+    assert len(and_paths) > 1 and sum(prof.path_calls[path] for path in and_paths) == prof.calls["ANDGate"]
+    lines = prof.folded()
+    assert any(line.startswith("ArithEngine;Mul;FullAdder;HalfAdder;XORGate") for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert prof.primitives["NAND"] == nl.count(Netlist.NAND)
+    assert prof.primitives["NOT"] == nl.count(Netlist.NOT)
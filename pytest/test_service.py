@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from service import *
+from service import _read_frame
+from utils import generate_samples
+
+
+def test_service_round_trip(tmp_path):
+    path = str(tmp_path / "alu.sock")
+    samples = generate_samples(("A", "B"), -256, 255, sample_limit=200)
+    ops = [sample["op"] for sample in generate_samples(("op",), 0, 7, sample_limit=200)]
+    A = [sample["A"] for sample in samples]
+    B = [sample["B"] for sample in samples]
+    reference = ArithEngine(8)
+
+    async def session():
+        async with Server(path, widths=(8,), max_width=128) as server:
+            async with Client(path, max_in_flight=4) as client:
+                chunks = [client.evaluate(8, ops[i:i + 20], A[i:i + 20], B[i:i + 20]) for i in range(0, 200, 20)]
+                results = [c for chunk in await asyncio.gather(*chunks) for c in chunk]
+                wide = await client.evaluate(128, [6], [pow(2, 100)], [3])
+                with pytest.raises(ServiceError, match="do not fit"):
+                    await client.evaluate(8, [4], [1000], [0])
+                assert await client.evaluate(8, [4], [1], [2]) == [3]
+            return results, wide, server.vectors
+
+    results, wide, vectors = asyncio.run(session())
+    assert results == [reference.call(a, b, op) for op, a, b in zip(ops, A, B)]
+    assert wide == [3 * pow(2, 100)]
+    assert vectors == 202
+
+
+def test_service_protocol():
+    frame = encode_request(7, 8, [4, 5], [-1, 255], [2, -256])
+    assert decode_request(frame[4:]) == (7, 8, [4, 5], [-1, 255], [2, -256])
+    with pytest.raises(ValueError, match="needs 20 bytes, got 15"):
+        decode_request(frame[4:-5])
+    with pytest.raises(ValueError, match="same length"):
+        encode_request(7, 8, [4], [1, 2], [3])
+
+
+def test_service_truncated_frame(tmp_path):
+    path = str(tmp_path / "alu.sock")
+    truncated = REQUEST.pack(1, 8, 5) + bytes((4,)) + (1).to_bytes(2, "little") + (2).to_bytes(2, "little")
+
+    async def session():
+        async with Server(path, widths=(8,)):
+            reader, writer = await asyncio.open_unix_connection(path)
+            writer.write(LENGTH.pack(len(truncated)) + truncated + encode_request(2, 8, [4], [1], [2]))
+            await writer.drain()
+            responses = [await _read_frame(reader), await _read_frame(reader)]
+            writer.close()
+            await writer.wait_closed()
+            return responses
+
+    error, ok = asyncio.run(session())
+    assert RESPONSE.unpack_from(error) == (1, ERROR, len(error) - RESPONSE.size)
+    assert "5 records" in error[RESPONSE.size:].decode()
+    assert ok == RESPONSE.pack(2, OK, 1) + (3).to_bytes(2, "little", signed=True)
+
+
+def test_service_width_bound(tmp_path):
+    path = str(tmp_path / "alu.sock")
+
+    async def session():
+        async with Server(path, widths=(8,), max_width=32, cache=2) as server:
+            async with Client(path) as client:
+                with pytest.raises(ServiceError, match="width 33 is not served"):
+                    await client.evaluate(33, [4], [1], [2])
+                for width in (4, 16, 32, 12):
+                    assert await client.evaluate(width, [4], [1], [2]) == [3]
+                assert await client.evaluate(8, [6], [3], [5]) == [15]
+            return sorted(server.engines), sorted(server.cache.data)
+
+    assert asyncio.run(session()) == ([8], [12, 32])
+
+
+def test_client_fails_pending_when_reader_stops(tmp_path):
+    path = str(tmp_path / "fake.sock")
+
+    async def stray_response(reader, writer):
+        await _read_frame(reader)
+        response = RESPONSE.pack(12345, OK, 0)
+        writer.write(LENGTH.pack(len(response)) + response)
+        await reader.read()
+        writer.close()
+
+    async def hang_up(reader, writer):
+        await _read_frame(reader)
+        writer.close()
+
+    async def session(handler):
+        server = await asyncio.start_unix_server(handler, path=path)
+        async with server:
+            client = await Client(path).connect()
+            with pytest.raises(ConnectionError) as first:
+                await asyncio.wait_for(client.evaluate(8, [4], [1], [2]), 5)
+            with pytest.raises(ConnectionError):
+                await asyncio.wait_for(client.evaluate(8, [4], [1], [2]), 5)
+            await client.close()
+            return str(first.value)
+
+    assert "unknown request id 12345" in asyncio.run(session(stray_response))
+    assert "connection lost" in asyncio.run(session(hang_up))
@@ -0,0 +1,53 @@
+import os
+import tempfile
+
+from stimulus import *
+from netlist import *
+
+
+def test_random_batches():
+    ranges = {"A": (-5, 5), "B": (0, 100)}
+    batches = list(random_batches(ranges, 1000, batch_size=300, seed=1))
+    assert [batch_size_of(batch) for batch in batches] == [300, 300, 300, 100]
+    assert all(-5 <= x <= 5 for batch in batches for x in batch["A"])
+    again = list(random_batches(ranges, 1000, batch_size=300, seed=1))
+    assert [list(batch["B"]) for batch in batches] == [list(batch["B"]) for batch in again]
+
+
+def test_exhaustive_batches():
+    ranges = {"A": (0, 3), "B": (-1, 1)}
+    vectors = [row for batch in exhaustive_batches(ranges, batch_size=5) for row in rows(batch)]
+    assert len(vectors) == 12
+    assert vectors[0] == {"A": 0, "B": -1} and vectors[1] == {"A": 1, "B": -1}
+    assert len({(v["A"], v["B"]) for v in vectors}) == 12
+    tail = [row for batch in exhaustive_batches(ranges, start=10) for row in rows(batch)]
+    assert tail == vectors[10:]
+
+
+def test_corner_batches():
+    values = corner_values(-128, 127)
+    assert {-128, -1, 0, 1, 127, 0x55}.issubset(values)
+    assert all(-128 <= x <= 127 for x in values)
+    batch = next(corner_batches({"A": (0, 255), "B": (0, 255)}, batch_size=pow(2, 20)))
+    assert batch_size_of(batch) == len(corner_values(0, 255)) ** 2
+
+
+def test_replay_batches():
+    source = list(random_batches({"A": (0, 255), "B": (0, 255), "op": (0, 3)}, 50, batch_size=16))
+    fd, path = tempfile.mkstemp()
+    os.close(fd)
+    try:
+        record_batches(path, source)
+        replayed = list(replay_batches(path, ("A", "B", "op"), batch_size=16))
+    finally:
+        os.remove(path)
+    assert [list(rows(batch)) for batch in replayed] == [list(rows(batch)) for batch in source]
+
+
+def test_batches_feed_netlist():
+    nl = compile_component(LogicEngine(), 8)
+    for batch in chain(corner_batches({"A": (-256, 255), "B": (0, 0), "op": (0, 3)}),
+                       random_batches({"A": (-256, 255), "B": (-256, 255), "op": (0, 3)}, 500)):
+        outputs = nl.run_columns(batch)
+        for inputs, C in zip(rows(batch), outputs["C"]):
+            assert C == nl.run(inputs)["C"]
@@ -0,0 +1,42 @@
+from sweep import *
+from arith_engine import ArithEngine
+from arithmetic import Mul
+from netlist import compile_component
+
+
+def test_sweep_exhaustive():
+    result = sweep(Mul(4), lambda x: {"C": (x["A"] * x["B"]) % 16}, {"A": (0, 15), "B": (0, 15)},
+                   exhaustive=True, processes=2)
+    assert result["vectors"] == 256
+    assert result["mismatch_count"] == 0
+
+
+def test_sweep_reports_mismatches():
+    result = sweep(ArithEngine(8, mode="functional"), lambda x: {"C": x["A"] + x["B"]},
+                   {"A": (0, 255), "B": (0, 255), "op": (4, 4)}, num_vectors=400, processes=2, max_mismatches=3)
+    assert result["vectors"] == 400
+    assert 0 < result["mismatch_count"] < 400
+    assert len(result["mismatches"]) == 3
+    for inputs, output, expected in result["mismatches"]:
+        assert inputs["A"] + inputs["B"] > 255 and output["C"] == expected["C"] % 256
+
+
+def test_sweep_deterministic():
+    def ref(x):
+        return {"C": x["A"] | x["B"] | 1}
+    ranges = {"A": (-255, 255), "B": (-255, 255), "op": (0, 0)}
+    nl = compile_component(ArithEngine(8))
+    serial = sweep(nl, ref, ranges, num_vectors=300, shards=6, processes=1, batch=True, max_mismatches=300)
+    pooled = sweep(nl, ref, ranges, num_vectors=300, shards=6, processes=3, batch=True, max_mismatches=300)
+    assert 0 < serial["mismatch_count"] == pooled["mismatch_count"]
+    assert serial["mismatches"] == pooled["mismatches"]
+
+
+def test_sweep_default_shards_independent_of_processes():
+    ranges = {"A": (-255, 255), "B": (-255, 255), "op": (0, 0)}
+    nl = compile_component(ArithEngine(8))
+    results = [sweep(nl, lambda x: {"C": x["A"] | x["B"] | 1}, ranges, num_vectors=300, processes=processes,
+                     batch=True, max_mismatches=300) for processes in (1, 2, 3)]
+    assert all(len(result["shards"]) == SHARDS for result in results)
+    assert results[0]["mismatch_count"] > 0
+    assert results[0]["mismatches"] == results[1]["mismatches"] == results[2]["mismatches"]
@@ -0,0 +1,88 @@
+import pytest
+
+from tracefile import *
+from arith_engine import ArithEngine
+from logic_engine import LogicEngine
+from utils import generate_samples
+
+
+def record(path, engine, width, count, **kw):
+    samples = generate_samples(("A", "B"), -pow(2, width), pow(2, width) - 1, sample_limit=count)
+    ops = generate_samples(("op",), 0, 7, sample_limit=count)
+    with TraceWriter(path, width, **kw) as w:
+        for sample, op in zip(samples, ops):
+            w.write(op["op"], sample["A"], sample["B"], engine.call(sample["A"], sample["B"], op["op"]))
+    return samples, ops
+
+
+def test_trace_round_trip(tmp_path):
+    path = str(tmp_path / "alu.trace")
+    engine = ArithEngine(8)
+    samples, ops = record(path, engine, 8, 1000, block_records=256)
+    trace = Trace(path)
+    assert len(trace) == 1000 and trace.width == 8 and len(trace.index) == 4
+    rows = [row for batch in trace.batches(100) for row in zip(*batch.values())]
+    assert [row[:3] for row in rows] == [(op["op"], s["A"], s["B"]) for s, op in zip(samples, ops)]
+    batch = next(trace.batches())
+    assert isinstance(batch["A"], memoryview) and batch["A"].format == "h"
+    assert check(trace, engine)["mismatch_count"] == 0
+    assert check(trace, engine, compiled=False)["vectors"] == 1000
+
+
+def test_trace_mismatch_and_ops(tmp_path):
+    path = str(tmp_path / "logic.trace")
+    with TraceWriter(path, 8, block_records=4, index=False) as w:
+        w.write_batch({"op": [0, 0, 0, 0, 1, 1], "A": [1, 2, 3, 4, 5, 6], "B": [1, 1, 1, 1, 1, 1],
+                       "C": [1, 3, 3, 5, -2, 0]})
+    trace = Trace(path)
+    result = check(trace, LogicEngine())
+    assert result["mismatch_count"] == 1 and result["mismatches"][0]["index"] == 5
+    assert [len(b["op"]) for b in trace.batches(ops=[1])] == [4, 2]
+
+    path = str(tmp_path / "indexed.trace")
+    with TraceWriter(path, 8, block_records=4) as w:
+        w.write_batch({"op": [0, 0, 0, 0, 1, 1], "A": [1] * 6, "B": [1] * 6, "C": [1] * 6})
+    assert [len(b["op"]) for b in Trace(path).batches(ops=[1])] == [2]
+
+
+def test_trace_wide(tmp_path):
+    path = str(tmp_path / "wide.trace")
+    engine = ArithEngine(100, mode="functional")
+    record(path, engine, 100, 50, expected=True)
+    trace = Trace(path)
+    assert trace.size == 13
+    assert check(trace, engine, compiled=False)["mismatch_count"] == 0
+
+
+def test_trace_close_with_views(tmp_path):
+    path = str(tmp_path / "alu.trace")
+    record(path, ArithEngine(8), 8, 100, block_records=32)
+    with Trace(path) as trace:
+        batches = list(trace.batches(10))
+        held = batches[3]["A"]
+        assert held[0] == batches[3]["A"][0]
+    assert trace.buffer.closed
+    with pytest.raises(ValueError, match="released"):
+        held[0]
+
+
+def test_trace_invalid(tmp_path):
+    path = str(tmp_path / "bad.trace")
+    with open(path, "wb") as f:
+        f.write(b"\0" * 128)
+    with pytest.raises(ValueError, match="not a trace file"):
+        Trace(path)
+    with TraceWriter(path, 8, block_records=4) as w:
+        w.write(0, 1, 1, 1)
+        with pytest.raises(ValueError, match="A values must fit in 9 signed bits"):
+            w.write(0, 256, 1, 1)
+        with pytest.raises(ValueError, match="3-bit"):
+            w.write(8, 1, 1, 1)
+        w.write(0, 2, 1, 1)
+        with pytest.raises(ValueError, match="C values must fit"):
+            w.write_batch({"op": [0, 0], "A": [3, 4], "B": [1, 1], "C": [1, -300]})
+        with pytest.raises(ValueError, match="B has 1 values, expected 2"):
+            w.write_batch({"op": [0, 0], "A": [3, 4], "B": [1], "C": [1, 1]})
+        w.write(0, 3, 1, 1)
+    with Trace(path) as trace:
+        assert [list(batch["A"]) for batch in trace.batches()] == [[1, 2, 3]]
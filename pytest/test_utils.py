@@ -0,0 +1,84 @@
+import pytest
+
+from utils import *
+from arithmetic import Mul, Splitter
+
+
+def test_lru_cache_eviction():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.hits == 3 and cache.misses == 1 and len(cache) == 2
+
+
+def test_memoize():
+    mul = memoize(Mul(8), maxsize=16)
+    samples = generate_samples(("A", "B"), 0, 3, sample_limit=200)
+    for sample in samples:
+        assert mul.run(sample)["C"] == sample["A"] * sample["B"]
+    assert len(mul.cache) == 16
+    assert mul.cache.hits + mul.cache.misses == 200
+    assert mul.cache.hits > 0
+    unmemoize(mul)
+    assert not hasattr(mul, "cache")
+    assert mul.run({"A": 3, "B": 5})["C"] == 15
+
+
+def test_memoize_returns_copies():
+    splitter = memoize(Splitter(4))
+    splitter.run({"A": 5})["B"].append(1)
+    assert splitter.run({"A": 5})["B"] == [1, 0, 1, 0]
+
+
+def test_validation_levels():
+    from logic_gates import ANDGate, XORGate
+    gate = XORGate()
+    for level in VALIDATION_LEVELS:
+        with validation(level):
+            assert gate.run({"A": 1, "B": 0})["C"] == 1
+    assert get_validation() == "always"
+
+    for level in ("always", "top"):
+        with validation(level):
+            with pytest.raises(AssertionError, match="XORGate.run\\(\\) is missing input 'B'"):
+                gate.run({"A": 1})
+
+    and_gate = ANDGate()
+    with validation("once"):
+        and_gate.run({"A": 1, "B": 1})
+        with pytest.raises(AssertionError, match="'A'"):
+            ANDGate().run({"B": 1})
+    assert and_gate._inputs_checked
+
+
+def test_validation_engines():
+    from arith_engine import ArithEngine
+    from logic_engine import LogicEngine
+    for factory in (lambda: ArithEngine(8), LogicEngine):
+        for level in ("always", "top", "once"):
+            with validation(level):
+                engine = factory()
+                with pytest.raises(AssertionError, match=r"Engine.run\(\) is missing input 'op'"):
+                    engine.run({"A": 1, "B": 2})
+        with validation("off"):
+            with pytest.raises(KeyError):
+                factory().run({"A": 1, "B": 2})
+
+
+def test_shared():
+    from arithmetic import Sub, FullAdder_multi_bits
+    assert shared(Splitter, 4) is shared(Splitter, 4)
+    assert shared(Splitter, 4) is not shared(Splitter, 8)
+    assert Sub(8).adder is Sub(8).adder is Sub(8).neg.adder
+    assert Sub(8).adder.fa is FullAdder_multi_bits(16).fa
+    assert Splitter(4) is not Splitter(4)
+    assert is_shared(Sub(8).adder) and not is_shared(Sub(8))
+    with pytest.raises(ValueError):
+        memoize(Sub(8).adder)
+    adder = Sub(8).adder
+    clear_shared()
+    assert Sub(8).adder is not adder and not is_shared(adder)
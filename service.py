@@ -0,0 +1,264 @@
+import argparse
+import asyncio
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Sequence
+
+from arith_engine import ArithEngine
+from utils import LRUCache
+
+
+# Local evaluation service for ALU traces.
+#
+#   server:  python service.py --socket /tmp/alu.sock --widths 8 32
+#
+#   async with Client("/tmp/alu.sock") as client:
+#       C = await client.evaluate(32, ops, A, B)
+#
+# One process keeps warm, prebuilt engines per width and serves any number
+# of clients over a Unix socket, so tools stop paying for construction.
+#
+# Frames are length-prefixed: a 4-byte big-endian length, then the payload.
+#
+#   request   header (id: u32, width: u16, count: u32), then count records
+#             of op (u8), A and B (signed, little-endian, SIZE bytes)
+#   response  header (id: u32, status: u8, count: u32), then count values
+#             of C (signed, SIZE bytes); status 1 carries a UTF-8 error
+#             message instead
+#
+# SIZE is (width + 8) // 8 bytes, enough for the engine's num_bits + 1 bit
+# signed ports, so A and B may be given signed or unsigned.
+#
+# The widths given to the server are prebuilt and kept. Other widths up to
+# max_width are built on demand and kept in a small LRU cache; anything
+# wider gets an error response, so a single frame cannot make the server
+# build arbitrarily large engines.
+#
+# Each connection is served in order: the server reads the next request
+# only once the previous response has drained, so a client that stops
+# reading stalls its own connection and nothing else. Evaluation runs in a
+# worker thread so the event loop keeps accepting and reading.
+REQUEST = struct.Struct("!IHI")
+RESPONSE = struct.Struct("!IBI")
+LENGTH = struct.Struct("!I")
+OK = 0
+ERROR = 1
+
+
+def value_size(width):
+    return (width + 8) // 8
+
+
+def encode_request(request_id, width, ops: Sequence[int], A: Sequence[int], B: Sequence[int]) -> bytes:
+    if not len(ops) == len(A) == len(B):
+        raise ValueError("ops, A and B must have the same length")
+    size = value_size(width)
+    parts = [REQUEST.pack(request_id, width, len(ops))]
+    for op, a, b in zip(ops, A, B):
+        parts.append(bytes((op,)) + a.to_bytes(size, "little", signed=True) + b.to_bytes(size, "little", signed=True))
+    payload = b"".join(parts)
+    return LENGTH.pack(len(payload)) + payload
+
+
+# Raises ValueError (or struct.error for a short header) on a malformed
+# payload, before reading any record.
+def decode_request(payload):
+    request_id, width, count = REQUEST.unpack_from(payload)
+    if width == 0:
+        raise ValueError("width must be positive")
+    size = value_size(width)
+    record = 1 + 2 * size
+    if len(payload) != REQUEST.size + count * record:
+        raise ValueError(f"request of {count} records needs {REQUEST.size + count * record} bytes, got {len(payload)}")
+    ops, A, B = [], [], []
+    for offset in range(REQUEST.size, REQUEST.size + count * record, record):
+        ops.append(payload[offset])
+        A.append(int.from_bytes(payload[offset + 1:offset + 1 + size], "little", signed=True))
+        B.append(int.from_bytes(payload[offset + 1 + size:offset + record], "little", signed=True))
+    return request_id, width, ops, A, B
+
+
+async def _read_frame(reader):
+    length, = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+    return await reader.readexactly(length)
+
+
+def _default_factory(width):
+    return ArithEngine(width, mode="functional")
+
+
+class Server:
+    def __init__(self, path, widths=(8, 16, 32, 64), factory: Callable[[int], object] = _default_factory,
+                 max_width=64, cache=4):
+        self.path = path
+        self.factory = factory
+        self.max_width = max_width
+        self.engines: Dict[int, object] = {width: factory(width) for width in widths}
+        self.cache = LRUCache(cache)
+        self.executor = ThreadPoolExecutor(1)
+        self.server = None
+        self.requests = 0
+        self.vectors = 0
+
+    def _engine(self, width):
+        if width in self.engines:
+            return self.engines[width]
+        if width > self.max_width:
+            raise ValueError(f"width {width} is not served (max_width={self.max_width})")
+        engine = self.cache.get(width)
+        if engine is None:
+            engine = self.factory(width)
+        self.cache.put(width, engine)
+        return engine
+
+    def _evaluate(self, payload) -> bytes:
+        request_id = REQUEST.unpack_from(payload)[0] if len(payload) >= REQUEST.size else 0
+        try:
+            request_id, width, ops, A, B = decode_request(payload)
+            engine = self._engine(width)
+            lim = 1 << width
+            size = value_size(width)
+            out = [RESPONSE.pack(request_id, OK, len(ops))]
+            for op, a, b in zip(ops, A, B):
+                if op >= 8:
+                    raise ValueError(f"op={op} is not a 3-bit op")
+                if not (-lim <= a < lim and -lim <= b < lim):
+                    raise ValueError(f"A={a}, B={b} do not fit in {width + 1} signed bits")
+                out.append(engine.call(a, b, op).to_bytes(size, "little", signed=True))
+            self.requests += 1
+            self.vectors += len(ops)
+            return b"".join(out)
+        except (ValueError, struct.error) as e:
+            message = str(e).encode()
+            return RESPONSE.pack(request_id, ERROR, len(message)) + message
+
+    async def _serve(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    payload = await _read_frame(reader)
+                except asyncio.IncompleteReadError:
+                    break
+                response = await loop.run_in_executor(self.executor, self._evaluate, payload)
+                writer.write(LENGTH.pack(len(response)) + response)
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def start(self):
+        self.server = await asyncio.start_unix_server(self._serve, path=self.path)
+        return self
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.executor.shutdown()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+class ServiceError(Exception):
+    pass
+
+
+# Pipelining client: evaluate() may be called concurrently (e.g. through
+# asyncio.gather); requests go out back to back and a reader task matches
+# responses to requests by id. At most max_in_flight requests are
+# outstanding, which bounds the memory held on both sides. When the reader
+# stops (EOF, a reset, a response it cannot match), every pending call
+# fails with ConnectionError, and so does every later one.
+class Client:
+    def __init__(self, path, max_in_flight=16):
+        self.path = path
+        self.max_in_flight = max_in_flight
+        self.reader = None
+        self.writer = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_id = 0
+        self._slots = None
+        self._task = None
+        self._error = "connection closed"
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_unix_connection(self.path)
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._task = asyncio.create_task(self._read_responses())
+        return self
+
+    async def _read_responses(self):
+        try:
+            while True:
+                payload = await _read_frame(self.reader)
+                request_id, status, count = RESPONSE.unpack_from(payload)
+                future = self._pending.pop(request_id, None)
+                if future is None:
+                    raise ConnectionError(f"response for unknown request id {request_id}")
+                if future.done():
+                    continue
+                body = payload[RESPONSE.size:]
+                if status == OK:
+                    future.set_result(body)
+                else:
+                    future.set_exception(ServiceError(body.decode()))
+        except (asyncio.IncompleteReadError, ConnectionError, struct.error) as e:
+            self._error = f"connection lost: {e!r}"
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(self._error))
+            self._pending.clear()
+            self.writer.close()
+
+    async def evaluate(self, width, ops: Sequence[int], A: Sequence[int], B: Sequence[int]) -> List[int]:
+        async with self._slots:
+            if self._task.done():
+                raise ConnectionError(self._error)
+            request_id = self._next_id
+            self._next_id = (self._next_id + 1) & 0xFFFFFFFF
+            future = asyncio.get_running_loop().create_future()
+            self._pending[request_id] = future
+            try:
+                self.writer.write(encode_request(request_id, width, ops, A, B))
+                await self.writer.drain()
+            except BaseException:
+                self._pending.pop(request_id, None)
+                raise
+            body = await future
+        size = value_size(width)
+        return [int.from_bytes(body[i:i + size], "little", signed=True) for i in range(0, len(body), size)]
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        await self._task
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ic_design ALU evaluation service")
+    parser.add_argument("--socket", required=True, help="Unix socket path")
+    parser.add_argument("--widths", type=int, nargs="+", default=[8, 16, 32, 64])
+    parser.add_argument("--max-width", type=int, default=64, help="widest engine built on demand")
+    args = parser.parse_args(argv)
+
+    async def serve():
+        server = await Server(args.socket, args.widths, max_width=args.max_width).start()
+        print(f"serving widths {sorted(server.engines)} on {args.socket}")
+        async with server.server:
+            await server.server.serve_forever()
+
+    asyncio.run(serve())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+import itertools
+import random
+from array import array
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+
+# Streaming stimulus sources.
+#
+# Every source is a generator of batches. A batch is columnar,
+# {name: array('q') of values}, with at most batch_size vectors, so memory
+# stays flat however many vectors a campaign runs. Values that do not fit
+# in 64 bits fall back to plain lists. Batches feed Netlist.run_columns
+# directly; rows() expands one back into per-vector dicts for run().
+#
+# ranges maps input names to inclusive (min_val, max_val), like
+# utils.generate_samples.
+Batch = Dict[str, Sequence[int]]
+
+
+def _column(values: List[int]) -> Sequence[int]:
+    try:
+        return array("q", values)
+    except OverflowError:
+        return values
+
+
+def _batches(names, vectors: Iterable[Tuple[int, ...]], batch_size) -> Iterator[Batch]:
+    vectors = iter(vectors)
+    while True:
+        chunk = list(itertools.islice(vectors, batch_size))
+        if not chunk:
+            return
+        yield {name: _column(list(column)) for name, column in zip(names, zip(*chunk))}
+
+
+def rows(batch: Batch) -> Iterator[Dict[str, int]]:
+    names = list(batch)
+    for values in zip(*batch.values()):
+        yield dict(zip(names, values))
+
+
+def batch_size_of(batch: Batch) -> int:
+    return len(next(iter(batch.values())))
+
+
+# num_vectors uniformly random vectors, drawn lazily from random.Random(seed).
+def random_batches(ranges: Dict[str, Tuple[int, int]], num_vectors, batch_size=4096, seed=0) -> Iterator[Batch]:
+    rng = random.Random(seed)
+    names = list(ranges)
+    limits = [ranges[name] for name in names]
+    vectors = (tuple(rng.randint(low, high) for low, high in limits) for _ in range(num_vectors))
+    return _batches(names, vectors, batch_size)
+
+
+# Every vector of the cartesian product, or the [start, stop) slice of it.
+# The first name varies fastest; vectors are decoded from their index, so
+# a slice costs nothing to seek to.
+def exhaustive_batches(ranges: Dict[str, Tuple[int, int]], batch_size=4096, start=0, stop=None) -> Iterator[Batch]:
+    names = list(ranges)
+    limits = [ranges[name] for name in names]
+    if stop is None:
+        stop = 1
+        for low, high in limits:
+            stop *= high - low + 1
+
+    def vectors():
+        for index in range(start, stop):
+            values = []
+            for low, high in limits:
+                index, digit = divmod(index, high - low + 1)
+                values.append(low + digit)
+            yield tuple(values)
+    return _batches(names, vectors(), batch_size)
+
+
+# Interesting values inside [low, high]: the bounds, 0 and +-1, values
+# around every power of two (sign and carry boundaries), and alternating
+# and all-ones bit patterns that stress carry chains.
+def corner_values(low, high) -> List[int]:
+    width = max(abs(low), abs(high)).bit_length()
+    values = {low, high, 0, 1, -1}
+    for k in range(width + 1):
+        values.update(((1 << k) - 1, 1 << k, -(1 << k), -(1 << k) + 1))
+    ones = (1 << width) - 1
+    alternating = int("01" * width or "0", 2) & ones
+    values.update((alternating, ones ^ alternating))
+    return sorted(x for x in values if low <= x <= high)
+
+
+# Cartesian product of the corner values of every input.
+def corner_batches(ranges: Dict[str, Tuple[int, int]], batch_size=4096) -> Iterator[Batch]:
+    names = list(ranges)
+    vectors = itertools.product(*(corner_values(*ranges[name]) for name in names))
+    return _batches(names, vectors, batch_size)
+
+
+# Text replay: one vector per line, whitespace-separated values in the order
+# of names; blank lines and lines starting with # are skipped.
+def replay_batches(path, names: Sequence[str], batch_size=4096) -> Iterator[Batch]:
+    def vectors():
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                values = tuple(int(x) for x in line.split())
+                assert len(values) == len(names), f"expected {len(names)} values: {line}"
+                yield values
+    return _batches(list(names), vectors(), batch_size)
+
+
+def record_batches(path, batches: Iterable[Batch]):
+    with open(path, "w") as f:
+        for n, batch in enumerate(batches):
+            if n == 0:
+                f.write("# " + " ".join(batch) + "\n")
+            for values in zip(*batch.values()):
+                f.write(" ".join(str(x) for x in values) + "\n")
+
+
+def chain(*sources: Iterable[Batch]) -> Iterator[Batch]:
+    for source in sources:
+        yield from source
@@ -0,0 +1,112 @@
+import multiprocessing
+import time
+from typing import Callable, Dict, List, Tuple
+
+from stimulus import batch_size_of, exhaustive_batches, random_batches, rows
+
+
+# Sharded test-vector sweeps over a process pool.
+#
+# ranges maps each input name to an inclusive (min_val, max_val) range, like
+# utils.generate_samples. With exhaustive=True the whole cartesian product
+# is enumerated, otherwise num_vectors random vectors are drawn. The vector
+# space is cut into shards (SHARDS by default, independent of processes);
+# shard k draws from random.Random(f"{seed}:{k}"), so a sweep is
+# reproducible regardless of the process count.
+#
+# reference(inputs) returns the expected outputs; only the names it returns
+# are compared against component.run(inputs).
+#
+# Shards stream their vectors from stimulus.py in batches of BATCH_SIZE, so
+# worker memory does not grow with the shard size. batch=True evaluates a
+# whole batch at once, through run_columns on a compiled Netlist or through
+# run_batch on a gate or arithmetic block.
+BATCH_SIZE = 4096
+SHARDS = 64
+
+_component = None
+_reference = None
+
+
+def _init_worker(component, reference):
+    global _component, _reference
+    _component = component
+    _reference = reference
+
+
+def _run_shard(task):
+    shard, start, stop, ranges, exhaustive, seed, batch, max_mismatches = task
+    began = time.perf_counter()
+    if exhaustive:
+        source = exhaustive_batches(ranges, BATCH_SIZE, start, stop)
+    else:
+        source = random_batches(ranges, stop - start, BATCH_SIZE, f"{seed}:{shard}")
+    mismatches = []
+    count = 0
+    vectors = 0
+    for columns in source:
+        vectors += batch_size_of(columns)
+        if batch and hasattr(_component, "run_columns"):
+            outputs = _component.run_columns(columns)
+            outputs = [dict(zip(outputs, values)) for values in zip(*outputs.values())]
+        elif batch:
+            outputs = _component.run_batch(list(rows(columns)))
+        else:
+            outputs = [_component.run(inputs) for inputs in rows(columns)]
+        for inputs, output in zip(rows(columns), outputs):
+            expected = _reference(inputs)
+            if any(output[name] != value for name, value in expected.items()):
+                count += 1
+                if len(mismatches) < max_mismatches:
+                    mismatches.append((inputs, output, expected))
+    return {
+        "shard": shard,
+        "vectors": vectors,
+        "mismatch_count": count,
+        "mismatches": mismatches,
+        "seconds": time.perf_counter() - began,
+    }
+
+
+def _context():
+    # fork lets the pool inherit lambdas and unpicklable components
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+def sweep(component, reference: Callable[[Dict[str, int]], Dict[str, int]], ranges: Dict[str, Tuple[int, int]],
+          num_vectors=1000, exhaustive=False, shards=SHARDS, processes=None, seed=0, batch=False,
+          max_mismatches=10) -> Dict:
+    if exhaustive:
+        num_vectors = 1
+        for low, high in ranges.values():
+            num_vectors *= high - low + 1
+    processes = processes or multiprocessing.cpu_count()
+    shards = max(1, min(shards, num_vectors))
+    tasks = []
+    for shard in range(shards):
+        start = num_vectors * shard // shards
+        stop = num_vectors * (shard + 1) // shards
+        tasks.append((shard, start, stop, ranges, exhaustive, seed, batch, max_mismatches))
+
+    began = time.perf_counter()
+    if processes == 1:
+        _init_worker(component, reference)
+        results = [_run_shard(task) for task in tasks]
+    else:
+        with _context().Pool(processes, _init_worker, (component, reference)) as pool:
+            results = pool.map(_run_shard, tasks)
+    seconds = time.perf_counter() - began
+
+    mismatches: List = []
+    for result in results:
+        mismatches += result["mismatches"]
+    return {
+        "vectors": sum(result["vectors"] for result in results),
+        "mismatch_count": sum(result["mismatch_count"] for result in results),
+        "mismatches": mismatches[:max_mismatches],
+        "seconds": seconds,
+        "vectors_per_second": num_vectors / seconds if seconds else 0.0,
+        "shards": results,
+    }
@@ -0,0 +1,297 @@
+import mmap
+import struct
+import weakref
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from netlist import compile_component
+from optimize import optimize
+
+
+# Binary traces of ALU operation streams: (op, A, B[, expected C]).
+#
+#   with TraceWriter("run.trace", width=32) as w:
+#       w.write(op, A, B, C)                    # or w.write_batch(columns)
+#   with Trace("run.trace") as trace:
+#       for batch in trace.batches():           # zero-copy column views
+#           ...
+#       check(trace, ArithEngine(32))           # replay and compare
+#
+# Layout (little-endian, every section 8-byte aligned):
+#
+#   header   64 bytes: magic, version, width, value size, flags, records
+#            per block, record count, index offset (0 if none)
+#   blocks   block_records records each (the last may be short), stored
+#            column by column: op as u8, then A, B and C as signed
+#            value-size integers
+#   index    optional, per block: file offset, record count and a bitmask
+#            of the ops present, so replay can skip blocks by op
+#
+# Records are fixed size, so record i lives in block i // block_records;
+# without an index the block offsets are computed from the header. Values
+# are int8/16/32/64 (the smallest that holds width + 1 signed bits) and
+# replay hands out memoryviews cast straight onto the mmap, so nothing is
+# copied or turned into Python objects until a batch is evaluated. Widths
+# above 63 bits use raw little-endian columns decoded per item.
+MAGIC = b"ICTRACE\0"
+VERSION = 1
+HEADER = struct.Struct("<8sHHHHIQQ")
+HEADER_SIZE = 64
+INDEX = struct.Struct("<QII")
+EXPECTED = 1
+TYPECODES = {1: "b", 2: "h", 4: "i", 8: "q"}
+
+
+def value_size(width):
+    need = (width + 8) // 8
+    for size in TYPECODES:
+        if size >= need:
+            return size
+    return need
+
+
+def _pad(n):
+    return -n % 8
+
+
+def _column_sizes(count, size, expected):
+    sizes = [count] + [count * size] * (3 if expected else 2)
+    return [n + _pad(n) for n in sizes]
+
+
+class _WideView:
+    def __init__(self, view, size):
+        self.view = view
+        self.size = size
+
+    def __len__(self):
+        return len(self.view) // self.size
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return int.from_bytes(self.view[i * self.size:(i + 1) * self.size], "little", signed=True)
+
+
+class TraceWriter:
+    def __init__(self, path, width, expected=True, block_records=1 << 16, index=True, buffering=1 << 20):
+        self.path = path
+        self.width = width
+        self.size = value_size(width)
+        self.expected = expected
+        self.block_records = block_records
+        self.with_index = index
+        self.names = ("op", "A", "B", "C") if expected else ("op", "A", "B")
+        self.file = open(path, "wb", buffering=buffering)
+        self.file.write(b"\0" * HEADER_SIZE)
+        self.count = 0
+        self.index = []
+        self._reset()
+
+    def _reset(self):
+        self.columns = {name: [] for name in self.names}
+
+    def _encode(self, name, values):
+        if name == "op":
+            return array("B", values).tobytes()
+        if self.size in TYPECODES:
+            return array(TYPECODES[self.size], values).tobytes()
+        return b"".join(x.to_bytes(self.size, "little", signed=True) for x in values)
+
+    def _check(self, name, values):
+        if name == "op":
+            low, high, message = 0, 8, "op must be a 3-bit value"
+        else:
+            lim = 1 << self.width
+            low, high, message = -lim, lim, f"{name} values must fit in {self.width + 1} signed bits"
+        if not all(low <= x < high for x in values):
+            raise ValueError(message)
+
+    def _flush_block(self):
+        ops = self.columns["op"]
+        if not ops:
+            return
+        mask = 0
+        for op in set(ops):
+            mask |= 1 << op
+        self.index.append((self.file.tell(), len(ops), mask))
+        for name in self.names:
+            data = self._encode(name, self.columns[name])
+            self.file.write(data + b"\0" * _pad(len(data)))
+        self.count += len(ops)
+        self._reset()
+
+    # Records are checked before they are buffered, so a bad value raises
+    # here and never from a later write() or close().
+    def write(self, op, A, B, C=None):
+        record = (op, A, B, C)[:len(self.names)]
+        for name, x in zip(self.names, record):
+            self._check(name, (x,))
+        for name, x in zip(self.names, record):
+            self.columns[name].append(x)
+        if len(self.columns["op"]) == self.block_records:
+            self._flush_block()
+
+    # columns: {"op": [...], "A": [...], "B": [...], "C": [...]}, e.g. a
+    # stimulus batch with the expected results added.
+    def write_batch(self, columns: Dict[str, Sequence[int]]):
+        n = len(columns["op"])
+        for name in self.names:
+            if len(columns[name]) != n:
+                raise ValueError(f"{name} has {len(columns[name])} values, expected {n}")
+            self._check(name, columns[name])
+        start = 0
+        while start < n:
+            room = self.block_records - len(self.columns["op"])
+            for name in self.names:
+                self.columns[name].extend(columns[name][start:start + room])
+            start += room
+            if len(self.columns["op"]) == self.block_records:
+                self._flush_block()
+
+    def close(self):
+        self._flush_block()
+        index_offset = 0
+        if self.with_index:
+            index_offset = self.file.tell()
+            for entry in self.index:
+                self.file.write(INDEX.pack(*entry))
+        flags = EXPECTED if self.expected else 0
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.width, self.size, flags, self.block_records,
+                                    self.count, index_offset))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Use as a context manager, or call close(). close() releases every view
+# handed out by batches() first; the mapping itself is closed unless a
+# caller has exported one of those views further (e.g. into an ndarray), in
+# which case it is unmapped once that object goes away.
+class Trace:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.buffer) < HEADER_SIZE:
+            self.buffer.close()
+            raise ValueError(f"{path} is not a trace file")
+        magic, version, self.width, self.size, flags, self.block_records, self.count, index_offset = \
+            HEADER.unpack_from(self.buffer)
+        if magic != MAGIC or version != VERSION:
+            self.buffer.close()
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a trace file")
+            raise ValueError(f"{path} has trace version {version}, expected {VERSION}")
+        self.expected = bool(flags & EXPECTED)
+        self.names = ("op", "A", "B", "C") if self.expected else ("op", "A", "B")
+        self.view = memoryview(self.buffer)
+        self._views: Dict[int, weakref.ref] = {}
+        if index_offset:
+            self.index = [INDEX.unpack_from(self.buffer, index_offset + k * INDEX.size)
+                          for k in range((len(self.buffer) - index_offset) // INDEX.size)]
+        else:
+            self.index = self._scan()
+
+    # Block offsets from the header alone; the op mask is unknown (all ops).
+    def _scan(self):
+        index = []
+        offset = HEADER_SIZE
+        for start in range(0, self.count, self.block_records):
+            count = min(self.block_records, self.count - start)
+            index.append((offset, count, 0xFF))
+            offset += sum(_column_sizes(count, self.size, self.expected))
+        return index
+
+    def __len__(self):
+        return self.count
+
+    # Remember a view without keeping it alive, so close() can release it.
+    def _track(self, column):
+        if isinstance(column, memoryview):
+            ref = weakref.ref(column, lambda ref: self._views.pop(id(ref), None))
+            self._views[id(ref)] = ref
+        return column
+
+    def _block(self, offset, count) -> Dict[str, Sequence[int]]:
+        columns = {}
+        for name, size in zip(self.names, _column_sizes(count, self.size, self.expected)):
+            if name == "op":
+                columns[name] = self._track(self.view[offset:offset + count].cast("B"))
+            elif self.size in TYPECODES:
+                columns[name] = self._track(self.view[offset:offset + count * self.size].cast(TYPECODES[self.size]))
+            else:
+                columns[name] = _WideView(self._track(self.view[offset:offset + count * self.size]), self.size)
+            offset += size
+        return columns
+
+    # Columnar batches of at most batch_size records, as memoryviews over
+    # the mapped file. ops restricts replay to blocks holding any of them
+    # (whole blocks are yielded, so filter rows if exact selection matters).
+    def batches(self, batch_size=None, ops: Optional[Sequence[int]] = None) -> Iterator[Dict[str, Sequence[int]]]:
+        wanted = 0xFF
+        if ops is not None:
+            wanted = 0
+            for op in ops:
+                wanted |= 1 << op
+        for offset, count, mask in self.index:
+            if not mask & wanted:
+                continue
+            block = self._block(offset, count)
+            step = batch_size or count
+            for start in range(0, count, step):
+                yield {name: self._track(column[start:start + step]) for name, column in block.items()}
+
+    def close(self):
+        for ref in list(self._views.values()):
+            view = ref()
+            if view is not None:
+                try:
+                    view.release()
+                except BufferError:
+                    pass
+        self._views.clear()
+        try:
+            self.view.release()
+            self.buffer.close()
+        except BufferError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Replay a trace through an engine in batches and compare against the
+# recorded results. compiled=True evaluates each batch bit-sliced on the
+# engine's optimized netlist (widths up to the trace width); otherwise
+# every record goes through engine.call().
+def check(trace: Trace, engine, batch_size=4096, compiled=True, max_mismatches=10) -> Dict:
+    assert trace.expected, "trace has no expected results"
+    nl = optimize(compile_component(engine, trace.width)) if compiled else None
+    vectors = 0
+    count = 0
+    mismatches: List = []
+    for batch in trace.batches(batch_size):
+        if nl is not None:
+            results = nl.run_columns({"A": batch["A"], "B": batch["B"], "op": batch["op"]}, batch_size)["C"]
+        else:
+            results = [engine.call(a, b, op) for op, a, b in zip(batch["op"], batch["A"], batch["B"])]
+        for k, (got, want) in enumerate(zip(results, batch["C"])):
+            if got != want:
+                count += 1
+                if len(mismatches) < max_mismatches:
+                    mismatches.append({"index": vectors + k, "op": batch["op"][k], "A": batch["A"][k],
+                                       "B": batch["B"][k], "C": want, "got": got})
+        vectors += len(results)
+    return {"vectors": vectors, "mismatch_count": count, "mismatches": mismatches}
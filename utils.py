@@ -1,18 +1,104 @@
+import functools
 import random
+from collections import OrderedDict
+
+
+# Input validation policy for check_inputs:
+#   "always"  every run() checks its inputs (default)
+#   "top"     only the outermost run() checks; sub-gate calls made by
+#             trusted component code are not re-checked
+#   "once"    each instance checks its first run() only; inputs do not
+#             exist at construction, so the first call is the earliest
+#             point they can be checked. Netlists check their inputs on
+#             every run() regardless (Netlist._load).
+#   "off"     no checks
+# Gates, arithmetic blocks and both engines validate in run(); sub-gates
+# are driven through call() and are never re-checked.
+VALIDATION_LEVELS = ("always", "top", "once", "off")
+_validation = "always"
+_depth = 0
+
+
+def set_validation(level):
+    global _validation
+    assert level in VALIDATION_LEVELS, f"unknown validation level {level!r}, expected one of {VALIDATION_LEVELS}"
+    _validation = level
+
+
+def get_validation():
+    return _validation
+
+
+class validation:
+    def __init__(self, level):
+        self.level = level
+
+    def __enter__(self):
+        self.saved = get_validation()
+        set_validation(self.level)
+
+    def __exit__(self, *exc):
+        set_validation(self.saved)
+
+
+def validate_inputs(component, inputs):
+    for name in component.input_names:
+        if name not in inputs:
+            raise AssertionError(f"{type(component).__name__}.run() is missing input {name!r}, got {sorted(inputs)}")
 
 
 def check_inputs(func):
+    @functools.wraps(func)
     def wrapper(*args, **kw):
-        self = args[0]
-        inputs = args[1]
-        input_names = self.input_names
-        for name in input_names:
-            assert name in inputs.keys()
+        global _depth
+        if _validation == "always":
+            validate_inputs(args[0], args[1])
+        elif _validation == "top":
+            if _depth == 0:
+                validate_inputs(args[0], args[1])
+            _depth += 1
+            try:
+                return func(*args, **kw)
+            finally:
+                _depth -= 1
+        elif _validation == "once":
+            self = args[0]
+            if not getattr(self, "_inputs_checked", False):
+                validate_inputs(self, args[1])
+                self._inputs_checked = True
         return func(*args, **kw)
 
     return wrapper
 
 
+# Flyweight registry for sub-gates. Components keep no state between
+# calls, so every parent built in the process shares one sub-gate per
+# (class, constructor arguments) instead of building its own tree. Only
+# construction inside components goes through shared(): a component made
+# directly is a fresh instance, so memoize() and the other per-instance
+# slots still apply to it alone. memoize() refuses a shared instance, whose
+# cache every parent in the process would see.
+_shared = {}
+
+
+# Forget every shared sub-gate, so the next shared() call builds afresh
+# (e.g. to time cold construction). Components already built keep theirs.
+def clear_shared():
+    _shared.clear()
+
+
+def shared(cls, *args):
+    key = (cls, args)
+    component = _shared.get(key)
+    if component is None:
+        component = _shared[key] = cls(*args)
+    return component
+
+
+def is_shared(component):
+    return any(component is x for x in _shared.values())
+
+
 def generate_samples(input_names, min_val=0, max_val=1, sample_limit=1000):
     samples = []
     for i in range(sample_limit):
@@ -21,3 +107,85 @@ def generate_samples(input_names, min_val=0, max_val=1, sample_limit=1000):
             inputs[name] = random.randint(min_val, max_val)
         samples.append(inputs)
     return samples
+
+
+# Bounded mapping with least-recently-used eviction and hit/miss counters.
+class LRUCache:
+    def __init__(self, maxsize=4096):
+        assert maxsize > 0
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.data.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.data.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.data[key] = value
+        self.data.move_to_end(key)
+        if len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def clear(self):
+        self.data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.data)
+
+
+def _freeze(value):
+    return tuple(value) if isinstance(value, list) else value
+
+
+def _thaw(value):
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, tuple):
+        return tuple(_thaw(x) for x in value)
+    return value
+
+
+_memoized_classes = {}
+
+
+def _memoized_class(cls):
+    if cls not in _memoized_classes:
+        def call(self, *args):
+            key = tuple(_freeze(x) for x in args)
+            out = self.cache.get(key)
+            if out is None:
+                out = cls.call(self, *args)
+                self.cache.put(key, out)
+            return _thaw(out)
+
+        _memoized_classes[cls] = type(cls.__name__, (cls,), {"__slots__": (), "call": call})
+    return _memoized_classes[cls]
+
+
+# Cache call() results on one component instance. Every component is a pure
+# combinational function of its inputs, so the positional arguments are the
+# whole key, and run() goes through call() so both are cached. Components
+# use __slots__, so the instance is moved to a memoizing subclass of its
+# class; the cache is reachable as component.cache and unmemoize() moves
+# the instance back.
+def memoize(component, maxsize=4096):
+    if is_shared(component):
+        raise ValueError(f"{type(component).__name__} is a shared sub-gate, memoize a fresh instance instead")
+    component.__class__ = _memoized_class(type(component))
+    component.cache = LRUCache(maxsize)
+    return component
+
+
+def unmemoize(component):
+    component.__class__ = type(component).__bases__[0]
+    del component.cache
+    return component